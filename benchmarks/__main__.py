@@ -0,0 +1,228 @@
+"""
+Benchmark the parse → filter → state pipeline.
+
+Each benchmark reports operations per second and the peak memory allocated by
+a single operation. Results can be saved as a baseline (--save), which later
+runs are compared against; commit benchmarks/baseline.json alongside changes
+which are meant to affect performance, so that reviewers can see the effect.
+
+Everything runs offline: the coordinator refresh is done against a local stub
+of the Luas API.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from custom_components.luas.api import LuasApiClient, LuasSnapshot, parse
+from custom_components.luas.coordinator import LuasDataUpdateCoordinator
+from custom_components.luas.data import LuasData
+from custom_components.luas.sensor import LuasTramSensor
+
+from . import stub_server
+from .payloads import REALISTIC, WORST_CASE
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+PAYLOADS = {
+    "realistic": REALISTIC,
+    "worst_case": WORST_CASE,
+}
+
+
+@dataclass
+class Result:
+    """Result of a single benchmark."""
+
+    ops_per_sec: float
+    peak_bytes_per_op: int
+
+
+def measure(func: Callable[[], Any], min_time: float) -> Result:
+    """Measure func, running it repeatedly for at least min_time seconds."""
+    func()  # Warm up caches
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return Result(number / elapsed, peak)
+        number *= 2
+
+
+async def async_measure(func: Callable[[], Awaitable[Any]], min_time: float) -> Result:
+    """Measure the coroutine function func, like measure."""
+    await func()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await func()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return Result(number / elapsed, peak)
+        number *= 2
+
+
+def _tram_sensor(
+    coordinator: LuasDataUpdateCoordinator,
+    direction: str,
+    destination: str | None,
+) -> LuasTramSensor:
+    return LuasTramSensor(
+        coordinator=coordinator,
+        data=LuasData(
+            coordinator=coordinator,
+            integration=None,  # type: ignore[arg-type]
+            entry_id="benchmark",
+            station="san",
+            translated_station="Sandyford",
+            destinations=[],
+            translated_destinations=[],
+            directions=[direction],
+        ),
+        direction=direction,
+        translated_destination=destination,
+    )
+
+
+async def async_run(min_time: float) -> dict[str, Result]:
+    """Run all benchmarks."""
+    results: dict[str, Result] = {}
+    hass = HomeAssistant(tempfile.mkdtemp())
+    runner, base_url = await stub_server.async_start(stub_server.make_app())
+
+    async with aiohttp.ClientSession() as session:
+        coordinator = LuasDataUpdateCoordinator(
+            hass=hass,
+            station="san",
+            client=LuasApiClient(station="san", session=session, base_url=base_url),
+        )
+
+        for name, payload in PAYLOADS.items():
+            results[f"parse[{name}]"] = measure(lambda p=payload: parse(p), min_time)
+            results[f"parse_reference[{name}]"] = measure(
+                lambda p=payload: parse(p, reference=True), min_time
+            )
+
+            info = parse(payload)
+            results[f"snapshot[{name}]"] = measure(
+                lambda i=info: LuasSnapshot.from_info(i), min_time
+            )
+
+            coordinator.data = LuasSnapshot.from_info(info)
+            for destination in (None, "Parnell"):
+                label = f"{name},{destination or 'any'}"
+                sensor = _tram_sensor(coordinator, "Inbound", destination)
+                results[f"trams_in_direction[{label}]"] = measure(
+                    sensor._trams_in_direction,  # noqa: SLF001
+                    min_time,
+                )
+                results[f"native_value[{label}]"] = measure(
+                    lambda s=sensor: s.native_value, min_time
+                )
+                results[f"extra_state_attributes[{label}]"] = measure(
+                    lambda s=sensor: s.extra_state_attributes, min_time
+                )
+
+        results["coordinator_refresh[stub]"] = await async_measure(
+            coordinator.async_refresh, min_time
+        )
+
+    await runner.cleanup()
+    await hass.async_stop(force=True)
+    return results
+
+
+def _report(
+    results: dict[str, Result],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+) -> bool:
+    """Print results, returning whether any regressed beyond threshold."""
+    regressed = False
+    print(f"{'benchmark':<48} {'ops/sec':>12} {'KiB/op':>9} {'vs base':>8}")  # noqa: T201
+    for name, result in results.items():
+        change = ""
+        if name in baseline:
+            ratio = result.ops_per_sec / baseline[name]["ops_per_sec"] - 1
+            change = f"{ratio:+.0%}"
+            if ratio < -threshold:
+                change += " !"
+                regressed = True
+        print(  # noqa: T201
+            f"{name:<48} {result.ops_per_sec:>12,.0f}"
+            f" {result.peak_bytes_per_op / 1024:>9.1f} {change:>8}"
+        )
+    return regressed
+
+
+def main() -> int:
+    """Run benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Minimum time to spend on each benchmark, in seconds",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help=f"Save results as the new baseline in {BASELINE}",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail if ops/sec drops by more than this fraction of the baseline",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(async_run(args.min_time))
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    regressed = _report(results, baseline, args.threshold)
+
+    if args.save:
+        BASELINE.write_text(
+            json.dumps({k: asdict(v) for k, v in results.items()}, indent=2) + "\n"
+        )
+        return 0
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
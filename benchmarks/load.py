@@ -0,0 +1,279 @@
+"""
+Load-test the polling pipeline against a local stand-in for the Luas API.
+
+Runs many stops' coordinators through the batch poller, the way LuasHub does,
+against the stub server with configurable misbehaviour, and reports refresh
+latency percentiles, request counts and how busy the event loop was.
+
+    python3 -m benchmarks.load --stops 150 --duration 120 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.luas.api import LuasApiClient
+from custom_components.luas.const import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    PARSE_BATCH_SIZE,
+    POLL_TICK,
+)
+from custom_components.luas.coordinator import LuasDataUpdateCoordinator
+from custom_components.luas.parsing import LuasBatchParser
+from custom_components.luas.poller import LuasBatchPoller
+from custom_components.luas.resilience import CircuitBreaker
+from custom_components.luas.session import create_session
+
+from . import stub_server
+from .payloads import live
+
+if TYPE_CHECKING:
+    from custom_components.luas.api import LuasSnapshot
+
+
+class _TimedCoordinator(LuasDataUpdateCoordinator):
+    """A coordinator which records how long each poll took to land."""
+
+    poll_started: float
+    latencies: list[float]
+
+    def __init__(self, *args: object, latencies: list[float], **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)  # type: ignore[arg-type]
+        self.poll_started = 0.0
+        self.latencies = latencies
+
+    def async_set_polled_data(self, data: LuasSnapshot) -> None:
+        self.latencies.append(time.monotonic() - self.poll_started)
+        super().async_set_polled_data(data)
+
+    def async_set_poll_error(self, exception: Exception) -> None:
+        self.latencies.append(time.monotonic() - self.poll_started)
+        super().async_set_poll_error(exception)
+
+
+@dataclass
+class LoadReport:
+    """Outcome of a load test."""
+
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    polled: int = 0
+    failed: int = 0
+    deferred: int = 0
+    stale_stops: int = 0
+    unavailable_stops: int = 0
+    fetches: int = 0
+    unchanged: int = 0
+    coalesced: int = 0
+    parsed_inline: int = 0
+    parsed_offloaded: int = 0
+    parse_batches: int = 0
+    parse_saved: float = 0.0
+    connections_created: int = 0
+    connections_reused: int = 0
+    breaker_state: str = ""
+    loop_busy: float = 0.0
+    max_loop_lag: float = 0.0
+    stub: stub_server.StubStats = field(default_factory=stub_server.StubStats)
+
+
+async def _async_watch_loop(lags: list[float], interval: float = 0.05) -> None:
+    """Record how late the event loop is to wake a sleeping task."""
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(time.monotonic() - start - interval)
+
+
+async def async_run(args: argparse.Namespace) -> LoadReport:
+    """Poll args.stops stops against the stub for args.duration seconds."""
+    app = stub_server.make_app(
+        live(args.change_period),
+        faults=stub_server.StubFaults(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            malformed_rate=args.malformed_rate,
+        ),
+    )
+    base_url, stop_stub = stub_server.start_in_thread(app)
+
+    report = LoadReport()
+    hass = HomeAssistant(tempfile.mkdtemp())
+    breaker = CircuitBreaker()
+    # A batch size of 0 parses everything on the event loop
+    parser = (
+        LuasBatchParser(hass, batch_size=args.parse_batch_size)
+        if args.parse_batch_size
+        else None
+    )
+    poller = LuasBatchPoller(
+        args.max_concurrency, args.requests_per_minute, parser=parser
+    )
+    lags: list[float] = []
+    watcher = asyncio.ensure_future(_async_watch_loop(lags))
+
+    async with create_session() as session:
+        coordinators = [
+            _TimedCoordinator(
+                hass=hass,
+                station=f"s{i:03d}",
+                client=LuasApiClient(
+                    station=f"s{i:03d}",
+                    session=session,
+                    base_url=base_url,
+                    breaker=breaker,
+                    parser=parser,
+                ),
+                latencies=report.latencies,
+            )
+            for i in range(args.stops)
+        ]
+        for coordinator in coordinators:
+            coordinator.min_scan_interval = timedelta(seconds=args.min_scan_interval)
+            coordinator.max_scan_interval = timedelta(seconds=args.max_scan_interval)
+
+        start = time.monotonic()
+        busy_start = time.thread_time()
+        deadline = start + args.duration
+        while time.monotonic() < deadline:
+            tick = time.monotonic()
+            due = [c for c in coordinators if c.poll_due]
+            for coordinator in due:
+                coordinator.poll_started = tick
+            if due:
+                result = await poller.async_poll(due)
+                report.polled += len(result.succeeded) + len(result.failed)
+                report.failed += len(result.failed)
+                report.deferred += len(result.deferred)
+            await asyncio.sleep(max(0.0, tick + args.tick - time.monotonic()))
+        report.loop_busy = (time.thread_time() - busy_start) / (
+            time.monotonic() - start
+        )
+        report.duration = time.monotonic() - start
+
+    watcher.cancel()
+    stop_stub()
+    await hass.async_stop(force=True)
+
+    for coordinator in coordinators:
+        report.fetches += coordinator.client.stats.fetches
+        report.unchanged += coordinator.client.stats.unchanged
+        report.coalesced += coordinator.client.stats.coalesced
+        report.connections_created += coordinator.client.metrics.connections_created
+        report.connections_reused += coordinator.client.metrics.connections_reused
+        report.stale_stops += coordinator.stale
+        report.unavailable_stops += not coordinator.last_update_success
+    report.breaker_state = breaker.state
+    if parser is not None:
+        report.parsed_inline = parser.metrics.inline
+        report.parsed_offloaded = parser.metrics.offloaded
+        report.parse_batches = parser.metrics.batches
+        report.parse_saved = parser.metrics.saved_ms / 1000
+    report.max_loop_lag = max(lags, default=0.0)
+    report.stub = app[stub_server.STATS]
+    return report
+
+
+def _print_report(report: LoadReport) -> None:
+    latencies = sorted(report.latencies)
+    if len(latencies) >= 2:  # noqa: PLR2004
+        p50, p90, p99 = (
+            statistics.quantiles(latencies, n=100, method="inclusive")[p - 1]
+            for p in (50, 90, 99)
+        )
+    else:
+        p50 = p90 = p99 = latencies[0] if latencies else 0.0
+    minutes = report.duration / 60
+    stub = report.stub
+    rows = {
+        "duration": f"{report.duration:.1f}s",
+        "refresh latency": (
+            f"p50 {p50 * 1000:.1f}ms  p90 {p90 * 1000:.1f}ms  p99 {p99 * 1000:.1f}ms"
+        ),
+        "polls": (
+            f"{report.polled} ({report.failed} failed, {report.deferred} deferred)"
+        ),
+        "server requests": (
+            f"{stub.requests} ({stub.requests / minutes:.1f}/min; {stub.errors}"
+            f" errors, {stub.timeouts} timeouts, {stub.malformed} malformed)"
+        ),
+        "client fetches": (
+            f"{report.fetches} ({report.unchanged} unchanged,"
+            f" {report.coalesced} coalesced)"
+        ),
+        "parsing": (
+            f"{report.parsed_inline} on the loop, {report.parsed_offloaded} in"
+            f" {report.parse_batches} executor batches"
+            f" ({report.parse_saved * 1000:.1f}ms off the loop)"
+        ),
+        "connections": (
+            f"{report.connections_created} opened, {report.connections_reused} reused"
+        ),
+        "stops at end": (
+            f"{report.stale_stops} stale, {report.unavailable_stops} unavailable"
+        ),
+        "circuit breaker": report.breaker_state,
+        "event loop busy": (
+            f"{report.loop_busy:.1%} (max lag {report.max_loop_lag * 1000:.1f}ms)"
+        ),
+    }
+    for label, value in rows.items():
+        print(f"{label:<20}{value}")  # noqa: T201
+
+
+def main() -> None:
+    """Run a load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--stops", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--tick", type=float, default=POLL_TICK.total_seconds())
+    parser.add_argument(
+        "--min-scan-interval",
+        type=float,
+        default=DEFAULT_MIN_SCAN_INTERVAL.total_seconds(),
+    )
+    parser.add_argument(
+        "--max-scan-interval",
+        type=float,
+        default=DEFAULT_MAX_SCAN_INTERVAL.total_seconds(),
+    )
+    parser.add_argument(
+        "--requests-per-minute", type=float, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument(
+        "--parse-batch-size",
+        type=int,
+        default=PARSE_BATCH_SIZE,
+        help="Parse polls of this many stops in an executor; 0 never does",
+    )
+    parser.add_argument(
+        "--change-period",
+        type=float,
+        default=30.0,
+        help="How often each stop's forecast changes, in seconds",
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    _print_report(asyncio.run(async_run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
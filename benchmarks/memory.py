@@ -0,0 +1,120 @@
+"""
+Compare the memory held by parsed forecasts with the dicts they replaced.
+
+Parses forecasts for many stops, keeping several generations of each (as the
+cache and history do), and reports how much memory stays allocated for them:
+once as LuasInfo and Tram records, and once as the dicts the parser used to
+return.
+
+    python3 -m benchmarks.memory --stops 100 --generations 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+import zlib
+from typing import TYPE_CHECKING, Any
+
+import defusedxml.ElementTree as ET  # noqa: N817
+
+from custom_components.luas.api import Tram, parse
+from custom_components.luas.const import LUAS_STATIONS
+
+from .payloads import forecast
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def _parse_dicts(payload: bytes) -> dict[str, Any]:
+    """Parse a forecast into dicts, as the parser used to."""
+    tree = ET.fromstring(payload)
+    directions = tree.findall("direction")
+    return {
+        "message": tree.find("message").text or "",
+        "operatingNormally": {
+            direction.attrib["name"]: (
+                direction.attrib["operatingNormally"].lower() == "true"
+            )
+            for direction in directions
+        },
+        "stop": tree.attrib["stop"],
+        "trams": sorted(
+            (
+                {
+                    "destination": tram.attrib["destination"],
+                    "dueMins": (
+                        int(tram.attrib["dueMins"])
+                        if tram.attrib["dueMins"] != "DUE"
+                        else 0
+                    ),
+                    "direction": direction.attrib["name"],
+                }
+                for direction in directions
+                for tram in direction.findall("tram")
+            ),
+            key=lambda t: t["dueMins"],
+        ),
+    }
+
+
+def retained_bytes(parse_func: Callable[[bytes], Any], payloads: list[bytes]) -> int:
+    """Memory still allocated for the results of parsing every payload."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = [parse_func(payload) for payload in payloads]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del results
+    return retained
+
+
+def main() -> None:
+    """Run the memory benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stops", type=int, default=100, help="Number of stops")
+    parser.add_argument(
+        "--generations",
+        type=int,
+        default=10,
+        help="Forecasts kept for each stop",
+    )
+    parser.add_argument(
+        "--trams", type=int, default=3, help="Trams per direction in each forecast"
+    )
+    args = parser.parse_args()
+
+    payloads = [
+        forecast(
+            trams_per_direction=args.trams,
+            seed=zlib.crc32(stop.encode()) ^ generation,
+        )
+        for stop in (LUAS_STATIONS * (args.stops // len(LUAS_STATIONS) + 1))[
+            : args.stops
+        ]
+        for generation in range(args.generations)
+    ]
+    trams = sum(len(parse(payload).trams) for payload in payloads)
+
+    # Trams are shared between forecasts, so start with none cached, as after
+    # a restart
+    Tram.of.cache_clear()
+    records = retained_bytes(parse, payloads)
+    dicts = retained_bytes(_parse_dicts, payloads)
+
+    print(f"{len(payloads)} forecasts, {trams} trams")  # noqa: T201
+    print(f"{'':<10} {'KiB':>10} {'B/forecast':>12} {'B/tram':>8}")  # noqa: T201
+    for name, size in (("records", records), ("dicts", dicts)):
+        print(  # noqa: T201
+            f"{name:<10} {size / 1024:>10.1f} {size / len(payloads):>12.0f}"
+            f" {size / max(trams, 1):>8.0f}"
+        )
+    print(f"records use {records / dicts:.0%} of the memory of dicts")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic Luas forecast payloads for benchmarks."""
+
+from __future__ import annotations
+
+import random
+import time
+import zlib
+from datetime import datetime
+from typing import TYPE_CHECKING
+from xml.sax.saxutils import escape, quoteattr
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# cSpell: disable  # noqa: ERA001
+GREEN_LINE_DESTINATIONS = (
+    "Bride's Glen",
+    "Sandyford",
+    "Parnell",
+    "Broombridge",
+)
+# cSpell: enable  # noqa: ERA001
+
+
+def forecast(  # noqa: PLR0913
+    *,
+    directions: int = 2,
+    trams_per_direction: int = 3,
+    message_length: int = 39,
+    operating_normally: bool = True,
+    created: str = "2025-03-17T14:30:10",
+    seed: int = 0,
+) -> bytes:
+    """Generate a forecast with the given shape, deterministically from seed."""
+    rng = random.Random(seed)  # noqa: S311
+    message = ("Green Line services operating normally. " * message_length)[
+        :message_length
+    ]
+    direction_nodes = []
+    for i in range(directions):
+        name = "Inbound" if i % 2 == 0 else "Outbound"
+        due = sorted(rng.randint(0, 60) for _ in range(trams_per_direction))
+        trams = "".join(
+            f"<tram dueMins={quoteattr(str(d) if d else 'DUE')}"
+            f" destination={quoteattr(rng.choice(GREEN_LINE_DESTINATIONS))} />"
+            for d in due
+        )
+        direction_nodes.append(
+            f"<direction name={quoteattr(name)}"
+            f" statusMessage={quoteattr(message)}"
+            f' forecastsEnabled="True" operatingNormally="{operating_normally}">'
+            f"{trams}</direction>"
+        )
+    return (
+        f'<stopInfo created="{created}" stop="Sandyford" stopAbv="SAN">'
+        f"<message>{escape(message)}</message>"
+        f"{''.join(direction_nodes)}"
+        "</stopInfo>"
+    ).encode()
+
+
+# A typical daytime forecast for a Green Line stop.
+REALISTIC = forecast()
+
+# Far more than the API ever returns: many directions, dozens of trams and
+# long status messages.
+WORST_CASE = forecast(directions=8, trams_per_direction=48, message_length=2000)
+
+
+def live(period: float = 30.0) -> Callable[[str], bytes]:
+    """
+    Make a payload_for which varies by stop and changes every period seconds.
+
+    Most stops get a typical forecast, but some have no trams, and some aren't
+    operating normally, as with the real API.
+    """
+
+    def payload_for(stop: str) -> bytes:
+        stop_seed = zlib.crc32(stop.encode())
+        generation = int(time.time() // period)
+        return forecast(
+            trams_per_direction=0 if stop_seed % 7 == 0 else 3,
+            operating_normally=stop_seed % 10 != 0,
+            created=datetime.now().replace(microsecond=0).isoformat(),  # noqa: DTZ005
+            seed=stop_seed ^ generation,
+        )
+
+    return payload_for
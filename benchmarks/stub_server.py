@@ -0,0 +1,182 @@
+"""
+Local stand-in for the Luas forecast API.
+
+Besides being used by the benchmarks, it can be run on its own, to point a
+development instance of Home Assistant at:
+
+    python3 -m benchmarks.stub_server --port 8080 --latency 0.2 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+from .payloads import REALISTIC, live
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+PATH = "/xml/get.ashx"
+
+
+@dataclass
+class StubFaults:
+    """How badly the stub should behave. Rates are fractions of requests."""
+
+    # Mean and spread of the delay before answering, in seconds
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Answer with a 503
+    error_rate: float = 0.0
+    # Don't answer for hang seconds, which is longer than clients wait
+    timeout_rate: float = 0.0
+    hang: float = 30.0
+    # Answer with a truncated forecast
+    malformed_rate: float = 0.0
+
+
+@dataclass
+class StubStats:
+    """What the stub has been asked, and how it answered."""
+
+    requests: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    malformed: int = 0
+    stops: set[str] = field(default_factory=set)
+
+
+STATS = web.AppKey("stats", StubStats)
+
+
+def make_app(
+    payload_for: Callable[[str], bytes] = lambda _stop: REALISTIC,
+    faults: StubFaults | None = None,
+    seed: int = 0,
+) -> web.Application:
+    """Make an app answering forecast requests with payload_for(stop)."""
+    faults = faults or StubFaults()
+    rng = random.Random(seed)  # noqa: S311
+    stats = StubStats()
+
+    async def forecast(request: web.Request) -> web.Response:
+        if request.query.get("action") != "forecast" or "stop" not in request.query:
+            raise web.HTTPBadRequest
+        stop = request.query["stop"]
+        stats.requests += 1
+        stats.stops.add(stop)
+
+        if faults.latency or faults.latency_jitter:
+            await asyncio.sleep(
+                max(0.0, rng.gauss(faults.latency, faults.latency_jitter))
+            )
+        if rng.random() < faults.timeout_rate:
+            stats.timeouts += 1
+            await asyncio.sleep(faults.hang)
+        if rng.random() < faults.error_rate:
+            stats.errors += 1
+            raise web.HTTPServiceUnavailable
+
+        body = payload_for(stop)
+        if rng.random() < faults.malformed_rate:
+            stats.malformed += 1
+            body = body[: len(body) // 2]
+        response = web.Response(body=body, content_type="text/xml", charset="utf-8")
+        # Compressed when the client accepts it
+        response.enable_compression()
+        return response
+
+    app = web.Application()
+    app[STATS] = stats
+    app.router.add_get(PATH, forecast)
+    return app
+
+
+async def async_start(
+    app: web.Application,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[web.AppRunner, str]:
+    """Serve app, on an ephemeral port by default, returning the API's URL."""
+    # Don't wait for hanging requests when shutting down
+    runner = web.AppRunner(app, access_log=None, shutdown_timeout=1.0)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}{PATH}"
+
+
+def start_in_thread(app: web.Application) -> tuple[str, Callable[[], None]]:
+    """
+    Serve app from its own thread and event loop.
+
+    This keeps the stub's work out of the caller's event loop, so it doesn't
+    count towards what's being measured there. Returns the API's URL and a
+    function which stops the server.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result: list[tuple[web.AppRunner, str]] = []
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        result.append(loop.run_until_complete(async_start(app)))
+        started.set()
+        loop.run_forever()
+        loop.run_until_complete(result[0][0].cleanup())
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+    thread = threading.Thread(target=run, name="luas-stub", daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop() -> None:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return result[0][1], stop
+
+
+def main() -> None:
+    """Run the stub from the command line until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        make_app(
+            live(),
+            faults=StubFaults(
+                latency=args.latency,
+                latency_jitter=args.latency_jitter,
+                error_rate=args.error_rate,
+                timeout_rate=args.timeout_rate,
+                malformed_rate=args.malformed_rate,
+            ),
+        ),
+        host=args.host,
+        port=args.port,
+        access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,26 +7,36 @@ https://github.com/lutzky/hass-luas
 
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
 from typing import TYPE_CHECKING
 
 from homeassistant.const import Platform
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.loader import async_get_loaded_integration
 
-from .api import LuasApiClient
+from .config_flow import LuasConfigFlowHandler
 from .const import (
     CONF_DESTINATION,
+    CONF_DESTINATIONS,
+    CONF_DIRECTIONS,
+    CONF_LINE,
+    CONF_ORIGIN,
     CONF_STATION,
+    CONF_TARGET,
+    DIRECTIONS,
     DOMAIN,
     LOGGER,
-    async_translate_station_name,
 )
-from .coordinator import LuasDataUpdateCoordinator
-from .data import LuasData
+from .data import LuasData, LuasJourneyData, LuasLineData
+from .hub import async_get_hub
+from .journey import LuasJourney
+from .services import async_setup_services
+from .stations import async_get_station_index
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import LuasConfigEntry
 
@@ -34,6 +44,14 @@ PLATFORMS: list[Platform] = [
     Platform.SENSOR,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
+    """Set up the integration's services."""
+    async_setup_services(hass)
+    return True
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
@@ -41,33 +59,94 @@ async def async_setup_entry(
     entry: LuasConfigEntry,
 ) -> bool:
     """Set up this integration using UI."""
-    coordinator = LuasDataUpdateCoordinator(
-        hass=hass,
-        logger=LOGGER,
-        name=DOMAIN,
-        update_interval=timedelta(seconds=30),
+    if CONF_LINE in entry.data:
+        return await _async_setup_line_entry(hass, entry)
+    if CONF_ORIGIN in entry.data:
+        return await _async_setup_journey_entry(hass, entry)
+
+    # Entries for the same stop share one coordinator, which is refreshed for the
+    # first time when the stop is first acquired.
+    # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
+    coordinator = await async_get_hub(hass).async_acquire(
+        entry.data[CONF_STATION], entry
     )
+    stations = await async_get_station_index(hass)
+    destinations = entry.data[CONF_DESTINATIONS]
     entry.runtime_data = LuasData(
-        client=LuasApiClient(
-            station=entry.data[CONF_STATION],
-            session=async_get_clientsession(hass),
-        ),
         station=entry.data[CONF_STATION],
-        translated_station=await async_translate_station_name(
-            hass, entry.data[CONF_STATION]
-        ),
-        destination=entry.data.get(CONF_DESTINATION, None),
-        translated_destination=await async_translate_station_name(
-            hass, entry.data[CONF_DESTINATION]
+        translated_station=stations.name(entry.data[CONF_STATION]),
+        destinations=destinations,
+        translated_destinations=[stations.name(code) for code in destinations],
+        directions=entry.data[CONF_DIRECTIONS],
+        integration=async_get_loaded_integration(hass, entry.domain),
+        entry_id=entry.entry_id,
+        coordinator=coordinator,
+    )
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+async def _async_setup_line_entry(
+    hass: HomeAssistant,
+    entry: LuasConfigEntry,
+) -> bool:
+    """Set up an entry for a whole line."""
+    line = entry.data[CONF_LINE]
+    hub = async_get_hub(hass)
+    coordinator = await hub.async_acquire_line(line, entry)
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except ConfigEntryNotReady:
+        await hub.async_release_line(line, entry.entry_id)
+        raise
+    if coordinator.data.missing:
+        # The first sweep only covered what the budget allowed straight away
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} {line} line sweep"
         )
-        if CONF_DESTINATION in entry.data
-        else None,
+    entry.runtime_data = LuasLineData(
+        line=line,
         integration=async_get_loaded_integration(hass, entry.domain),
+        entry_id=entry.entry_id,
         coordinator=coordinator,
     )
 
-    # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-    await coordinator.async_config_entry_first_refresh()
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+async def _async_setup_journey_entry(
+    hass: HomeAssistant,
+    entry: LuasConfigEntry,
+) -> bool:
+    """Set up an entry for a journey between two stops."""
+    hub = async_get_hub(hass)
+    stops = (entry.data[CONF_ORIGIN], entry.data[CONF_TARGET])
+    # Both stops are fetched at once, and shared with any other entries
+    results = await asyncio.gather(
+        *(hub.async_acquire(station, entry) for station in stops),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            for station in stops:
+                await hub.async_release(station, entry.entry_id)
+            raise result
+    origin, target = results
+    stations = await async_get_station_index(hass)
+    entry.runtime_data = LuasJourneyData(
+        coordinators=(origin, target),
+        translated_origin=stations.name(origin.station),
+        translated_target=stations.name(target.station),
+        journey=LuasJourney(origin.station, target.station, stations.destination_code),
+        integration=async_get_loaded_integration(hass, entry.domain),
+        entry_id=entry.entry_id,
+    )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
@@ -75,12 +154,49 @@ async def async_setup_entry(
     return True
 
 
+async def async_migrate_entry(
+    hass: HomeAssistant,
+    entry: LuasConfigEntry,
+) -> bool:
+    """Migrate an entry from an older version of its config."""
+    if entry.version > LuasConfigFlowHandler.VERSION:
+        # Downgraded from a future version
+        return False
+
+    if entry.version == 1:
+        # One optional destination, always in both directions. Unique IDs
+        # (of the entry, its device and its sensors) are unchanged.
+        data = {
+            CONF_STATION: entry.data[CONF_STATION],
+            CONF_DESTINATIONS: (
+                [entry.data[CONF_DESTINATION]] if CONF_DESTINATION in entry.data else []
+            ),
+            CONF_DIRECTIONS: list(DIRECTIONS),
+        }
+        hass.config_entries.async_update_entry(entry, data=data, version=2)
+        LOGGER.debug("Migrated %s to version 2", entry.title)
+
+    return True
+
+
 async def async_unload_entry(
     hass: HomeAssistant,
     entry: LuasConfigEntry,
 ) -> bool:
     """Handle removal of an entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok and CONF_LINE in entry.data:
+        await async_get_hub(hass).async_release_line(
+            entry.data[CONF_LINE], entry.entry_id
+        )
+    elif unload_ok and CONF_ORIGIN in entry.data:
+        for station in (entry.data[CONF_ORIGIN], entry.data[CONF_TARGET]):
+            await async_get_hub(hass).async_release(station, entry.entry_id)
+    elif unload_ok:
+        await async_get_hub(hass).async_release(
+            entry.data[CONF_STATION], entry.entry_id
+        )
+    return unload_ok
 
 
 async def async_reload_entry(
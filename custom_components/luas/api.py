@@ -8,18 +8,58 @@ https://luasforecasts.rpa.ie/analysis/view.aspx,
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import re
 import socket
+import sys
+import time
 import typing
-from typing import Any
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from http import HTTPStatus
+from operator import attrgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+from xml.parsers import expat
 
 import aiohttp
-import async_timeout
 import defusedxml.ElementTree as ET  # noqa: N817
+from defusedxml import EntitiesForbidden, ExternalReferenceForbidden
 
-from .const import LOGGER
+from .const import (
+    CONNECT_TIMEOUT,
+    FRESHNESS_WINDOW,
+    LOGGER,
+    MAX_PAYLOAD_SIZE,
+    READ_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
+from .metrics import LuasClientMetrics, LuasRequestTiming
+from .resilience import CircuitBreaker, RetryPolicy
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .parsing import LuasBatchParser
 
 BASE_URL = "https://luasforecasts.rpa.ie/xml/get.ashx"
 
+# This changes on every response, even if the forecast doesn't
+_CREATED = re.compile(rb'\screated="([^"]*)"')
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(
+    total=REQUEST_TIMEOUT,
+    connect=CONNECT_TIMEOUT,
+    sock_read=READ_TIMEOUT,
+)
+
+# Trams are shared between forecasts (see Tram.of). There are only so many
+# destinations, directions and due times, so this covers the whole network.
+_TRAM_CACHE_SIZE = 4096
+
 
 class LuasApiClientError(Exception):
     """Exception to indicate a general API error."""
@@ -31,20 +71,173 @@ class LuasApiClientCommunicationError(
     """Exception to indicate a communication error."""
 
 
-class Tram(typing.TypedDict):
-    """Tram represents one Luas Tram in a LuasInfo response."""
+class LuasApiClientCircuitOpenError(
+    LuasApiClientCommunicationError,
+):
+    """Exception to indicate a request wasn't attempted, as the API is failing."""
+
+
+class LuasApiClientPayloadTooLargeError(
+    LuasApiClientCommunicationError,
+):
+    """Exception to indicate a response was too large to be a forecast."""
+
+
+class TramDict(typing.TypedDict):
+    """A Tram as a dict, keyed as in the API, e.g. for diagnostics."""
 
     destination: str
     direction: str
     dueMins: int
 
 
-class LuasInfo(typing.TypedDict):
+class LuasInfoDict(typing.TypedDict):
+    """A LuasInfo as a dict, keyed as in the API, e.g. for storage."""
+
+    message: str
+    operatingNormally: dict[str, bool]
+    stop: str
+    trams: list[TramDict]
+
+
+_DUE_MINS = attrgetter("due_mins")
+
+
+@dataclass(frozen=True, slots=True)
+class Tram:
+    """
+    Tram represents one Luas Tram in a LuasInfo response.
+
+    Trams are immutable and shared: create them with Tram.of, so that the same
+    tram in consecutive forecasts, or at another stop, is the same object.
+    """
+
+    destination: str
+    direction: str
+    due_mins: int
+
+    @staticmethod
+    @functools.lru_cache(maxsize=_TRAM_CACHE_SIZE)
+    def of(destination: str, direction: str, due_mins: int) -> Tram:
+        """Get the tram, reusing an existing one where possible."""
+        return Tram(sys.intern(destination), sys.intern(direction), due_mins)
+
+    @classmethod
+    def from_dict(cls, data: TramDict) -> Tram:
+        """Get a tram from its dict form."""
+        return cls.of(data["destination"], data["direction"], int(data["dueMins"]))
+
+    def as_dict(self) -> TramDict:
+        """Get the tram's dict form."""
+        return {
+            "destination": self.destination,
+            "direction": self.direction,
+            "dueMins": self.due_mins,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class LuasInfo:
     """LuasInfo represents a complete Luas forecast for a stop."""
 
     message: str
+    operating_normally: MappingProxyType[str, bool] = field(hash=False)
     stop: str
-    trams: list[Tram]
+    # Sorted by due_mins
+    trams: tuple[Tram, ...]
+
+    @classmethod
+    def from_dict(cls, data: LuasInfoDict) -> LuasInfo:
+        """Get a forecast from its dict form."""
+        return cls(
+            message=data["message"],
+            operating_normally=MappingProxyType(
+                {
+                    sys.intern(direction): bool(normal)
+                    for direction, normal in data["operatingNormally"].items()
+                }
+            ),
+            stop=data["stop"],
+            trams=tuple(sorted(map(Tram.from_dict, data["trams"]), key=_DUE_MINS)),
+        )
+
+    def as_dict(self) -> LuasInfoDict:
+        """Get the forecast's dict form."""
+        return {
+            "message": self.message,
+            "operatingNormally": dict(self.operating_normally),
+            "stop": self.stop,
+            "trams": [tram.as_dict() for tram in self.trams],
+        }
+
+
+SnapshotKey = tuple[str, str | None]
+
+
+_NOT_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a direction or destination name for matching.
+
+    Case and punctuation are ignored, so that e.g. "Brides Glen" as displayed
+    matches "Bride's Glen" as named by the API.
+    """
+    return _NOT_ALPHANUMERIC.sub("", name.casefold())
+
+
+@dataclass(frozen=True)
+class LuasSnapshot:
+    """
+    An immutable forecast for a stop, indexed for sensors.
+
+    Trams are indexed by (direction, destination), both normalized, with a
+    destination of None standing for all destinations. Each index entry is
+    already sorted by due_mins, so a sensor finds its next trams with a single
+    lookup instead of scanning and comparing every tram on every update.
+    """
+
+    info: LuasInfo
+    _index: MappingProxyType[SnapshotKey, tuple[Tram, ...]] = field(
+        compare=False, repr=False
+    )
+    # When the server created this forecast, in the server's (naive) local
+    # time. This changes on every poll, so it doesn't count towards equality.
+    created: datetime | None = field(default=None, compare=False)
+
+    @classmethod
+    def from_info(
+        cls,
+        info: LuasInfo,
+        created: datetime | None = None,
+    ) -> LuasSnapshot:
+        """Index a parsed forecast."""
+        index: dict[SnapshotKey, list[Tram]] = {}
+        # info.trams is sorted, so each list is too
+        for tram in info.trams:
+            direction = normalize_name(tram.direction)
+            index.setdefault((direction, None), []).append(tram)
+            index.setdefault((direction, normalize_name(tram.destination)), []).append(
+                tram
+            )
+        return cls(
+            info=info,
+            _index=MappingProxyType({k: tuple(v) for k, v in index.items()}),
+            created=created,
+        )
+
+    @staticmethod
+    def key(direction: str, destination: str | None) -> SnapshotKey:
+        """Get the index key for trams in direction, headed to destination."""
+        return (
+            normalize_name(direction),
+            normalize_name(destination) if destination is not None else None,
+        )
+
+    def trams(self, key: SnapshotKey) -> tuple[Tram, ...]:
+        """Get trams matching key, which comes from LuasSnapshot.key."""
+        return self._index.get(key, ())
 
 
 def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
@@ -52,21 +245,147 @@ def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
     response.raise_for_status()
 
 
-def parse(payload: bytes) -> LuasInfo:
-    """Parse an XML Luas forecast."""
+_STOP_INFO_DEPTH = 0
+_DIRECTION_DEPTH = 1
+_TRAM_DEPTH = 2
+
+
+def _forbid_entity_decl(*args: Any) -> None:
+    name, _is_parameter_entity, value, base, sysid, pubid, notation_name = args
+    raise EntitiesForbidden(name, value, base, sysid, pubid, notation_name)
+
+
+def _forbid_unparsed_entity_decl(*args: Any) -> None:
+    name, base, sysid, pubid, notation_name = args
+    raise EntitiesForbidden(name, None, base, sysid, pubid, notation_name)
+
+
+def _forbid_external_entity_ref(*args: Any) -> None:
+    context, base, sysid, pubid = args
+    raise ExternalReferenceForbidden(context, base, sysid, pubid)
+
+
+class _LuasInfoBuilder:
+    """
+    Expat handlers which build a LuasInfo in a single pass.
+
+    This mirrors what parse_reference extracts from the element tree: the root's
+    stop attribute, the text of its message child, and the trams of its
+    direction children. Character data is only delivered while inside the
+    message, so whitespace between elements costs nothing.
+    """
+
+    def __init__(self, parser: expat.XMLParserType) -> None:
+        self._parser = parser
+        self._depth = 0
+        self._stop = ""
+        self._has_message = False
+        self._message: list[str] = []
+        self._direction: str | None = None
+        self._statuses: set[str] = set()
+        self._operating_normally: dict[str, bool] = {}
+        self._trams: list[Tram] = []
+
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        # The same protections as defusedxml's DefusedXMLParser
+        parser.EntityDeclHandler = _forbid_entity_decl
+        parser.UnparsedEntityDeclHandler = _forbid_unparsed_entity_decl
+        parser.ExternalEntityRefHandler = _forbid_external_entity_ref
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        depth = self._depth
+        self._depth += 1
+        self._parser.CharacterDataHandler = None
+
+        if depth == _STOP_INFO_DEPTH:
+            self._stop = attrib["stop"]
+        elif depth == _DIRECTION_DEPTH:
+            if tag == "direction":
+                self._direction = sys.intern(attrib["name"])
+                normally = attrib["operatingNormally"].lower() == "true"
+                self._operating_normally[self._direction] = normally
+                if not normally:
+                    self._statuses.add(attrib["statusMessage"])
+            elif tag == "message" and not self._has_message:
+                self._has_message = True
+                self._parser.CharacterDataHandler = self._message.append
+        elif depth == _TRAM_DEPTH and tag == "tram" and self._direction is not None:
+            due_mins = attrib["dueMins"]
+            if due_mins:
+                self._trams.append(
+                    Tram.of(
+                        attrib["destination"],
+                        self._direction,
+                        int(due_mins) if due_mins != "DUE" else 0,
+                    )
+                )
+
+    def end(self, _tag: str) -> None:
+        self._depth -= 1
+        self._parser.CharacterDataHandler = None
+        if self._depth == _DIRECTION_DEPTH:
+            self._direction = None
+
+    def result(self) -> LuasInfo:
+        if not self._has_message:
+            raise ValueError
+
+        message = "".join(self._message)
+        if message:
+            self._statuses.add(message)
+
+        self._trams.sort(key=_DUE_MINS)
+
+        return LuasInfo(
+            message="; ".join(sorted(self._statuses)),
+            operating_normally=MappingProxyType(self._operating_normally),
+            stop=self._stop,
+            trams=tuple(self._trams),
+        )
+
+
+def parse(payload: bytes, *, reference: bool = False) -> LuasInfo:
+    """
+    Parse an XML Luas forecast.
+
+    This walks the document once with expat, with the same protections against
+    malicious XML as defusedxml. With reference=True, the original
+    ElementTree-based implementation is used instead; the two must always
+    produce the same result.
+    """
+    if reference:
+        return parse_reference(payload)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    builder = _LuasInfoBuilder(parser)
+    try:
+        parser.Parse(payload, True)  # noqa: FBT003
+    except expat.ExpatError as exception:
+        error = ET.ParseError(
+            f"{expat.ErrorString(exception.code)}: line {exception.lineno},"
+            f" column {exception.offset}"
+        )
+        error.code = exception.code
+        error.position = (exception.lineno, exception.offset)
+        raise error from exception
+    return builder.result()
+
+
+def parse_reference(payload: bytes) -> LuasInfo:
+    """Parse an XML Luas forecast by building and querying an element tree."""
     tree = ET.fromstring(payload)
     message_node = tree.find("message")
     if message_node is None:
         raise ValueError
 
     trams: list[Tram] = [
-        {
-            "destination": tram.attrib["destination"],
-            "dueMins": (
-                int(tram.attrib["dueMins"]) if tram.attrib["dueMins"] != "DUE" else 0
-            ),
-            "direction": direction.attrib["name"],
-        }
+        Tram.of(
+            tram.attrib["destination"],
+            direction.attrib["name"],
+            int(tram.attrib["dueMins"]) if tram.attrib["dueMins"] != "DUE" else 0,
+        )
         for direction in tree.findall("direction")
         for tram in direction.findall("tram")
         if tram.attrib["dueMins"]
@@ -85,57 +404,301 @@ def parse(payload: bytes) -> LuasInfo:
         }
     )
 
-    result: LuasInfo = {
-        "message": "; ".join(sorted(messages)),
-        "stop": tree.attrib["stop"],
-        "trams": sorted(trams, key=lambda t: t["dueMins"]),
-    }
+    return LuasInfo(
+        message="; ".join(sorted(messages)),
+        operating_normally=MappingProxyType(
+            {
+                sys.intern(direction.attrib["name"]): (
+                    direction.attrib["operatingNormally"].lower() == "true"
+                )
+                for direction in tree.findall("direction")
+            }
+        ),
+        stop=tree.attrib["stop"],
+        trams=tuple(sorted(trams, key=lambda t: t.due_mins)),
+    )
+
+
+def parse_timed(payload: bytes) -> tuple[LuasInfo, float]:
+    """Parse a forecast, and say how many milliseconds it took."""
+    start = time.perf_counter()
+    info = parse(payload)
+    return info, (time.perf_counter() - start) * 1000
 
-    return result
+
+def parse_batch(
+    payloads: Sequence[bytes],
+) -> list[tuple[LuasInfo, float] | Exception]:
+    """
+    Parse several forecasts, e.g. in an executor, timing each.
+
+    A payload which can't be parsed gets its exception, without affecting the
+    others.
+    """
+    results: list[tuple[LuasInfo, float] | Exception] = []
+    for payload in payloads:
+        try:
+            results.append(parse_timed(payload))
+        except Exception as exception:  # noqa: BLE001 # pylint: disable=broad-except
+            results.append(exception)
+    return results
+
+
+def fingerprint(payload: bytes) -> bytes:
+    """Fingerprint a forecast payload, ignoring attributes which always change."""
+    return hashlib.blake2b(_CREATED.sub(b"", payload), digest_size=16).digest()
+
+
+def parse_created(payload: bytes) -> datetime | None:
+    """Get the time at which the server created a forecast payload, if known."""
+    match = _CREATED.search(payload)
+    if match is None:
+        return None
+    try:
+        return datetime.fromisoformat(match[1].decode("ascii"))
+    except ValueError:
+        return None
+
+
+async def read_limited(response: aiohttp.ClientResponse, limit: int) -> bytes:
+    """
+    Read a response's (decompressed) body, refusing any larger than limit.
+
+    The body is read in the chunks it arrives in, so an oversized response is
+    abandoned as soon as it's known to be too large, without buffering it.
+    """
+    if response.content_length is not None and response.content_length > limit:
+        msg = f"Response too large - {response.content_length} bytes"
+        raise LuasApiClientPayloadTooLargeError(msg)
+    chunks = []
+    size = 0
+    while chunk := await response.content.read(limit + 1 - size):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            msg = f"Response too large - over {limit} bytes"
+            raise LuasApiClientPayloadTooLargeError(msg)
+    # A single chunk, as is usual for a forecast, is returned without copying
+    return b"".join(chunks)
+
+
+@dataclass
+class LuasClientStats:
+    """How often a LuasApiClient could avoid fetching or parsing a forecast."""
+
+    fetches: int = 0
+    coalesced: int = 0
+    unchanged: int = 0
+
+    @property
+    def unchanged_ratio(self) -> float:
+        """Fraction of fetches which returned an unchanged forecast."""
+        return self.unchanged / self.fetches if self.fetches else 0.0
+
+
+def _is_transient(exception: LuasApiClientCommunicationError) -> bool:
+    """Whether a request which failed with exception is worth retrying."""
+    if isinstance(exception, LuasApiClientPayloadTooLargeError):
+        # Asking again won't get a smaller forecast
+        return False
+    cause = exception.__cause__
+    if isinstance(cause, aiohttp.ClientResponseError):
+        return cause.status >= HTTPStatus.INTERNAL_SERVER_ERROR or (
+            cause.status == HTTPStatus.TOO_MANY_REQUESTS
+        )
+    return True
 
 
 class LuasApiClient:
-    """Luas API Client."""
+    """
+    Luas API Client.
+
+    Transient errors are retried according to retry. Every attempt is reported
+    to breaker, which may be shared between clients, and no attempt is made
+    while it's open. Each attempt is limited by timeout.
 
-    def __init__(
+    How long each stage of a fetch takes is recorded in metrics.
+
+    Forecasts are parsed on the event loop, unless a parser is given, which
+    may parse them in batches in an executor instead.
+    """
+
+    stats: LuasClientStats
+    metrics: LuasClientMetrics
+    retry: RetryPolicy
+    breaker: CircuitBreaker
+    timeout: aiohttp.ClientTimeout
+    parser: LuasBatchParser | None
+
+    def __init__(  # noqa: PLR0913
         self,
         station: str,
         session: aiohttp.ClientSession,
+        base_url: str = BASE_URL,
+        *,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+        parser: LuasBatchParser | None = None,
     ) -> None:
         """Luas API Client."""
         self._station = station
         self._session = session
-
-    async def async_get_data(self) -> LuasInfo:
-        """Get data from the API."""
+        self._base_url = base_url
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.parser = parser
+        self._inflight: asyncio.Future[LuasSnapshot] | None = None
+        self._fetched_at = 0.0
+        self._fingerprint: bytes | None = None
+        self._snapshot: LuasSnapshot | None = None
+        self.stats = LuasClientStats()
+        self.metrics = LuasClientMetrics()
+
+    async def async_get_data(self) -> LuasSnapshot:
+        """
+        Get data from the API.
+
+        Concurrent calls share a single request, and calls within
+        FRESHNESS_WINDOW of a successful one get its result without making a
+        request at all.
+
+        If the forecast hasn't changed since the last call, the previous
+        snapshot is returned without parsing the response again, with only its
+        creation time updated.
+        """
+        if (
+            self._snapshot is not None
+            and time.monotonic() - self._fetched_at < FRESHNESS_WINDOW
+        ):
+            self.stats.coalesced += 1
+            return self._snapshot
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._async_fetch())
+            self._inflight.add_done_callback(self._fetch_done)
+        else:
+            self.stats.coalesced += 1
+        # One caller being cancelled mustn't cancel the request for the others
+        return await asyncio.shield(self._inflight)
+
+    def _fetch_done(self, _future: asyncio.Future[LuasSnapshot]) -> None:
+        self._inflight = None
+
+    async def _async_fetch(self) -> LuasSnapshot:
+        """Fetch the forecast, parsing it only if it changed."""
+        # The parser needs to know which fetches may yet give it a payload
+        with (
+            self.parser.fetching()
+            if self.parser is not None
+            else contextlib.nullcontext()
+        ):
+            return await self._async_fetch_and_parse()
+
+    async def _async_fetch_and_parse(self) -> LuasSnapshot:
         luas_result = await self._api_wrapper(
             stop=self._station,
         )
-        LOGGER.debug("Raw result from luas API: %r", luas_result)
-        parsed_result = parse(luas_result)
-        LOGGER.debug("Parsed result from luas: %r", parsed_result)
-        return parsed_result
+        self.stats.fetches += 1
+        created = parse_created(luas_result)
+
+        luas_fingerprint = fingerprint(luas_result)
+        if self._snapshot is not None and luas_fingerprint == self._fingerprint:
+            self.stats.unchanged += 1
+            LOGGER.debug(
+                "Unchanged result from luas API for %s (%d/%d unchanged)",
+                self._station,
+                self.stats.unchanged,
+                self.stats.fetches,
+            )
+            self._snapshot = replace(self._snapshot, created=created)
+            self._fetched_at = time.monotonic()
+            self.metrics.record_success()
+            return self._snapshot
+
+        try:
+            if self.parser is not None:
+                parsed_result, parse_ms = await self.parser.async_parse(luas_result)
+            else:
+                parsed_result, parse_ms = parse_timed(luas_result)
+        except Exception as exception:
+            self.metrics.record_error(exception)
+            LOGGER.debug("Unparseable result from luas API: %r", luas_result)
+            raise
+        self.metrics.parse.add(parse_ms)
+        self.metrics.trams = len(parsed_result.trams)
+        # Logging the whole forecast is expensive, and it's in the diagnostics
+        LOGGER.debug(
+            "New result from luas API for %s: %d trams",
+            self._station,
+            self.metrics.trams,
+        )
+        self._fingerprint = luas_fingerprint
+        self._snapshot = LuasSnapshot.from_info(parsed_result, created)
+        self._fetched_at = time.monotonic()
+        self.metrics.record_success()
+        return self._snapshot
 
     async def _api_wrapper(
         self,
         stop: str,
-    ) -> Any:
-        """Get information from the API."""
+    ) -> bytes:
+        """Get information from the API, retrying transient errors."""
+        delays = self.retry.delays()
+        while True:
+            if not self.breaker.allow():
+                msg = "Not fetching information - too many recent errors"
+                error = LuasApiClientCircuitOpenError(msg)
+                self.metrics.record_error(error)
+                raise error
+            try:
+                result = await self._api_attempt(stop)
+            except LuasApiClientError as exception:
+                self.metrics.record_error(exception.__cause__ or exception)
+                if not isinstance(exception, LuasApiClientCommunicationError):
+                    raise
+                self.breaker.record_failure()
+                delay = next(delays, None)
+                if delay is None or not _is_transient(exception):
+                    raise
+                LOGGER.debug("Retrying %s in %.1fs: %s", stop, delay, exception)
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _api_attempt(
+        self,
+        stop: str,
+    ) -> bytes:
+        """
+        Get information from the API, once.
+
+        The body is returned undecoded, as the parser reads the encoding from
+        the XML declaration itself.
+        """
+        timing = LuasRequestTiming()
         try:
-            async with async_timeout.timeout(10):
-                response = await self._session.request(
-                    method="get",
-                    url=BASE_URL,
-                    params={
-                        "action": "forecast",
-                        "ver": "2",
-                        "encrypt": "false",
-                        "stop": stop.upper(),
-                    },
-                )
+            async with self._session.request(
+                method="get",
+                url=self._base_url,
+                params={
+                    "action": "forecast",
+                    "ver": "2",
+                    "encrypt": "false",
+                    "stop": stop.upper(),
+                },
+                headers={"Accept-Encoding": "gzip, deflate"},
+                timeout=self.timeout,
+                trace_request_ctx=timing,
+            ) as response:
                 _verify_response_or_raise(response)
-                return await response.text()
+                body = await read_limited(response, MAX_PAYLOAD_SIZE)
+                self.metrics.record_request(timing, len(body))
+                return body
 
+        except LuasApiClientError:
+            raise
         except TimeoutError as exception:
             msg = f"Timeout error fetching information - {exception}"
             raise LuasApiClientCommunicationError(
@@ -0,0 +1,87 @@
+"""Persistent last-known-good forecast cache for luas."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import LuasInfo, LuasSnapshot
+from .const import CACHE_SAVE_DELAY, DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.forecasts"
+
+
+class LuasForecastCache:
+    """
+    The last forecast successfully fetched for each stop, kept across restarts.
+
+    This lets entries come up immediately after a restart, even if the API is
+    slow or down at the time. Writes are batched, so frequent polls don't turn
+    into frequent disk writes: a save is scheduled by the first changed forecast
+    since the last write, and not postponed by later ones, so with stops polled
+    every few seconds the cache still reaches disk within CACHE_SAVE_DELAY.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._stops: dict[str, dict[str, Any]] = {}
+        # The forecast last put for each stop, to tell whether it changed
+        self._infos: dict[str, LuasInfo] = {}
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load the cache from disk."""
+        data = await self._store.async_load()
+        if data is not None:
+            self._stops = data.get("stops", {})
+
+    def get(self, station: str) -> tuple[LuasSnapshot, datetime] | None:
+        """Get the cached forecast for station and when it was fetched."""
+        cached = self._stops.get(station)
+        if cached is None:
+            return None
+        try:
+            created = cached["created"]
+            return (
+                LuasSnapshot.from_info(
+                    LuasInfo.from_dict(cached["info"]),
+                    datetime.fromisoformat(created) if created else None,
+                ),
+                datetime.fromisoformat(cached["fetched"]),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            LOGGER.warning("Ignoring invalid cached forecast for %s", station)
+            return None
+
+    def put(self, station: str, snapshot: LuasSnapshot, fetched: datetime) -> None:
+        """Cache a freshly fetched forecast, saving it to disk soon if it changed."""
+        created = snapshot.created.isoformat() if snapshot.created else None
+        cached = self._stops.get(station)
+        # An unchanged payload (see fingerprint) keeps its parsed forecast
+        if cached is not None and self._infos.get(station) is snapshot.info:
+            # Saved along with the next change, or the final write
+            cached["created"] = created
+            cached["fetched"] = fetched.isoformat()
+            return
+        self._infos[station] = snapshot.info
+        self._stops[station] = {
+            "info": snapshot.info.as_dict(),
+            "created": created,
+            "fetched": fetched.isoformat(),
+        }
+        if not self._save_pending:
+            # Saving again before the write would postpone it
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        return {"stops": self._stops, "saved": dt_util.utcnow().isoformat()}
@@ -4,95 +4,294 @@ from __future__ import annotations
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.helpers import selector, translation
+from homeassistant.core import callback
+from homeassistant.helpers import selector
 from slugify import slugify
 
 from .const import (
-    CONF_DESTINATION,
+    CONF_DESTINATIONS,
+    CONF_DIRECTIONS,
+    CONF_HISTORY,
+    CONF_LINE,
+    CONF_LIVE_ONLY,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_ORIGIN,
+    CONF_REQUESTS_PER_MINUTE,
+    CONF_STATE_THRESHOLD,
     CONF_STATION,
+    CONF_TARGET,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DIRECTIONS,
     DOMAIN,
+    LUAS_LINES,
     LUAS_STATIONS,
-    async_translate_station_name,
+)
+from .network import journey_direction
+from .stations import async_get_station_index
+
+STOP_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_STATION): selector.selector(
+            {
+                "select": {
+                    "translation_key": "station",
+                    "options": LUAS_STATIONS,
+                    "sort": True,
+                },
+            }
+        ),
+        vol.Optional(CONF_DESTINATIONS): selector.selector(
+            {
+                "select": {
+                    "translation_key": "station",
+                    "options": LUAS_STATIONS,
+                    "multiple": True,
+                    "sort": True,
+                },
+            }
+        ),
+        vol.Required(CONF_DIRECTIONS, default=list(DIRECTIONS)): selector.selector(
+            {
+                "select": {
+                    "translation_key": "direction",
+                    "options": list(DIRECTIONS),
+                    "multiple": True,
+                },
+            }
+        ),
+    }
+)
+
+LINE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_LINE): selector.selector(
+            {
+                "select": {
+                    "translation_key": "line",
+                    "options": list(LUAS_LINES),
+                },
+            }
+        ),
+    }
+)
+
+JOURNEY_SCHEMA = vol.Schema(
+    {
+        vol.Required(key): selector.selector(
+            {
+                "select": {
+                    "translation_key": "station",
+                    "options": LUAS_STATIONS,
+                    "sort": True,
+                },
+            }
+        )
+        for key in (CONF_ORIGIN, CONF_TARGET)
+    }
+)
+
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(
+            CONF_MIN_SCAN_INTERVAL,
+            default=DEFAULT_MIN_SCAN_INTERVAL.total_seconds(),
+        ): selector.selector(
+            {
+                "number": {
+                    "min": 5,
+                    "max": 600,
+                    "step": 1,
+                    "unit_of_measurement": "s",
+                    "mode": "box",
+                },
+            }
+        ),
+        vol.Required(
+            CONF_MAX_SCAN_INTERVAL,
+            default=DEFAULT_MAX_SCAN_INTERVAL.total_seconds(),
+        ): selector.selector(
+            {
+                "number": {
+                    "min": 5,
+                    "max": 3600,
+                    "step": 1,
+                    "unit_of_measurement": "s",
+                    "mode": "box",
+                },
+            }
+        ),
+        vol.Required(
+            CONF_REQUESTS_PER_MINUTE,
+            default=DEFAULT_REQUESTS_PER_MINUTE,
+        ): selector.selector(
+            {
+                "number": {
+                    "min": 1,
+                    "max": 600,
+                    "step": 1,
+                    "unit_of_measurement": "requests/min",
+                    "mode": "box",
+                },
+            }
+        ),
+        vol.Required(CONF_HISTORY, default=False): selector.selector({"boolean": {}}),
+        vol.Required(CONF_STATE_THRESHOLD, default=0): selector.selector(
+            {
+                "number": {
+                    "min": 0,
+                    "max": 10,
+                    "step": 1,
+                    "unit_of_measurement": "min",
+                    "mode": "box",
+                },
+            }
+        ),
+        vol.Required(CONF_LIVE_ONLY, default=False): selector.selector({"boolean": {}}),
+    }
 )
 
 
 class LuasConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Luas."""
 
-    VERSION = 1
+    VERSION = 2
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        _config_entry: config_entries.ConfigEntry,
+    ) -> LuasOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return LuasOptionsFlowHandler()
 
-    def _get_unique_id(self, user_input: dict) -> str:
+    def _get_unique_id(self, data: dict) -> str:
+        # The same as version 1 entries with at most one destination
         return slugify(
-            f"luas-{user_input[CONF_STATION]}"
+            f"luas-{data[CONF_STATION]}"
+            + "".join(f"-to-{destination}" for destination in data[CONF_DESTINATIONS])
             + (
-                f"-to-{user_input[CONF_DESTINATION]}"
-                if CONF_DESTINATION in user_input
+                "".join(f"-{direction}" for direction in data[CONF_DIRECTIONS])
+                if len(data[CONF_DIRECTIONS]) < len(DIRECTIONS)
                 else ""
             )
         )
 
-    async def _translate_station_name(self, station: str) -> str:
-        translations = await translation.async_get_translations(
-            self.hass, self.hass.config.language, "selector", {DOMAIN}
-        )
-        return translations.get(
-            f"component.luas.selector.station.options.{station}",
-            station,
+    async def async_step_user(
+        self,
+        _user_input: dict | None = None,
+    ) -> config_entries.ConfigFlowResult:
+        """Handle a flow initialized by the user."""
+        return self.async_show_menu(
+            step_id="user", menu_options=["stop", "journey", "line"]
         )
 
-    async def async_step_user(
+    async def async_step_stop(
         self,
         user_input: dict | None = None,
     ) -> config_entries.ConfigFlowResult:
-        """Handle a flow initialized by the user."""
+        """Set up an entry for trams at a stop."""
         _errors = {}
         if user_input is not None:
-            await self.async_set_unique_id(self._get_unique_id(user_input))
-            self._abort_if_unique_id_configured()
-            translated_station = await async_translate_station_name(
-                self.hass, user_input[CONF_STATION]
-            )
-            if CONF_DESTINATION in user_input:
-                destination = await async_translate_station_name(
-                    self.hass, user_input[CONF_DESTINATION]
+            data = {
+                CONF_STATION: user_input[CONF_STATION],
+                CONF_DESTINATIONS: sorted(set(user_input.get(CONF_DESTINATIONS, []))),
+                CONF_DIRECTIONS: [
+                    d for d in DIRECTIONS if d in user_input.get(CONF_DIRECTIONS, [])
+                ],
+            }
+            if not data[CONF_DIRECTIONS]:
+                _errors[CONF_DIRECTIONS] = "no_directions"
+            else:
+                await self.async_set_unique_id(self._get_unique_id(data))
+                self._abort_if_unique_id_configured()
+                return self.async_create_entry(
+                    title=await self._async_title(data), data=data
                 )
+
+        return self.async_show_form(
+            step_id="stop",
+            data_schema=self.add_suggested_values_to_schema(
+                STOP_SCHEMA, user_input or {}
+            ),
+            errors=_errors,
+        )
+
+    async def async_step_journey(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.ConfigFlowResult:
+        """Set up an entry for a journey between two stops."""
+        _errors = {}
+        if user_input is not None:
+            origin, target = user_input[CONF_ORIGIN], user_input[CONF_TARGET]
+            if journey_direction(origin, target) is None:
+                _errors[CONF_TARGET] = "not_connected"
             else:
-                destination = None
+                await self.async_set_unique_id(f"luas-journey-{origin}-to-{target}")
+                self._abort_if_unique_id_configured()
+                stations = await async_get_station_index(self.hass)
+                return self.async_create_entry(
+                    title=f"{stations.name(origin)} to {stations.name(target)}",
+                    data={CONF_ORIGIN: origin, CONF_TARGET: target},
+                )
+
+        return self.async_show_form(
+            step_id="journey",
+            data_schema=self.add_suggested_values_to_schema(
+                JOURNEY_SCHEMA, user_input or {}
+            ),
+            errors=_errors,
+        )
+
+    async def async_step_line(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.ConfigFlowResult:
+        """Set up an entry for a whole line."""
+        if user_input is not None:
+            line = user_input[CONF_LINE]
+            await self.async_set_unique_id(f"luas-line-{line}")
+            self._abort_if_unique_id_configured()
             return self.async_create_entry(
-                title=(
-                    translated_station
-                    + ("" if not destination else f" to {destination}")
-                ),
-                data=user_input,
+                title=f"{line.capitalize()} line", data={CONF_LINE: line}
+            )
+
+        return self.async_show_form(step_id="line", data_schema=LINE_SCHEMA)
+
+    async def _async_title(self, data: dict) -> str:
+        stations = await async_get_station_index(self.hass)
+        title = stations.name(data[CONF_STATION])
+        if data[CONF_DESTINATIONS]:
+            title += " to " + ", ".join(
+                stations.name(destination) for destination in data[CONF_DESTINATIONS]
             )
+        if len(data[CONF_DIRECTIONS]) < len(DIRECTIONS):
+            title += f" ({', '.join(data[CONF_DIRECTIONS])})"
+        return title
+
+
+class LuasOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Luas."""
+
+    async def async_step_init(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.ConfigFlowResult:
+        """Manage the options."""
+        _errors = {}
+        if user_input is not None:
+            if user_input[CONF_MAX_SCAN_INTERVAL] < user_input[CONF_MIN_SCAN_INTERVAL]:
+                _errors[CONF_MAX_SCAN_INTERVAL] = "max_below_min"
+            else:
+                return self.async_create_entry(data=user_input)
 
         return self.async_show_form(
-            step_id="user",
-            data_schema=vol.Schema(
-                {
-                    vol.Required(
-                        CONF_STATION,
-                    ): selector.selector(
-                        {
-                            "select": {
-                                "translation_key": "station",
-                                "options": LUAS_STATIONS,
-                                "sort": True,
-                            },
-                        }
-                    ),
-                    vol.Optional(
-                        CONF_DESTINATION,
-                    ): selector.selector(
-                        {
-                            "select": {
-                                "translation_key": "station",
-                                "options": LUAS_STATIONS,
-                                "sort": True,
-                            },
-                        }
-                    ),
-                },
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, user_input or self.config_entry.options
             ),
             errors=_errors,
         )
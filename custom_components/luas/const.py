@@ -1,18 +1,150 @@
 """Constants for luas."""
 
+from datetime import timedelta
 from logging import Logger, getLogger
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import translation
-
 LOGGER: Logger = getLogger(__package__)
 
 DOMAIN = "luas"
 ATTRIBUTION = "Data provided by https://luasforecasts.rpa.ie/analysis/view.aspx"
 
 CONF_STATION = "station"
+CONF_LINE = "line"
+CONF_ORIGIN = "origin"
+CONF_TARGET = "target"
+CONF_DESTINATIONS = "destinations"
+CONF_DIRECTIONS = "directions"
+# Config entries before version 2 had at most one destination
 CONF_DESTINATION = "destination"
 
+DIRECTIONS = ("inbound", "outbound")
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_REQUESTS_PER_MINUTE = "requests_per_minute"
+CONF_HISTORY = "history"
+# Minutes by which tram sensors' due times must change to be published, to
+# spare the recorder (see LuasStateThrottle); 0 publishes every change
+CONF_STATE_THRESHOLD = "state_threshold"
+# Tram sensors show arrival times, which don't count down, and record none of
+# their attributes (see LuasLiveTramSensor)
+CONF_LIVE_ONLY = "live_only"
+
+# Each stop is polled at its own adaptive interval (see adaptive_poll_interval):
+# DEFAULT_SCAN_INTERVAL normally, down to the minimum when a watched tram is
+# within IMMINENT_DUE_MINS, and up to the maximum when the nearest is at least
+# DISTANT_DUE_MINS away or there is no service. Stops which are due are
+# refreshed together every POLL_TICK, with at most DEFAULT_MAX_CONCURRENCY
+# requests to the API in flight at any time.
+DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
+DEFAULT_MIN_SCAN_INTERVAL = timedelta(seconds=10)
+DEFAULT_MAX_SCAN_INTERVAL = timedelta(minutes=5)
+IMMINENT_DUE_MINS = 2
+DISTANT_DUE_MINS = 15
+POLL_TICK = timedelta(seconds=5)
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Polls of all stops together are limited to DEFAULT_REQUESTS_PER_MINUTE, with
+# bursts of up to RATE_LIMIT_BURST worth of the budget. When more stops are due
+# than the budget allows, those with an imminent tram or the oldest forecast go
+# first and the rest wait for a later tick. Sweeps of whole lines only take
+# what's left beyond SWEEP_RESERVE of the burst, so that polls of individual
+# stops always get their share.
+DEFAULT_REQUESTS_PER_MINUTE = 60
+RATE_LIMIT_BURST = timedelta(seconds=10)
+SWEEP_RESERVE = 0.5
+
+# Tram sensors count down locally between polls, using the server's clock as
+# estimated from each forecast's creation time (see async_sync_clock).
+CLOCK_RESYNC_THRESHOLD = timedelta(minutes=10)
+CLOCK_DRIFT_FACTOR = 0.1
+
+# The last good forecast for each stop is cached on disk, so entries can start
+# from it after a restart, and it keeps being served, flagged as stale, through
+# communication errors until it's MAX_STALE_AGE old.
+MAX_STALE_AGE = timedelta(minutes=15)
+CACHE_SAVE_DELAY = 30  # seconds
+
+# Transient API errors are retried up to RETRY_ATTEMPTS times in all, with
+# jittered delays (see RetryPolicy). After BREAKER_FAILURE_THRESHOLD consecutive
+# failed attempts the API is left alone for BREAKER_RESET_TIMEOUT.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 5.0  # seconds
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60.0  # seconds
+
+# Fetches of a stop which overlap share one request, and those shortly after a
+# successful fetch get its result rather than making another.
+FRESHNESS_WINDOW = 2.0  # seconds
+
+# The API is served by a single host, so fetches use their own HTTP session:
+# up to CONNECTION_POOL_SIZE connections, kept open for KEEPALIVE_TIMEOUT
+# between requests so that most polls skip the TCP and TLS handshakes, with DNS
+# answers cached for DNS_CACHE_TTL. A request gives up after CONNECT_TIMEOUT
+# connecting, READ_TIMEOUT waiting for data, or REQUEST_TIMEOUT altogether.
+CONNECTION_POOL_SIZE = DEFAULT_MAX_CONCURRENCY
+KEEPALIVE_TIMEOUT = 75.0  # seconds
+DNS_CACHE_TTL = 300  # seconds
+CONNECT_TIMEOUT = 5.0  # seconds
+READ_TIMEOUT = 5.0  # seconds
+REQUEST_TIMEOUT = 10.0  # seconds
+
+# Forecasts are a few KiB, and the largest imaginable is a few dozen; anything
+# bigger than MAX_PAYLOAD_SIZE, once decompressed, is refused rather than read.
+MAX_PAYLOAD_SIZE = 256 * 1024  # bytes
+
+# Forecasts are normally parsed on the event loop, which takes well under a
+# millisecond each. While a batch of at least PARSE_BATCH_SIZE stops is being
+# refreshed, or for a payload of at least PARSE_EXECUTOR_SIZE, they're parsed
+# in an executor instead, as many at a time as arrive within PARSE_BATCH_DELAY
+# of each other, up to PARSE_BATCH_SIZE (see LuasBatchParser).
+PARSE_BATCH_SIZE = 8
+PARSE_EXECUTOR_SIZE = 32 * 1024  # bytes
+PARSE_BATCH_DELAY = 0.02  # seconds
+
+# Fetch metrics (see LuasClientMetrics) cover each stop's last METRICS_WINDOW
+# fetches.
+METRICS_WINDOW = 100
+
+# Stops whose entries opt in keep a history of their next tram in each
+# direction: the last HISTORY_CAPACITY changes, flushed to disk every
+# HISTORY_FLUSH_INTERVAL.
+HISTORY_CAPACITY = 2880
+HISTORY_FLUSH_INTERVAL = timedelta(minutes=5)
+
+# Headway and reliability statistics follow trams from one forecast to the
+# next, matching them when their due times agree to within
+# TRAM_MATCH_TOLERANCE_MINS; they're lost after MAX_TRACKING_GAP without a
+# forecast. A tram which disappears when it was at most ARRIVAL_DUE_MINS away
+# has arrived, and its first forecast came true if it arrived within
+# RELIABILITY_TOLERANCE_MINS of it. Arrivals less than BUNCHING_FACTOR of the
+# mean headway after the previous one are bunched. Each statistic's samples
+# lose half their weight every STATS_HALF_LIFE samples.
+TRAM_MATCH_TOLERANCE_MINS = 3
+MAX_TRACKING_GAP = timedelta(minutes=10)
+ARRIVAL_DUE_MINS = 1
+RELIABILITY_TOLERANCE_MINS = 2
+BUNCHING_FACTOR = 0.5
+STATS_HALF_LIFE = 20
+
+# Line entries sweep every stop of their line each LINE_SCAN_INTERVAL, within
+# the request budget, reusing forecasts fetched for other entries in the last
+# LINE_REUSE_AGE, and merge them into a model of the whole line (see
+# build_line_model). Stretches where the next tram is at least DISTANT_DUE_MINS
+# away are gaps.
+LINE_SCAN_INTERVAL = timedelta(minutes=1)
+LINE_REUSE_AGE = timedelta(seconds=30)
+
+# Journey entries estimate when trams leaving their origin reach their target
+# from both stops' forecasts. Pairing each tram at the origin with the first
+# one after it at the target gives a lower bound on the travel time, which is
+# exact unless another tram is between the two stops; the travel time is taken
+# as the upper quartile of the last JOURNEY_SAMPLES such bounds. A tram is then
+# paired with the first at the target due that long after it, give or take
+# JOURNEY_TOLERANCE_MINS, or failing that expected after the travel time.
+JOURNEY_SAMPLES = 30
+JOURNEY_TOLERANCE_MINS = 2
+
 LUAS_STATIONS = [
     # cSpell: disable  # noqa: ERA001
     # These are from https://luasforecasts.rpa.ie/analysis/view.aspx, in that
@@ -95,17 +227,29 @@ LUAS_STATIONS = [
     # cSpell: enable  # noqa: ERA001
 ]
 
-
-async def async_translate_station_name(hass: HomeAssistant, station_code: str) -> str:
-    """Retrieve the full name of station_code."""
-    # Possibly this can be worked around using translation_key and placeholders,
-    # but I couldn't figure out a way to do it. Relevant documentation:
-    # https://developers.home-assistant.io/docs/internationalization/core
-
-    translations = await translation.async_get_translations(
-        hass, hass.config.language, "selector", {DOMAIN}
-    )
-    return translations.get(
-        f"component.luas.selector.station.options.{station_code}",
-        station_code,
-    )
+# cSpell: disable  # noqa: ERA001
+_RED_TRUNK = (
+    *("bus", "abb", "jer", "fou", "smi", "mus", "heu", "jam", "fat", "ria"),
+    *("sui", "gol", "dri", "bla", "blu", "kyl", "red", "kin", "bel"),
+)
+# The stops of each line, as routes from an inbound terminus to an outbound
+# one, so that outbound trams pass them in order. Where a line branches, its
+# routes share their trunk. Some Green line stops in the city centre are only
+# served in one direction. The alternative codes for Heuston, and the depot,
+# are left out.
+LUAS_LINES = {
+    "red": (
+        ("tpt", "sdk", "mys", "gdk", *_RED_TRUNK, "coo", "hos", "tal"),
+        ("con", *_RED_TRUNK, "fet", "cvn", "cit", "for", "sag"),
+    ),
+    "green": (
+        (
+            *("bro", "cab", "phi", "gra", "brd", "dom", "par", "oup", "ogp"),
+            *("mar", "wes", "try", "daw", "sts", "har", "cha", "ran", "bee"),
+            *("cow", "mil", "win", "dun", "bal", "kil", "sti", "san", "cpk"),
+            *("gle", "gal", "leo", "baw", "rcc", "cck", "bre", "lau", "che"),
+            "bri",
+        ),
+    ),
+}
+# cSpell: enable  # noqa: ERA001
@@ -2,27 +2,365 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+import time
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .api import (
+    LuasApiClientCommunicationError,
     LuasApiClientError,
+    LuasInfo,
+    LuasSnapshot,
 )
+from .const import (
+    CLOCK_DRIFT_FACTOR,
+    CLOCK_RESYNC_THRESHOLD,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DISTANT_DUE_MINS,
+    DOMAIN,
+    IMMINENT_DUE_MINS,
+    LINE_SCAN_INTERVAL,
+    LOGGER,
+    MAX_STALE_AGE,
+)
+from .network import LuasLineModel, build_line_model
+from .stats import LuasStatsEngine
 
 if TYPE_CHECKING:
-    from .data import LuasConfigEntry
+    from collections.abc import Awaitable, Callable, Collection, Sequence
+
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+    from .api import LuasApiClient, SnapshotKey, Tram
+    from .cache import LuasForecastCache
+
+
+def _is_watched(tram: Tram, watched: Collection[SnapshotKey] | None) -> bool:
+    return (
+        watched is None
+        or LuasSnapshot.key(tram.direction, None) in watched
+        or LuasSnapshot.key(tram.direction, tram.destination) in watched
+    )
+
+
+def nearest_due_mins(
+    info: LuasInfo,
+    watched: Collection[SnapshotKey] | None = None,
+) -> int | None:
+    """
+    Minutes until the nearest watched tram in a direction operating normally.
+
+    watched holds the keys (see LuasSnapshot.key) of the trams watched, by
+    direction and destination, or is None to watch every tram.
+    """
+    operating_normally = info.operating_normally
+    return min(
+        (
+            tram.due_mins
+            for tram in info.trams
+            if operating_normally.get(tram.direction, True)
+            and _is_watched(tram, watched)
+        ),
+        default=None,
+    )
+
+
+def adaptive_poll_interval(
+    info: LuasInfo | None,
+    min_interval: timedelta,
+    max_interval: timedelta,
+    watched: Collection[SnapshotKey] | None = None,
+) -> timedelta:
+    """
+    Decide how long to wait before polling again, given the last forecast.
+
+    Poll at min_interval when a watched tram is imminent, and back off to
+    max_interval when the nearest is far away or nothing is running, either
+    because there are no trams at all or because their direction isn't
+    operating normally.
+    """
+    if info is None:
+        return min(max(DEFAULT_SCAN_INTERVAL, min_interval), max_interval)
+
+    nearest = nearest_due_mins(info, watched)
+    if nearest is None:
+        return max_interval
+    if nearest <= IMMINENT_DUE_MINS:
+        return min_interval
+    if nearest >= DISTANT_DUE_MINS:
+        return max_interval
+    return min(max(DEFAULT_SCAN_INTERVAL, min_interval), max_interval)
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-class LuasDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching data from the API."""
+class LuasDataUpdateCoordinator(DataUpdateCoordinator[LuasSnapshot]):
+    """
+    Class to manage fetching data from the API.
+
+    There is one coordinator per stop, shared by every config entry watching
+    that stop (see LuasHub), so it is not bound to any single config entry. It
+    has no timer of its own: LuasHub refreshes all stops which are due together
+    through a LuasBatchPoller, and _async_update_data is only used for the first
+    refresh and for manually requested ones.
+
+    Every forecast fetched is saved to the cache, if any. A recent enough one
+    keeps being served, flagged as stale, through communication errors, rather
+    than making every entity unavailable.
+    """
+
+    client: LuasApiClient
+    station: str
+    min_scan_interval: timedelta
+    max_scan_interval: timedelta
+    poll_interval: timedelta
+    next_poll: float
+    # Whether a poll of the stop is in flight, so it isn't polled again
+    polling: bool
+    # Keys of the trams any entry watches (see nearest_due_mins), or None for all
+    watched: frozenset[SnapshotKey] | None
+    clock_offset: timedelta | None
+    cache: LuasForecastCache | None
+    fetched_at: datetime | None
+    stale: bool
+    stats: LuasStatsEngine
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        station: str,
+        client: LuasApiClient,
+        cache: LuasForecastCache | None = None,
+    ) -> None:
+        """Initialize."""
+        super().__init__(
+            hass=hass,
+            logger=LOGGER,
+            config_entry=None,
+            name=f"{DOMAIN}_{station}",
+            update_interval=None,
+            # Entities only need to write their state if the forecast changed
+            always_update=False,
+        )
+        self.client = client
+        self.station = station
+        self.min_scan_interval = DEFAULT_MIN_SCAN_INTERVAL
+        self.max_scan_interval = DEFAULT_MAX_SCAN_INTERVAL
+        self.poll_interval = DEFAULT_SCAN_INTERVAL
+        self.next_poll = time.monotonic()
+        self.polling = False
+        self.watched = None
+        self.clock_offset = None
+        self.cache = cache
+        self.fetched_at = None
+        self.stale = False
+        self.stats = LuasStatsEngine()
+
+    @property
+    def poll_due(self) -> bool:
+        """Whether this stop should be refreshed on the next poll."""
+        return time.monotonic() >= self.next_poll
+
+    @callback
+    def async_schedule_poll(self, snapshot: LuasSnapshot | None) -> None:
+        """Schedule the next poll according to the latest forecast, if any."""
+        self.poll_interval = adaptive_poll_interval(
+            snapshot.info if snapshot is not None else None,
+            self.min_scan_interval,
+            self.max_scan_interval,
+            self.watched,
+        )
+        self.next_poll = time.monotonic() + self.poll_interval.total_seconds()
+
+    @callback
+    def async_sync_clock(self, snapshot: LuasSnapshot) -> None:
+        """
+        Update the estimated offset between our clock and the server's.
 
-    config_entry: LuasConfigEntry
+        The offset also absorbs the server's time zone and the time it took for
+        the forecast to reach us, so the smallest offset seen is the most
+        accurate; larger ones are only followed slowly, to correct for drift.
+        Large jumps, such as daylight saving changes, are followed immediately.
+        """
+        if snapshot.created is None:
+            return
+        offset = dt_util.utcnow() - snapshot.created.replace(tzinfo=UTC)
+        if (
+            self.clock_offset is None
+            or offset < self.clock_offset
+            or offset - self.clock_offset > CLOCK_RESYNC_THRESHOLD
+        ):
+            self.clock_offset = offset
+        else:
+            self.clock_offset += (offset - self.clock_offset) * CLOCK_DRIFT_FACTOR
 
-    async def _async_update_data(self) -> Any:
+    @property
+    def imminent(self) -> bool:
+        """Whether a watched tram is expected within IMMINENT_DUE_MINS, by now."""
+        if self.data is None:
+            return False
+        nearest = nearest_due_mins(self.data.info, self.watched)
+        return (
+            nearest is not None
+            and nearest - self.elapsed_minutes() <= IMMINENT_DUE_MINS
+        )
+
+    def forecast_created(self) -> datetime | None:
+        """
+        When, by our clock, the current forecast was made.
+
+        Until the server's clock is known, e.g. when starting from the cache,
+        this falls back to when the forecast was fetched.
+        """
+        if self.data is None:
+            return None
+        if self.data.created is None or self.clock_offset is None:
+            return self.fetched_at
+        return self.data.created.replace(tzinfo=UTC) + self.clock_offset
+
+    def forecast_age(self) -> timedelta | None:
+        """How long ago, by the server's clock, the current forecast was made."""
+        created = self.forecast_created()
+        if created is None:
+            return None
+        return max(timedelta(0), dt_util.utcnow() - created)
+
+    def elapsed_minutes(self) -> int:
+        """Whole minutes by which to count down the current forecast's trams."""
+        age = self.forecast_age()
+        return 0 if age is None else age // timedelta(minutes=1)
+
+    def next_countdown(self) -> datetime | None:
+        """When elapsed_minutes will next increase, if it's being tracked."""
+        age = self.forecast_age()
+        if age is None:
+            return None
+        return dt_util.utcnow() + (timedelta(minutes=1) - age % timedelta(minutes=1))
+
+    @callback
+    def async_seed(self, data: LuasSnapshot, fetched_at: datetime) -> None:
+        """Start from a cached forecast, until the first poll replaces it."""
+        self.data = data
+        self.fetched_at = fetched_at
+        self.stale = True
+        self.next_poll = time.monotonic()
+
+    @callback
+    def _async_set_stale(self, *, stale: bool) -> None:
+        if stale != self.stale:
+            self.stale = stale
+            self.async_update_listeners()
+
+    @callback
+    def _async_fetched(self, data: LuasSnapshot) -> None:
+        """Record a freshly fetched forecast."""
+        self.async_schedule_poll(data)
+        self.async_sync_clock(data)
+        self.fetched_at = dt_util.utcnow()
+        self.stats.update(data, self.fetched_at)
+        if self.cache is not None:
+            self.cache.put(self.station, data, self.fetched_at)
+
+    @callback
+    def _async_serve_stale(self, exception: Exception) -> bool:
+        """Keep the current forecast through a communication error, if possible."""
+        if (
+            not isinstance(exception, LuasApiClientCommunicationError)
+            or self.data is None
+            or self.fetched_at is None
+            or dt_util.utcnow() - self.fetched_at > MAX_STALE_AGE
+        ):
+            return False
+        LOGGER.debug("Serving stale forecast for %s: %s", self.station, exception)
+        self._async_set_stale(stale=True)
+        return True
+
+    @callback
+    def async_set_polled_data(self, data: LuasSnapshot) -> None:
+        """Set data from a poll, only notifying listeners if it changed."""
+        self._async_fetched(data)
+        if self.last_update_success and data == self.data:
+            self.data = data
+            self._async_set_stale(stale=False)
+            return
+        self.stale = False
+        self.async_set_updated_data(data)
+
+    @callback
+    def async_set_poll_error(self, exception: Exception) -> None:
+        """Handle a failed poll, serving stale data if possible."""
+        self.async_schedule_poll(None)
+        if not self._async_serve_stale(exception):
+            self.async_set_update_error(UpdateFailed(exception))
+
+    async def _async_update_data(self) -> LuasSnapshot:
         """Update data via library."""
         try:
-            return await self.config_entry.runtime_data.client.async_get_data()
+            data = await self.client.async_get_data()
         except LuasApiClientError as exception:
+            self.async_schedule_poll(None)
+            if self._async_serve_stale(exception):
+                return self.data
             raise UpdateFailed(exception) from exception
+        self._async_fetched(data)
+        if data == self.data:
+            self._async_set_stale(stale=False)
+        self.stale = False
+        return data
+
+
+class LuasLineCoordinator(DataUpdateCoordinator[LuasLineModel]):
+    """
+    Class to manage a model of a whole line.
+
+    Every LINE_SCAN_INTERVAL, all of the line's stops are swept (see
+    LuasHub.async_sweep), and their current forecasts merged by
+    build_line_model. Stale forecasts are left out, as the model would place
+    trams where they were rather than where they are.
+
+    So as not to hold up setup, the first sweep only fetches the stops the
+    budget allows straight away, and the model starts from those.
+    """
+
+    line: str
+    stops: Sequence[LuasDataUpdateCoordinator]
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        line: str,
+        stops: Sequence[LuasDataUpdateCoordinator],
+        sweep: Callable[..., Awaitable[object]],
+    ) -> None:
+        """Initialize."""
+        super().__init__(
+            hass=hass,
+            logger=LOGGER,
+            config_entry=entry,
+            name=f"{DOMAIN}_{line}_line",
+            update_interval=LINE_SCAN_INTERVAL,
+            always_update=False,
+        )
+        self.line = line
+        self.stops = stops
+        self._sweep = sweep
+
+    async def _async_update_data(self) -> LuasLineModel:
+        """Sweep the line's stops, and model it from their forecasts."""
+        await self._sweep(self.stops, wait=self.data is not None)
+        forecasts = {
+            stop.station: stop.data.info
+            for stop in self.stops
+            if stop.data is not None and stop.last_update_success and not stop.stale
+        }
+        if not forecasts:
+            msg = f"No current forecasts for the {self.line} line"
+            raise UpdateFailed(msg)
+        return build_line_model(self.line, forecasts)
@@ -9,21 +9,47 @@ if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.loader import Integration
 
-    from .api import LuasApiClient
-    from .coordinator import LuasDataUpdateCoordinator
+    from .coordinator import LuasDataUpdateCoordinator, LuasLineCoordinator
+    from .journey import LuasJourney
 
 
-type LuasConfigEntry = ConfigEntry[LuasData]
+type LuasConfigEntry = ConfigEntry[LuasData | LuasLineData | LuasJourneyData]
 
 
 @dataclass
 class LuasData:
     """Data for the Luas integration."""
 
-    client: LuasApiClient
     coordinator: LuasDataUpdateCoordinator
     integration: Integration
+    entry_id: str
     station: str
     translated_station: str
-    destination: str | None
-    translated_destination: str | None
+    # Station codes and names of the destinations to show trams for, each in
+    # its own sensor; if there are none, trams to any destination are shown
+    destinations: list[str]
+    translated_destinations: list[str]
+    directions: list[str]
+
+
+@dataclass
+class LuasLineData:
+    """Data for a Luas line entry."""
+
+    coordinator: LuasLineCoordinator
+    integration: Integration
+    entry_id: str
+    line: str
+
+
+@dataclass
+class LuasJourneyData:
+    """Data for a Luas journey entry."""
+
+    # The origin's coordinator, then the target's
+    coordinators: tuple[LuasDataUpdateCoordinator, LuasDataUpdateCoordinator]
+    integration: Integration
+    entry_id: str
+    translated_origin: str
+    translated_target: str
+    journey: LuasJourney
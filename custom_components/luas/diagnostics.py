@@ -0,0 +1,99 @@
+"""Diagnostics support for luas."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .data import LuasJourneyData, LuasLineData
+from .hub import async_get_hub
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import LuasConfigEntry
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: LuasConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    if isinstance(entry.runtime_data, LuasLineData):
+        line = entry.runtime_data.coordinator
+        return {
+            "entry": {
+                "data": dict(entry.data),
+                "options": dict(entry.options),
+            },
+            "line": {
+                "last_update_success": line.last_update_success,
+                "stops": {
+                    stop.station: {
+                        "fetched_at": stop.fetched_at,
+                        "stale": stop.stale,
+                        "last_update_success": stop.last_update_success,
+                    }
+                    for stop in line.stops
+                },
+            },
+            "model": line.data.as_dict(str) if line.data is not None else None,
+        }
+
+    if isinstance(entry.runtime_data, LuasJourneyData):
+        journey = entry.runtime_data.journey
+        return {
+            "entry": {
+                "data": dict(entry.data),
+                "options": dict(entry.options),
+            },
+            "journey": {
+                "direction": journey.direction,
+                "travel_mins": journey.travel_mins,
+            },
+            "forecasts": [
+                stop.data.info.as_dict() if stop.data is not None else None
+                for stop in entry.runtime_data.coordinators
+            ],
+        }
+
+    coordinator = entry.runtime_data.coordinator
+    client = coordinator.client
+    hub = async_get_hub(hass)
+    breaker = hub.breaker
+    last_success = client.metrics.last_success
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "station": coordinator.station,
+            "last_update_success": coordinator.last_update_success,
+            "stale": coordinator.stale,
+            "fetched_at": coordinator.fetched_at,
+            "poll_interval": coordinator.poll_interval.total_seconds(),
+            "clock_offset": coordinator.clock_offset.total_seconds()
+            if coordinator.clock_offset is not None
+            else None,
+        },
+        "client": {
+            "stats": asdict(client.stats),
+            "metrics": client.metrics.as_dict(),
+            "seconds_since_last_success": (
+                (dt_util.utcnow() - last_success).total_seconds()
+                if last_success is not None
+                else None
+            ),
+        },
+        "breaker": {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+        },
+        "parsing": hub.parser.metrics.as_dict(),
+        "forecast": (
+            coordinator.data.info.as_dict() if coordinator.data is not None else None
+        ),
+    }
@@ -7,11 +7,11 @@ from typing import TYPE_CHECKING
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION
-from .coordinator import LuasDataUpdateCoordinator
+from .const import ATTRIBUTION, DIRECTIONS, DOMAIN
+from .coordinator import LuasDataUpdateCoordinator, LuasLineCoordinator
 
 if TYPE_CHECKING:
-    from .data import LuasData
+    from .data import LuasData, LuasJourneyData, LuasLineData
 
 
 class LuasEntity(CoordinatorEntity[LuasDataUpdateCoordinator]):
@@ -30,20 +30,92 @@ class LuasEntity(CoordinatorEntity[LuasDataUpdateCoordinator]):
         """Initialize."""
         super().__init__(coordinator)
         self.data = data
-        self.device_id = f"luas_{data.station}" + (
-            f"_to_{data.destination}" if data.destination else ""
+        # As before entries could have several destinations, for a single one
+        self.device_id = f"luas_{data.station}" + "".join(
+            f"_to_{destination}" for destination in data.destinations
         )
+        name = f"Luas {data.translated_station}"
+        if data.translated_destinations:
+            name += f" to {', '.join(data.translated_destinations)}"
+        if len(data.directions) < len(DIRECTIONS):
+            self.device_id += "".join(f"_{d}" for d in data.directions)
+            name += "".join(f" {d}" for d in data.directions)
         self._attr_device_info = DeviceInfo(
-            name=f"Luas {data.translated_station}"
-            + (
-                f" to {data.translated_destination}"
-                if data.translated_destination
-                else ""
-            ),
+            name=name,
             identifiers={
                 (
-                    coordinator.config_entry.domain,
-                    coordinator.config_entry.entry_id,
+                    DOMAIN,
+                    data.entry_id,
                 ),
             },
         )
+
+
+class LuasLineEntity(CoordinatorEntity[LuasLineCoordinator]):
+    """Luas line entity base class."""
+
+    _attr_attribution = ATTRIBUTION
+    device_id: str
+    data: LuasLineData
+
+    def __init__(
+        self,
+        coordinator: LuasLineCoordinator,
+        data: LuasLineData,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        self.data = data
+        self.device_id = f"luas_{data.line}_line"
+        self._attr_device_info = DeviceInfo(
+            name=f"Luas {data.line.capitalize()} line",
+            identifiers={
+                (
+                    DOMAIN,
+                    data.entry_id,
+                ),
+            },
+        )
+
+
+class LuasJourneyEntity(CoordinatorEntity[LuasDataUpdateCoordinator]):
+    """
+    Luas journey entity base class.
+
+    Its coordinator is the origin's, and it's also updated by the target's.
+    """
+
+    _attr_attribution = ATTRIBUTION
+    device_id: str
+    data: LuasJourneyData
+    target_coordinator: LuasDataUpdateCoordinator
+
+    def __init__(self, data: LuasJourneyData) -> None:
+        """Initialize."""
+        origin, self.target_coordinator = data.coordinators
+        super().__init__(origin)
+        self.data = data
+        self.device_id = (
+            f"luas_journey_{origin.station}_to_{self.target_coordinator.station}"
+        )
+        self._attr_device_info = DeviceInfo(
+            name=f"Luas {data.translated_origin} to {data.translated_target}",
+            identifiers={
+                (
+                    DOMAIN,
+                    data.entry_id,
+                ),
+            },
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Also follow the target's coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.target_coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether both stops' forecasts are available."""
+        return super().available and self.target_coordinator.last_update_success
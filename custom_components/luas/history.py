@@ -0,0 +1,187 @@
+"""Compact per-stop forecast history for luas."""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from .api import LuasSnapshot
+from .const import DIRECTIONS, LOGGER, LUAS_STATIONS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+# The API names directions "Inbound" and "Outbound"; snapshots index them, like
+# DIRECTIONS, in lowercase
+_DIRECTION_KEYS = tuple(LuasSnapshot.key(direction, None) for direction in DIRECTIONS)
+_STOP_IDS = {code: i for i, code in enumerate(LUAS_STATIONS)}
+
+# In the file, and in the rings: due minutes and destination, when there's no
+# tram or the destination isn't a known station
+NO_TRAM = -1
+UNKNOWN_STATION = 0xFFFF
+
+# Records are time (UTC epoch seconds), stop, direction, due minutes of the
+# next tram and its destination, as indices into LUAS_STATIONS and DIRECTIONS
+_RECORD = struct.Struct("<IBBhH")
+_MAGIC = b"LUASH\x00\x00\x01"
+
+
+class _Ring:
+    """A fixed-size ring of samples for one stop and direction."""
+
+    __slots__ = ("_next", "destinations", "due", "times")
+
+    def __init__(self, capacity: int) -> None:
+        self.times = array("I", bytes(4 * capacity))
+        self.due = array("h", bytes(2 * capacity))
+        self.destinations = array("H", bytes(2 * capacity))
+        # Total samples ever added; the next one goes at _next % capacity
+        self._next = 0
+
+    def __len__(self) -> int:
+        return min(self._next, len(self.times))
+
+    def add(self, time: int, due: int, destination: int) -> None:
+        i = self._next % len(self.times)
+        self.times[i] = time
+        self.due[i] = due
+        self.destinations[i] = destination
+        self._next += 1
+
+    def __iter__(self) -> Iterator[tuple[int, int, int]]:
+        """Iterate over samples, oldest first."""
+        capacity = len(self.times)
+        for n in range(self._next - len(self), self._next):
+            i = n % capacity
+            yield self.times[i], self.due[i], self.destinations[i]
+
+
+class LuasHistory:
+    """
+    How each stop's next tram changed over time, in bounded memory and disk.
+
+    For every stop and direction, the last capacity samples are kept in a ring
+    of fixed-size arrays, costing 8 bytes per sample. New samples are also
+    queued up to be appended to a file (see take_pending); when the file would
+    grow beyond twice what the rings can hold, it's rewritten from them
+    instead. The file is only read, to refill the rings, on
+    startup.
+
+    File access is blocking, so load and write_* must be run in an executor.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        capacity: int,
+        destination_code: Callable[[str], str | None],
+    ) -> None:
+        """Initialize an empty history, which would be stored in path."""
+        self._path = path
+        self._capacity = capacity
+        self._destination_code = destination_code
+        self._rings: dict[tuple[int, int], _Ring] = {}
+        self._pending = bytearray()
+        self._file_size = 0
+        self._max_file_size = len(_MAGIC) + 2 * _RECORD.size * capacity * len(
+            LUAS_STATIONS
+        ) * len(DIRECTIONS)
+
+    def _add(self, stop: int, direction: int, time: int, due: int, dest: int) -> None:
+        ring = self._rings.get((stop, direction))
+        if ring is None:
+            ring = self._rings[(stop, direction)] = _Ring(self._capacity)
+        ring.add(time, due, dest)
+
+    def record(self, station: str, snapshot: LuasSnapshot, when: datetime) -> None:
+        """Record the next tram in each direction at station."""
+        stop = _STOP_IDS[station]
+        time = int(when.timestamp())
+        for direction, key in enumerate(_DIRECTION_KEYS):
+            trams = snapshot.trams(key)
+            if trams:
+                due = trams[0].due_mins
+                code = self._destination_code(trams[0].destination)
+                dest = _STOP_IDS.get(code, UNKNOWN_STATION) if code else UNKNOWN_STATION
+            else:
+                due, dest = NO_TRAM, UNKNOWN_STATION
+            self._add(stop, direction, time, due, dest)
+            self._pending += _RECORD.pack(time, stop, direction, due, dest)
+
+    def query(
+        self,
+        station: str,
+        direction: str,
+        since: datetime | None = None,
+    ) -> list[tuple[datetime, int | None, str | None]]:
+        """Get (time, due minutes, destination code) samples, oldest first."""
+        ring = self._rings.get((_STOP_IDS[station], DIRECTIONS.index(direction)))
+        if ring is None:
+            return []
+        start = int(since.timestamp()) if since is not None else 0
+        return [
+            (
+                datetime.fromtimestamp(time, UTC),
+                due if due != NO_TRAM else None,
+                LUAS_STATIONS[dest] if dest != UNKNOWN_STATION else None,
+            )
+            for time, due, dest in ring
+            if time >= start
+        ]
+
+    def load(self) -> None:
+        """Refill the rings from the file."""
+        try:
+            data = self._path.read_bytes()
+        except FileNotFoundError:
+            return
+        if not data.startswith(_MAGIC):
+            LOGGER.warning("Discarding unrecognized history file %s", self._path)
+            self._path.unlink()
+            return
+        body = memoryview(data)[len(_MAGIC) :]
+        # Drop a partially written last record
+        body = body[: len(body) - len(body) % _RECORD.size]
+        for time, stop, direction, due, dest in _RECORD.iter_unpack(body):
+            if stop < len(LUAS_STATIONS) and direction < len(DIRECTIONS):
+                self._add(stop, direction, time, due, dest)
+        self._file_size = len(_MAGIC) + len(body)
+
+    def take_pending(self) -> tuple[bytes, bool]:
+        """
+        Take the records to be flushed, and whether to rewrite the whole file.
+
+        When rewriting, the records are everything in the rings.
+        """
+        if self._file_size + len(self._pending) <= self._max_file_size:
+            pending = bytes(self._pending)
+            self._pending.clear()
+            if self._file_size == 0 and pending:
+                pending = _MAGIC + pending
+            self._file_size += len(pending)
+            return pending, False
+
+        self._pending.clear()
+        data = _MAGIC + b"".join(
+            _RECORD.pack(time, stop, direction, due, dest)
+            for (stop, direction), ring in self._rings.items()
+            for time, due, dest in ring
+        )
+        self._file_size = len(data)
+        return data, True
+
+    def write_append(self, data: bytes) -> None:
+        """Append records to the file."""
+        if data:
+            with self._path.open("ab") as file:
+                file.write(data)
+
+    def write_replace(self, data: bytes) -> None:
+        """Replace the file atomically."""
+        temp = self._path.with_suffix(".tmp")
+        temp.write_bytes(data)
+        temp.replace(self._path)
@@ -0,0 +1,462 @@
+"""Shared per-stop forecast hub for luas."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+)
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .api import LuasApiClient, normalize_name
+from .cache import LuasForecastCache
+from .const import (
+    CONF_DESTINATIONS,
+    CONF_DIRECTIONS,
+    CONF_HISTORY,
+    CONF_LINE,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_REQUESTS_PER_MINUTE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DOMAIN,
+    HISTORY_CAPACITY,
+    HISTORY_FLUSH_INTERVAL,
+    LINE_REUSE_AGE,
+    LOGGER,
+    MAX_STALE_AGE,
+    POLL_TICK,
+)
+from .coordinator import LuasDataUpdateCoordinator, LuasLineCoordinator
+from .history import LuasHistory
+from .network import line_stations
+from .parsing import LuasBatchParser
+from .poller import LuasBatchPoller
+from .resilience import CircuitBreaker
+from .session import create_session
+from .stations import async_get_station_index
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from datetime import datetime
+
+    import aiohttp
+    from homeassistant.core import Event, HomeAssistant
+
+    from .api import LuasSnapshot, SnapshotKey
+    from .data import LuasConfigEntry
+    from .poller import LuasPollResult
+    from .stations import LuasStationIndex
+
+
+def _watched_trams(
+    entry: LuasConfigEntry,
+    stations: LuasStationIndex,
+) -> frozenset[SnapshotKey] | None:
+    """Get keys (see LuasSnapshot.key) of the trams entry watches, None for all."""
+    if CONF_DIRECTIONS not in entry.data:
+        # Line and journey entries watch every tram at their stops
+        return None
+    codes = set(entry.data[CONF_DESTINATIONS])
+    # Every name each destination goes by, as the API's may differ from ours
+    names = (
+        [name for name, code in stations.destinations.items() if code in codes]
+        if codes
+        else [None]
+    )
+    return frozenset(
+        (normalize_name(direction), name)
+        for direction in entry.data[CONF_DIRECTIONS]
+        for name in names
+    )
+
+
+@dataclass
+class _LuasStop:
+    """A stop being polled on behalf of one or more config entries."""
+
+    coordinator: LuasDataUpdateCoordinator
+    entries: dict[str, LuasConfigEntry] = field(default_factory=dict)
+    # The trams each entry watches (see _watched_trams)
+    watched: dict[str, frozenset[SnapshotKey] | None] = field(default_factory=dict)
+    record_history: bool = False
+    last_recorded: LuasSnapshot | None = None
+    unsub_listener: Callable[[], None] | None = None
+
+    @property
+    def polled(self) -> bool:
+        """Whether the stop is polled by itself, rather than only in sweeps."""
+        return any(CONF_LINE not in entry.data for entry in self.entries.values())
+
+    def update_options(self) -> None:
+        """Apply the most demanding options of all entries to the stop."""
+        options = [entry.options for entry in self.entries.values()]
+        self.record_history = any(o.get(CONF_HISTORY, False) for o in options)
+        min_interval = min(
+            (
+                timedelta(seconds=o[CONF_MIN_SCAN_INTERVAL])
+                for o in options
+                if CONF_MIN_SCAN_INTERVAL in o
+            ),
+            default=DEFAULT_MIN_SCAN_INTERVAL,
+        )
+        max_interval = min(
+            (
+                timedelta(seconds=o[CONF_MAX_SCAN_INTERVAL])
+                for o in options
+                if CONF_MAX_SCAN_INTERVAL in o
+            ),
+            default=DEFAULT_MAX_SCAN_INTERVAL,
+        )
+        self.coordinator.min_scan_interval = min_interval
+        self.coordinator.max_scan_interval = max(min_interval, max_interval)
+        # Polled as often as the nearest tram any entry watches needs
+        watched = list(self.watched.values())
+        self.coordinator.watched = (
+            None if None in watched else frozenset().union(*watched)
+        )
+
+
+class LuasHub:
+    """
+    Integration-wide owner of one coordinator per stop.
+
+    Config entries watching the same stop (e.g. "Sandyford" and "Sandyford to
+    Bride's Glen") share that stop's coordinator, so its forecast is fetched and
+    parsed once per poll regardless of how many entries are interested in it.
+    Every POLL_TICK, all stops which are due, and not still being polled, are
+    refreshed together.
+
+    A stop with a recent enough cached forecast starts from it straight away,
+    and is refreshed in the background on the next tick, so that a slow or
+    unavailable API doesn't hold up setup.
+
+    All stops share one circuit breaker, since they're all served by the same
+    API: when it's failing, it's failing for every stop. They also share one
+    HTTP session (see create_session), which is closed with the last stop, and
+    one parser (see LuasBatchParser). History, for the stops whose entries
+    want it, is only loaded once a stop wants it, and written out once none
+    does.
+
+    Line entries acquire every stop of their line, which are swept together by
+    the line's coordinator rather than polled on the tick, unless an entry for
+    the stop itself is also polling it.
+    """
+
+    breaker: CircuitBreaker
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        """Initialize the hub."""
+        self._hass = hass
+        self._stops: dict[str, _LuasStop] = {}
+        self.parser = LuasBatchParser(hass)
+        self._poller = LuasBatchPoller(max_concurrency, parser=self.parser)
+        self._unsub_poll: Callable[[], None] | None = None
+        self._cache = LuasForecastCache(hass)
+        self._cache_loaded = False
+        self.breaker = CircuitBreaker()
+        self._session: aiohttp.ClientSession | None = None
+        self._unsub_close: Callable[[], None] | None = None
+        self.breaker.add_listener(self._breaker_changed)
+        self.history: LuasHistory | None = None
+        self._unsub_flush: Callable[[], None] | None = None
+        self._unsub_final_write: Callable[[], None] | None = None
+        # Entries are set up concurrently, but everything shared is set up once
+        self._setup_lock = asyncio.Lock()
+        self.lines: dict[str, LuasLineCoordinator] = {}
+
+    async def _async_setup(self) -> None:
+        """Load everything shared by all stops, the first time one is acquired."""
+        async with self._setup_lock:
+            await self._async_setup_locked()
+
+    async def _async_setup_locked(self) -> None:
+        if not self._cache_loaded:
+            await self._cache.async_load()
+            self._cache_loaded = True
+
+        if self._session is None:
+            # Not the shared session, so that fetches can be traced and
+            # connections to the API kept alive between polls
+            self._session = create_session()
+            self._unsub_close = self._hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_CLOSE, self._async_close_session
+            )
+
+    async def _async_update_history(self) -> None:
+        """Open history once a stop wants it, and close it once none does."""
+        async with self._setup_lock:
+            recording = any(stop.record_history for stop in self._stops.values())
+            if recording and self.history is None:
+                await self._async_open_history()
+            elif not recording and self.history is not None:
+                await self._async_close_history()
+
+    async def _async_open_history(self) -> None:
+        """Load history from disk, and start flushing it."""
+        stations = await async_get_station_index(self._hass)
+        history = LuasHistory(
+            Path(self._hass.config.path(STORAGE_DIR, f"{DOMAIN}.history")),
+            HISTORY_CAPACITY,
+            stations.destination_code,
+        )
+        await self._hass.async_add_executor_job(history.load)
+        self.history = history
+        self._unsub_flush = async_track_time_interval(
+            self._hass,
+            self._async_flush_history,
+            HISTORY_FLUSH_INTERVAL,
+            name=f"{DOMAIN} history flush",
+            cancel_on_shutdown=True,
+        )
+        self._unsub_final_write = self._hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+        )
+
+    async def async_acquire(
+        self,
+        station: str,
+        entry: LuasConfigEntry,
+    ) -> LuasDataUpdateCoordinator:
+        """Get the coordinator for station, creating it if needed."""
+        await self._async_setup()
+        stations = await async_get_station_index(self._hass)
+        coordinator = self._acquire_stop(station, entry, stations)
+        await self._async_update_history()
+        if coordinator.data is None:
+            await coordinator.async_refresh()
+            if not coordinator.last_update_success:
+                await self.async_release(station, entry.entry_id)
+                raise ConfigEntryNotReady from coordinator.last_exception
+
+        if self._unsub_poll is None:
+            self._unsub_poll = async_track_time_interval(
+                self._hass,
+                self._async_poll,
+                POLL_TICK,
+                name=f"{DOMAIN} poll",
+                cancel_on_shutdown=True,
+            )
+
+        return coordinator
+
+    async def async_acquire_line(
+        self,
+        line: str,
+        entry: LuasConfigEntry,
+    ) -> LuasLineCoordinator:
+        """Get a coordinator modelling line, for entry."""
+        await self._async_setup()
+        stations = await async_get_station_index(self._hass)
+        coordinator = self.lines[line] = LuasLineCoordinator(
+            hass=self._hass,
+            entry=entry,
+            line=line,
+            stops=[
+                self._acquire_stop(station, entry, stations)
+                for station in line_stations(line)
+            ],
+            sweep=self.async_sweep,
+        )
+        await self._async_update_history()
+        return coordinator
+
+    async def async_release_line(self, line: str, entry_id: str) -> None:
+        """Drop entry_id's interest in line, and in each of its stops."""
+        # There's only one entry for each line
+        self.lines.pop(line, None)
+        for station in line_stations(line):
+            await self.async_release(station, entry_id)
+
+    def _acquire_stop(
+        self,
+        station: str,
+        entry: LuasConfigEntry,
+        stations: LuasStationIndex,
+    ) -> LuasDataUpdateCoordinator:
+        """Add entry to station's stop, creating it if needed."""
+        stop = self._stops.get(station)
+        if stop is None:
+            stop = self._stops[station] = _LuasStop(
+                coordinator=LuasDataUpdateCoordinator(
+                    hass=self._hass,
+                    station=station,
+                    client=LuasApiClient(
+                        station=station,
+                        session=self._session,
+                        breaker=self.breaker,
+                        parser=self.parser,
+                    ),
+                    cache=self._cache,
+                )
+            )
+            cached = self._cache.get(station)
+            if cached is not None and dt_util.utcnow() - cached[1] <= MAX_STALE_AGE:
+                stop.coordinator.async_seed(*cached)
+            stop.unsub_listener = stop.coordinator.async_add_listener(
+                lambda stop=stop: self._record_history(stop)
+            )
+        stop.entries[entry.entry_id] = entry
+        stop.watched[entry.entry_id] = _watched_trams(entry, stations)
+        stop.update_options()
+        self._update_request_budget()
+        return stop.coordinator
+
+    async def async_release(self, station: str, entry_id: str) -> None:
+        """Drop entry_id's interest in station, shutting it down if unused."""
+        stop = self._stops.get(station)
+        if stop is None:
+            return
+        stop.entries.pop(entry_id, None)
+        stop.watched.pop(entry_id, None)
+        if stop.entries:
+            stop.update_options()
+            self._update_request_budget()
+            await self._async_update_history()
+            return
+
+        del self._stops[station]
+        self._update_request_budget()
+        if stop.unsub_listener is not None:
+            stop.unsub_listener()
+        await stop.coordinator.async_shutdown()
+        await self._async_update_history()
+        if self._stops:
+            return
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+        if self._unsub_close is not None:
+            self._unsub_close()
+        await self._async_close_session()
+
+    async def _async_close_session(self, _event: Event | None = None) -> None:
+        """Close the session, and with it any kept-alive connections."""
+        self._unsub_close = None
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def _async_close_history(self) -> None:
+        """Stop flushing history, after writing what's left of it."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._unsub_final_write is not None:
+            self._unsub_final_write()
+            self._unsub_final_write = None
+        await self._async_flush_history()
+        # Loaded again from disk when a stop next wants it
+        self.history = None
+
+    async def _async_final_write(self, _event: Event) -> None:
+        """Write what's left of the history, as Home Assistant stops."""
+        self._unsub_final_write = None
+        await self._async_flush_history()
+
+    @callback
+    def _record_history(self, stop: _LuasStop) -> None:
+        """Record a stop's new forecast, if its entries want history."""
+        coordinator = stop.coordinator
+        if (
+            not stop.record_history
+            or self.history is None
+            or coordinator.data is None
+            or coordinator.data is stop.last_recorded
+            or coordinator.stale
+            or coordinator.fetched_at is None
+        ):
+            return
+        stop.last_recorded = coordinator.data
+        self.history.record(
+            stop.coordinator.station, coordinator.data, coordinator.fetched_at
+        )
+
+    async def _async_flush_history(
+        self, _event: datetime | Event | None = None
+    ) -> None:
+        """Write recent history to disk."""
+        if self.history is None:
+            return
+        data, rewrite = self.history.take_pending()
+        if rewrite:
+            await self._hass.async_add_executor_job(self.history.write_replace, data)
+        elif data:
+            await self._hass.async_add_executor_job(self.history.write_append, data)
+
+    def _update_request_budget(self) -> None:
+        """Apply the most restrictive request budget of all entries."""
+        self._poller.bucket.configure(
+            min(
+                (
+                    entry.options[CONF_REQUESTS_PER_MINUTE]
+                    for stop in self._stops.values()
+                    for entry in stop.entries.values()
+                    if CONF_REQUESTS_PER_MINUTE in entry.options
+                ),
+                default=DEFAULT_REQUESTS_PER_MINUTE,
+            )
+        )
+
+    def _breaker_changed(self) -> None:
+        LOGGER.info("Luas API circuit breaker is now %s", self.breaker.state)
+
+    async def _async_poll(self, _now: datetime) -> None:
+        """Refresh every stop which is due, in one batch."""
+        due = [
+            stop.coordinator
+            for stop in self._stops.values()
+            # A slow stop still being polled, e.g. by an earlier batch, doesn't
+            # hold up the others, which are polled alongside it
+            if stop.polled
+            and not stop.coordinator.polling
+            and stop.coordinator.poll_due
+        ]
+        if due:
+            await self._poller.async_poll(due)
+
+    async def async_sweep(
+        self,
+        coordinators: Sequence[LuasDataUpdateCoordinator],
+        *,
+        wait: bool = True,
+    ) -> LuasPollResult:
+        """Refresh all of coordinators, except those fetched very recently."""
+        return await self._poller.async_sweep(
+            coordinators, fresh=_recently_fetched, wait=wait
+        )
+
+
+def _recently_fetched(coordinator: LuasDataUpdateCoordinator) -> bool:
+    """Whether a stop's forecast is recent enough for a sweep to reuse."""
+    return (
+        coordinator.fetched_at is not None
+        and not coordinator.stale
+        and dt_util.utcnow() - coordinator.fetched_at < LINE_REUSE_AGE
+    )
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> LuasHub:
+    """Get the integration-wide hub, creating it if needed."""
+    hub: LuasHub | None = hass.data.get(DOMAIN)
+    if hub is None:
+        hub = hass.data[DOMAIN] = LuasHub(hass)
+    return hub
@@ -0,0 +1,177 @@
+"""Journey time estimates between two luas stops."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .api import Tram, normalize_name
+from .const import JOURNEY_SAMPLES, JOURNEY_TOLERANCE_MINS
+from .network import journey_direction, reaches
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from .api import LuasInfo
+
+
+@dataclass(frozen=True, slots=True)
+class LuasJourneyLeg:
+    """A tram from the origin, and when it's expected at the target."""
+
+    destination: str
+    departs_mins: int
+    arrives_mins: int
+    # Whether arrives_mins is from the target's forecast, rather than estimated
+    # from the travel time
+    forecast: bool
+
+
+def _pair(
+    departing: Sequence[Tram],
+    arriving: Sequence[Tram],
+    earliest: int,
+    latest: float,
+) -> list[Tram | None]:
+    """
+    Pair each departing tram with an arriving one to the same destination.
+
+    Each is paired with the first arriving tram not already paired which is
+    due between earliest and latest minutes after it, or None.
+    """
+    used: set[int] = set()
+    pairs: list[Tram | None] = []
+    for tram in departing:
+        match = next(
+            (
+                i
+                for i, candidate in enumerate(arriving)
+                if i not in used
+                and candidate.destination == tram.destination
+                and earliest <= candidate.due_mins - tram.due_mins <= latest
+            ),
+            None,
+        )
+        if match is not None:
+            used.add(match)
+        pairs.append(arriving[match] if match is not None else None)
+    return pairs
+
+
+class LuasJourney:
+    """
+    Estimates of when trams leaving origin reach target, both stop codes.
+
+    Trams aren't identified in forecasts, so those at the two stops are paired
+    up by destination and due time, with the travel time between the stops
+    learnt from previous forecasts (see JOURNEY_SAMPLES).
+    """
+
+    origin: str
+    target: str
+    direction: str
+
+    def __init__(
+        self,
+        origin: str,
+        target: str,
+        destination_code: Callable[[str], str | None],
+    ) -> None:
+        """Initialize, with a way to look up destinations' stop codes."""
+        direction = journey_direction(origin, target)
+        if direction is None:
+            msg = f"No trams go from {origin} to {target}"
+            raise ValueError(msg)
+        self.origin = origin
+        self.target = target
+        self.direction = direction
+        self._destination_code = destination_code
+        self._reaches: dict[str, bool] = {}
+        self._samples: deque[int] = deque(maxlen=JOURNEY_SAMPLES)
+        self._sampled: tuple[LuasInfo, LuasInfo] | None = None
+
+    @property
+    def travel_mins(self) -> int | None:
+        """Estimated minutes from origin to target."""
+        if not self._samples:
+            return None
+        return sorted(self._samples)[len(self._samples) * 3 // 4]
+
+    def _goes_to_target(self, tram: Tram) -> bool:
+        if normalize_name(tram.direction) != self.direction:
+            return False
+        if (result := self._reaches.get(tram.destination)) is None:
+            code = self._destination_code(tram.destination)
+            result = self._reaches[tram.destination] = code is not None and reaches(
+                self.origin, self.target, code
+            )
+        return result
+
+    def _trams_to_target(self, info: LuasInfo, elapsed: int) -> list[Tram]:
+        """Trams in info which go to the target, counted down by elapsed."""
+        return [
+            Tram.of(tram.destination, tram.direction, max(0, tram.due_mins - elapsed))
+            if elapsed
+            else tram
+            for tram in info.trams
+            if self._goes_to_target(tram)
+        ]
+
+    def update(
+        self,
+        origin: LuasInfo,
+        target: LuasInfo,
+        *,
+        origin_elapsed: int = 0,
+        target_elapsed: int = 0,
+    ) -> tuple[LuasJourneyLeg, ...]:
+        """
+        Learn from the stops' latest forecasts, and estimate each journey.
+
+        Each forecast's trams are counted down by the whole minutes elapsed
+        since it was made, so that forecasts of different ages line up. The
+        travel time is only learnt from a pair of forecasts once.
+        """
+        departing = self._trams_to_target(origin, origin_elapsed)
+        arriving = self._trams_to_target(target, target_elapsed)
+
+        if (origin, target) != self._sampled:
+            self._sampled = (origin, target)
+            bounds = [
+                arrival.due_mins - departure.due_mins
+                for departure, arrival in zip(
+                    departing, _pair(departing, arriving, 0, float("inf")), strict=True
+                )
+                if arrival is not None
+            ]
+            if bounds:
+                self._samples.append(max(bounds))
+
+        travel_mins = self.travel_mins
+        if travel_mins is None:
+            return ()
+        legs = []
+        for departure, arrival in zip(
+            departing,
+            _pair(
+                departing,
+                arriving,
+                travel_mins - JOURNEY_TOLERANCE_MINS,
+                travel_mins + JOURNEY_TOLERANCE_MINS,
+            ),
+            strict=True,
+        ):
+            legs.append(
+                LuasJourneyLeg(
+                    destination=departure.destination,
+                    departs_mins=departure.due_mins,
+                    arrives_mins=(
+                        arrival.due_mins
+                        if arrival is not None
+                        else departure.due_mins + travel_mins
+                    ),
+                    forecast=arrival is not None,
+                )
+            )
+        return tuple(legs)
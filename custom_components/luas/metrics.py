@@ -0,0 +1,257 @@
+"""Low-overhead fetch metrics for luas."""
+
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from .const import METRICS_WINDOW
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+    from datetime import datetime
+    from types import SimpleNamespace
+
+# Bucket upper bounds
+MILLISECOND_BUCKETS = (
+    *(0.05, 0.1, 0.2, 0.5),
+    *(1, 2, 5, 10, 20, 50, 100, 200, 500),
+    *(1000, 2000, 5000, 10000),
+)
+BYTE_BUCKETS = tuple(2**i for i in range(8, 18))
+
+
+class RollingHistogram:
+    """
+    Distribution of the last window samples, in fixed buckets.
+
+    Adding a sample is O(log buckets); percentiles are only computed when
+    asked for, and are the upper bound of the bucket they fall in.
+    """
+
+    last: float | None
+
+    def __init__(self, bounds: Sequence[float], window: int = METRICS_WINDOW) -> None:
+        """Initialize an empty histogram."""
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._samples: deque[float] = deque(maxlen=window)
+        self._sum = 0.0
+        self.last = None
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, value: float) -> None:
+        """Add a sample, dropping the oldest if the window is full."""
+        if len(self._samples) == self._samples.maxlen:
+            oldest = self._samples[0]
+            self._counts[bisect.bisect_left(self._bounds, oldest)] -= 1
+            self._sum -= oldest
+        self._samples.append(value)
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._sum += value
+        self.last = value
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the samples in the window."""
+        return self._sum / len(self._samples) if self._samples else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Approximate the given percentile (as a fraction) of the window."""
+        if not self._samples:
+            return None
+        rank = fraction * len(self._samples)
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts, strict=False):
+            seen += count
+            if seen >= rank:
+                return bound
+        return max(self._samples)
+
+    def as_dict(self) -> dict[str, float | int | None]:
+        """Summarize the window."""
+        return {
+            "count": len(self._samples),
+            "last": self.last,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
+
+
+@dataclass(slots=True)
+class LuasRequestTiming:
+    """When each stage of a single request happened, by time.monotonic."""
+
+    marks: dict[str, float] = field(default_factory=lambda: {"start": time.monotonic()})
+
+    def between(self, start: str, end: str) -> float | None:
+        """Milliseconds between two marks, if both happened."""
+        if start not in self.marks or end not in self.marks:
+            return None
+        return (self.marks[end] - self.marks[start]) * 1000
+
+
+def _mark(
+    name: str,
+) -> Callable[[aiohttp.ClientSession, SimpleNamespace, object], Awaitable[None]]:
+    async def on_event(
+        _session: aiohttp.ClientSession,
+        trace_config_ctx: SimpleNamespace,
+        _params: object,
+    ) -> None:
+        timing = trace_config_ctx.trace_request_ctx
+        if isinstance(timing, LuasRequestTiming):
+            timing.marks[name] = time.monotonic()
+
+    return on_event
+
+
+def make_trace_config() -> aiohttp.TraceConfig:
+    """
+    Make a trace config which fills in LuasRequestTiming.
+
+    Pass it to the session LuasApiClient uses; without it, only whole
+    requests are timed.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_mark("request_start"))
+    trace_config.on_dns_resolvehost_start.append(_mark("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(_mark("dns_end"))
+    trace_config.on_connection_create_start.append(_mark("connect_start"))
+    trace_config.on_connection_create_end.append(_mark("connect_end"))
+    trace_config.on_connection_reuseconn.append(_mark("reused"))
+    trace_config.on_request_end.append(_mark("response"))
+    return trace_config
+
+
+class LuasClientMetrics:
+    """Where a LuasApiClient's time goes, over its last METRICS_WINDOW fetches."""
+
+    # Milliseconds
+    dns: RollingHistogram
+    connect: RollingHistogram
+    response: RollingHistogram
+    total: RollingHistogram
+    parse: RollingHistogram
+    # Bytes
+    payload_size: RollingHistogram
+    trams: int | None
+    # Requests which opened a new connection, or reused a kept-alive one
+    connections_created: int
+    connections_reused: int
+    errors: Counter[str]
+    last_error: str | None
+    last_success: datetime | None
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.dns = RollingHistogram(MILLISECOND_BUCKETS)
+        self.connect = RollingHistogram(MILLISECOND_BUCKETS)
+        self.response = RollingHistogram(MILLISECOND_BUCKETS)
+        self.total = RollingHistogram(MILLISECOND_BUCKETS)
+        self.parse = RollingHistogram(MILLISECOND_BUCKETS)
+        self.payload_size = RollingHistogram(BYTE_BUCKETS)
+        self.trams = None
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.errors = Counter()
+        self.last_error = None
+        self.last_success = None
+
+    def record_request(self, timing: LuasRequestTiming, size: int) -> None:
+        """Record a completed request, which received size bytes."""
+        timing.marks["done"] = time.monotonic()
+        for histogram, start, end in (
+            (self.dns, "dns_start", "dns_end"),
+            (self.connect, "connect_start", "connect_end"),
+            (self.response, "request_start", "response"),
+            (self.total, "start", "done"),
+        ):
+            if (duration := timing.between(start, end)) is not None:
+                histogram.add(duration)
+        self.payload_size.add(size)
+        if "connect_end" in timing.marks:
+            self.connections_created += 1
+        elif "reused" in timing.marks:
+            self.connections_reused += 1
+
+    @property
+    def reuse_ratio(self) -> float | None:
+        """Fraction of traced requests which reused a connection."""
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else None
+
+    def record_success(self) -> None:
+        """Record a fetch which produced a forecast."""
+        self.last_success = dt_util.utcnow()
+
+    def record_error(self, exception: BaseException) -> None:
+        """Record a failed attempt."""
+        name = type(exception).__name__
+        self.errors[name] += 1
+        self.last_error = name
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize the metrics, e.g. for diagnostics."""
+        return {
+            "dns_ms": self.dns.as_dict(),
+            "connect_ms": self.connect.as_dict(),
+            "response_ms": self.response.as_dict(),
+            "total_ms": self.total.as_dict(),
+            "parse_ms": self.parse.as_dict(),
+            "payload_bytes": self.payload_size.as_dict(),
+            "trams": self.trams,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "errors": dict(self.errors),
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+        }
+
+
+class LuasParseMetrics:
+    """How much parsing LuasBatchParser has moved off the event loop."""
+
+    inline: int
+    offloaded: int
+    batches: int
+    largest_batch: int
+    # Time spent parsing in the executor, which would otherwise have been spent
+    # on the event loop
+    saved_ms: float
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.inline = 0
+        self.offloaded = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.saved_ms = 0.0
+
+    def record_batch(self, durations: Sequence[float]) -> None:
+        """Record a batch parsed in the executor, taking durations ms each."""
+        self.batches += 1
+        self.offloaded += len(durations)
+        self.largest_batch = max(self.largest_batch, len(durations))
+        self.saved_ms += sum(durations)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize the metrics, e.g. for diagnostics."""
+        return {
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "saved_ms": self.saved_ms,
+        }
@@ -0,0 +1,249 @@
+"""Line-wide model of luas trams, merged from every stop's forecast."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+from .api import normalize_name
+from .const import DIRECTIONS, DISTANT_DUE_MINS, LUAS_LINES
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Mapping, Sequence
+
+    from .api import LuasInfo, Tram
+
+
+def line_stations(line: str) -> tuple[str, ...]:
+    """Get the codes of every stop on line, each once."""
+    return tuple(dict.fromkeys(chain.from_iterable(LUAS_LINES[line])))
+
+
+# Stops with more than one code, to the code used in LUAS_LINES
+_SAME_STOP = {"hin": "heu", "hct": "heu", "stx": "sts"}  # cSpell: disable-line
+
+
+def journey_direction(origin: str, target: str) -> str | None:
+    """Get the direction trams go from origin to target, if any tram does."""
+    origin, target = (_SAME_STOP.get(code, code) for code in (origin, target))
+    for routes in LUAS_LINES.values():
+        for route in routes:
+            if origin in route and target in route and origin != target:
+                return (
+                    "outbound"
+                    if route.index(origin) < route.index(target)
+                    else "inbound"
+                )
+    return None
+
+
+def reaches(origin: str, target: str, destination: str) -> bool:
+    """Whether a tram from origin to destination, all stop codes, stops at target."""
+    origin, target, destination = (
+        _SAME_STOP.get(code, code) for code in (origin, target, destination)
+    )
+    for routes in LUAS_LINES.values():
+        for route in routes:
+            if origin not in route or target not in route or destination not in route:
+                continue
+            start, via, end = map(route.index, (origin, target, destination))
+            if start < via <= end or end <= via < start:
+                return True
+    return False
+
+
+@dataclass(frozen=True, slots=True)
+class LuasTramPosition:
+    """Where a tram approximately is: between two stops, due at the second."""
+
+    direction: str
+    destination: str
+    from_stop: str
+    to_stop: str
+    due_mins: int
+
+
+@dataclass(frozen=True, slots=True)
+class LuasLineSegment:
+    """A stretch of a line, from one stop to another in the direction of travel."""
+
+    direction: str
+    from_stop: str
+    to_stop: str
+    # For gaps, the longest wait for the next tram at any of its stops
+    wait_mins: int | None = None
+    # For disruptions, the status messages of its stops
+    message: str | None = None
+
+
+@dataclass(frozen=True)
+class LuasLineModel:
+    """Approximate state of a whole line, as of its stops' latest forecasts."""
+
+    line: str
+    trams: tuple[LuasTramPosition, ...]
+    gaps: tuple[LuasLineSegment, ...]
+    disruptions: tuple[LuasLineSegment, ...]
+    # Stops without a current forecast, which the model can't account for
+    missing: tuple[str, ...]
+
+    def trams_in(self, direction: str) -> int:
+        """Count the trams on the line in direction."""
+        return sum(tram.direction == direction for tram in self.trams)
+
+    def as_dict(self, name: Callable[[str], str]) -> dict[str, Any]:
+        """Describe the model, naming stops with name."""
+        return {
+            "line": self.line,
+            "trams": {
+                direction: [
+                    {
+                        "from": name(tram.from_stop),
+                        "to": name(tram.to_stop),
+                        "destination": tram.destination,
+                        "due": tram.due_mins,
+                    }
+                    for tram in self.trams
+                    if tram.direction == direction
+                ]
+                for direction in DIRECTIONS
+            },
+            "gaps": [
+                {
+                    "direction": gap.direction,
+                    "from": name(gap.from_stop),
+                    "to": name(gap.to_stop),
+                    "wait": gap.wait_mins,
+                }
+                for gap in self.gaps
+            ],
+            "disruptions": [
+                {
+                    "direction": disruption.direction,
+                    "from": name(disruption.from_stop),
+                    "to": name(disruption.to_stop),
+                    "message": disruption.message,
+                }
+                for disruption in self.disruptions
+            ],
+            "missing": [name(stop) for stop in self.missing],
+        }
+
+
+def _trams_in(info: LuasInfo, direction: str) -> list[Tram]:
+    """Trams in direction, still sorted by due_mins."""
+    return [tram for tram in info.trams if normalize_name(tram.direction) == direction]
+
+
+def _runs(
+    stops: Sequence[str],
+    flags: Mapping[str, bool],
+) -> Iterator[list[str]]:
+    """
+    Find runs of consecutive stops whose flag is set.
+
+    Stops without a flag, e.g. those not served in the direction concerned,
+    neither join nor break a run.
+    """
+    run: list[str] = []
+    for stop in stops:
+        if stop not in flags:
+            continue
+        if flags[stop]:
+            run.append(stop)
+        elif run:
+            yield run
+            run = []
+    if run:
+        yield run
+
+
+def build_line_model(line: str, forecasts: Mapping[str, LuasInfo]) -> LuasLineModel:
+    """
+    Merge the forecasts of line's stops, by station code, into a line model.
+
+    Along each route, in the direction of travel, a tram due at a stop sooner
+    than the next tram at the stop before must have already passed that stop,
+    so it's between the two. Only stops with trams in the direction concerned
+    are compared, and a tram due at the first such stop of a route isn't
+    placed, as it may not have set off yet.
+
+    Stops where the next tram is at least DISTANT_DUE_MINS away form gaps, and
+    those whose direction isn't operating normally form disruptions.
+    """
+    # Routes share their trunk, so the same tram or segment may be found more
+    # than once; dicts keep the first of each, in order
+    trams: dict[LuasTramPosition, None] = {}
+    gaps: dict[tuple[str, str, str], LuasLineSegment] = {}
+    disruptions: dict[tuple[str, str, str], LuasLineSegment] = {}
+
+    for route in LUAS_LINES[line]:
+        for direction in DIRECTIONS:
+            stops = route if direction == "outbound" else route[::-1]
+            previous_stop: str | None = None
+            previous_due = 0
+            waits: dict[str, int] = {}
+            gap_flags: dict[str, bool] = {}
+            disruption_flags: dict[str, bool] = {}
+            for stop in stops:
+                info = forecasts.get(stop)
+                if info is None:
+                    gap_flags[stop] = disruption_flags[stop] = False
+                    continue
+                normally = {
+                    normalize_name(name): value
+                    for name, value in info.operating_normally.items()
+                }
+                if direction in normally:
+                    disruption_flags[stop] = not normally[direction]
+                due = _trams_in(info, direction)
+                if not due:
+                    continue
+                waits[stop] = due[0].due_mins
+                gap_flags[stop] = due[0].due_mins >= DISTANT_DUE_MINS
+                if previous_stop is not None:
+                    for tram in due:
+                        if tram.due_mins >= previous_due:
+                            break
+                        trams.setdefault(
+                            LuasTramPosition(
+                                direction=direction,
+                                destination=tram.destination,
+                                from_stop=previous_stop,
+                                to_stop=stop,
+                                due_mins=tram.due_mins,
+                            )
+                        )
+                previous_stop, previous_due = stop, due[0].due_mins
+
+            for run in _runs(stops, gap_flags):
+                gaps.setdefault(
+                    (direction, run[0], run[-1]),
+                    LuasLineSegment(
+                        direction=direction,
+                        from_stop=run[0],
+                        to_stop=run[-1],
+                        wait_mins=max(waits[stop] for stop in run),
+                    ),
+                )
+            for run in _runs(stops, disruption_flags):
+                disruptions.setdefault(
+                    (direction, run[0], run[-1]),
+                    LuasLineSegment(
+                        direction=direction,
+                        from_stop=run[0],
+                        to_stop=run[-1],
+                        message="; ".join(
+                            sorted({forecasts[stop].message for stop in run} - {""})
+                        ),
+                    ),
+                )
+
+    return LuasLineModel(
+        line=line,
+        trams=tuple(trams),
+        gaps=tuple(gaps.values()),
+        disruptions=tuple(disruptions.values()),
+        missing=tuple(stop for stop in line_stations(line) if stop not in forecasts),
+    )
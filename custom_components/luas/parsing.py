@@ -0,0 +1,142 @@
+"""Batched parsing of luas forecasts, off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING
+
+from .api import parse_batch, parse_timed
+from .const import LOGGER, PARSE_BATCH_DELAY, PARSE_BATCH_SIZE, PARSE_EXECUTOR_SIZE
+from .metrics import LuasParseMetrics
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from homeassistant.core import HomeAssistant
+
+    from .api import LuasInfo
+
+
+class LuasBatchParser:
+    """
+    Parse forecasts for LuasApiClients, on the event loop or in an executor.
+
+    A forecast is normally small enough to parse on the event loop. While a
+    poll of at least batch_size stops is going on, or for a payload of at least
+    payload_size bytes, payloads are queued instead. The queue is handed to an
+    executor in one job, so that the event loop waits once rather than parsing
+    them back to back, when it holds batch_size payloads, when every fetch in
+    flight (see fetching) has queued its payload or finished without one, or
+    at the latest delay seconds after the first payload was queued; a slow
+    fetch doesn't hold up the others.
+    """
+
+    batch_size: int
+    payload_size: int
+    delay: float
+    metrics: LuasParseMetrics
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        batch_size: int = PARSE_BATCH_SIZE,
+        payload_size: int = PARSE_EXECUTOR_SIZE,
+        delay: float = PARSE_BATCH_DELAY,
+    ) -> None:
+        """Initialize the parser."""
+        self._hass = hass
+        self.batch_size = batch_size
+        self.payload_size = payload_size
+        self.delay = delay
+        self.metrics = LuasParseMetrics()
+        self._large_polls = 0
+        self._fetching = 0
+        self._queue: list[tuple[bytes, asyncio.Future[tuple[LuasInfo, float]]]] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+
+    @contextlib.contextmanager
+    def polling(self, count: int) -> Iterator[None]:
+        """Parse in the executor while count stops are polled, if that's many."""
+        large = count >= self.batch_size
+        self._large_polls += large
+        try:
+            yield
+        finally:
+            self._large_polls -= large
+
+    @contextlib.contextmanager
+    def fetching(self) -> Iterator[None]:
+        """Track a fetch in flight, which may queue a payload before it ends."""
+        self._fetching += 1
+        try:
+            yield
+        finally:
+            self._fetching -= 1
+            self._maybe_flush()
+
+    async def async_parse(self, payload: bytes) -> tuple[LuasInfo, float]:
+        """Parse a forecast, and say how many milliseconds it took."""
+        if not self._large_polls and len(payload) < self.payload_size:
+            self.metrics.inline += 1
+            return parse_timed(payload)
+        future: asyncio.Future[tuple[LuasInfo, float]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._queue.append((payload, future))
+        self._maybe_flush()
+        return await future
+
+    def _maybe_flush(self) -> None:
+        """Parse the queue if it's full, or wait a little for it to fill."""
+        if not self._queue:
+            return
+        if len(self._queue) < min(self.batch_size, self._fetching):
+            if self._flush_timer is None:
+                self._flush_timer = asyncio.get_running_loop().call_later(
+                    self.delay, self._flush
+                )
+            return
+        self._flush()
+
+    def _flush(self) -> None:
+        """Parse the queue in one executor job."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._queue:
+            return
+        batch, self._queue = self._queue, []
+        self._hass.async_create_background_task(
+            self._async_parse_batch(batch), name="luas parse batch"
+        )
+
+    async def _async_parse_batch(
+        self,
+        batch: list[tuple[bytes, asyncio.Future[tuple[LuasInfo, float]]]],
+    ) -> None:
+        try:
+            results = await self._hass.async_add_executor_job(
+                parse_batch, [payload for payload, _future in batch]
+            )
+        except Exception as exception:  # noqa: BLE001 # pylint: disable=broad-except
+            # e.g. the executor has been shut down
+            for _payload, future in batch:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        durations = []
+        for (_payload, future), result in zip(batch, results, strict=True):
+            if isinstance(result, Exception):
+                if not future.done():
+                    future.set_exception(result)
+                continue
+            durations.append(result[1])
+            if not future.done():
+                future.set_result(result)
+        self.metrics.record_batch(durations)
+        LOGGER.debug(
+            "Parsed %d forecasts in the executor, in %.3fms",
+            len(batch),
+            sum(durations),
+        )
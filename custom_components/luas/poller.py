@@ -0,0 +1,218 @@
+"""Batch poller for luas stops."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    LOGGER,
+    RATE_LIMIT_BURST,
+    SWEEP_RESERVE,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from .coordinator import LuasDataUpdateCoordinator
+    from .parsing import LuasBatchParser
+
+
+@dataclass
+class LuasPollResult:
+    """Outcome of refreshing a batch of stops."""
+
+    succeeded: list[str] = field(default_factory=list)
+    failed: dict[str, Exception] = field(default_factory=dict)
+    # Due, but left for a later batch to stay within the request budget
+    deferred: list[str] = field(default_factory=list)
+    duration: float = 0.0
+
+
+class TokenBucket:
+    """Allow requests at a steady rate, with bursts of up to capacity."""
+
+    rate: float
+    capacity: float
+
+    def __init__(self, requests_per_minute: float) -> None:
+        """Initialize a full bucket."""
+        self.configure(requests_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def configure(self, requests_per_minute: float) -> None:
+        """Change the budget, keeping the tokens already available."""
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1.0, self.rate * RATE_LIMIT_BURST.total_seconds())
+
+    @property
+    def tokens(self) -> float:
+        """Requests which may be made right now."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return self._tokens
+
+    def try_acquire(self, reserve: float = 0) -> bool:
+        """Take a token if one is available, leaving at least reserve."""
+        # Tolerating rounding, so that waiting for exactly the shortfall works
+        if self.tokens < 1 + reserve - 1e-9:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def async_acquire(self, reserve: float = 0) -> None:
+        """Take a token, waiting until one is available beyond reserve."""
+        while True:
+            if self.try_acquire(reserve):
+                return
+            await asyncio.sleep((1 + reserve - self.tokens) / self.rate)
+
+
+def poll_priority(coordinator: LuasDataUpdateCoordinator) -> tuple[bool, float]:
+    """Sort key putting the stops most in need of a refresh first."""
+    age = (
+        math.inf
+        if coordinator.fetched_at is None
+        else (dt_util.utcnow() - coordinator.fetched_at).total_seconds()
+    )
+    return (not coordinator.imminent, -age)
+
+
+class LuasBatchPoller:
+    """
+    Refresh several stops concurrently.
+
+    Each stop is fetched in its own task, bounded by max_concurrency, and its
+    result is pushed into its coordinator as soon as it arrives; a slow or
+    failing stop doesn't hold back the others. A whole batch therefore takes
+    roughly as long as its slowest request rather than the sum of all of them.
+
+    Requests across all batches are limited by a TokenBucket. When a batch
+    would exceed it, stops are refreshed in poll_priority order, and the rest
+    are deferred; they are still due, so they are retried on the next batch.
+    A sweep, on the other hand, waits for the budget to refresh every stop, but
+    only takes tokens beyond a reserve (see SWEEP_RESERVE), which is left for
+    batches.
+
+    If the clients share parser, it's told how many stops are being refreshed,
+    so that a large batch can be parsed off the event loop.
+    """
+
+    bucket: TokenBucket
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        parser: LuasBatchParser | None = None,
+    ) -> None:
+        """Initialize the poller."""
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(requests_per_minute)
+        self.parser = parser
+
+    def _polling(self, count: int) -> contextlib.AbstractContextManager[None]:
+        if self.parser is None:
+            return contextlib.nullcontext()
+        return self.parser.polling(count)
+
+    async def async_poll(
+        self,
+        coordinators: Iterable[LuasDataUpdateCoordinator],
+    ) -> LuasPollResult:
+        """Refresh the coordinators in coordinators which the budget allows."""
+        result = LuasPollResult()
+        start = time.monotonic()
+        selected = []
+        for coordinator in sorted(coordinators, key=poll_priority):
+            if self.bucket.try_acquire():
+                selected.append(coordinator)
+            else:
+                result.deferred.append(coordinator.station)
+        with self._polling(len(selected)):
+            await asyncio.gather(
+                *(self._async_poll_one(coordinator, result) for coordinator in selected)
+            )
+        result.duration = time.monotonic() - start
+        LOGGER.debug(
+            "Polled %d stops in %.3fs, failed: %s, deferred: %s",
+            len(result.succeeded) + len(result.failed),
+            result.duration,
+            list(result.failed),
+            result.deferred,
+        )
+        return result
+
+    async def async_sweep(
+        self,
+        coordinators: Iterable[LuasDataUpdateCoordinator],
+        *,
+        fresh: Callable[[LuasDataUpdateCoordinator], bool] | None = None,
+        wait: bool = True,
+    ) -> LuasPollResult:
+        """
+        Refresh all of coordinators, in order, as the budget allows.
+
+        Each request starts as soon as a token is available, so a sweep of more
+        stops than the bucket holds is spread out at the budget's rate, while
+        the requests themselves still overlap. Stops which are fresh enough by
+        the time their turn comes are skipped. Without wait, stops for which
+        there's no token straight away are deferred instead.
+        """
+        result = LuasPollResult()
+        start = time.monotonic()
+        coordinators = list(coordinators)
+        reserve = (self.bucket.capacity - 1) * SWEEP_RESERVE
+        tasks = []
+        with self._polling(len(coordinators)):
+            for coordinator in coordinators:
+                if fresh is not None and fresh(coordinator):
+                    continue
+                if wait:
+                    await self.bucket.async_acquire(reserve)
+                elif not self.bucket.try_acquire(reserve):
+                    result.deferred.append(coordinator.station)
+                    continue
+                tasks.append(
+                    asyncio.create_task(self._async_poll_one(coordinator, result))
+                )
+            await asyncio.gather(*tasks)
+        result.duration = time.monotonic() - start
+        LOGGER.debug(
+            "Swept %d stops in %.3fs, failed: %s, deferred: %s",
+            len(tasks),
+            result.duration,
+            list(result.failed),
+            result.deferred,
+        )
+        return result
+
+    async def _async_poll_one(
+        self,
+        coordinator: LuasDataUpdateCoordinator,
+        result: LuasPollResult,
+    ) -> None:
+        coordinator.polling = True
+        try:
+            async with self._semaphore:
+                data = await coordinator.client.async_get_data()
+        except Exception as exception:  # noqa: BLE001 # pylint: disable=broad-except
+            result.failed[coordinator.station] = exception
+            coordinator.async_set_poll_error(exception)
+        else:
+            result.succeeded.append(coordinator.station)
+            coordinator.async_set_polled_data(data)
+        finally:
+            coordinator.polling = False
@@ -0,0 +1,119 @@
+"""Retry and circuit breaking for calls to the Luas API."""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times, and how far apart, to attempt a request."""
+
+    attempts: int = RETRY_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+
+    def delays(self, rng: random.Random | None = None) -> Iterator[float]:
+        """
+        Yield the delay before each retry, in seconds.
+
+        Delays use decorrelated jitter: each is random, between base_delay and
+        three times the previous one, so that clients which failed together
+        don't retry together.
+        https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        """
+        rng = rng or random.Random()  # noqa: S311
+        delay = self.base_delay
+        for _ in range(self.attempts - 1):
+            delay = min(self.max_delay, rng.uniform(self.base_delay, delay * 3))
+            yield delay
+
+
+class BreakerState(StrEnum):
+    """State of a CircuitBreaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing API for a while.
+
+    After failure_threshold consecutive failures the breaker opens, and calls
+    are refused without trying until reset_timeout has passed. Then a single
+    probe is let through (half open): if it succeeds the breaker closes again,
+    otherwise it reopens for another reset_timeout.
+    """
+
+    failure_threshold: int
+    reset_timeout: float
+    state: BreakerState
+    failures: int
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._changed_at = time.monotonic()
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener whenever the state changes; returns a remover."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        if self.state is BreakerState.CLOSED:
+            return True
+        if time.monotonic() - self._changed_at < self.reset_timeout:
+            return False
+        # Also lets another probe through if the last one never reported back
+        self._set_state(BreakerState.HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self.failures = 0
+        if self.state is not BreakerState.CLOSED:
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        self.failures += 1
+        if (
+            self.state is BreakerState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState) -> None:
+        changed = state is not self.state
+        self.state = state
+        self._changed_at = time.monotonic()
+        if changed:
+            for listener in list(self._listeners):
+                listener()
@@ -2,21 +2,50 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
-from homeassistant.const import UnitOfTime
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 
-from .const import LOGGER
-from .entity import LuasEntity
+from .api import LuasSnapshot
+from .const import CONF_LIVE_ONLY, CONF_STATE_THRESHOLD, DIRECTIONS
+from .data import LuasJourneyData, LuasLineData
+from .entity import LuasEntity, LuasJourneyEntity, LuasLineEntity
+from .hub import async_get_hub
+from .resilience import BreakerState
+from .stations import async_get_station_index
+from .throttle import LuasStateThrottle
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
+    from homeassistant.helpers.typing import StateType
 
-    from .api import Tram
-    from .coordinator import LuasDataUpdateCoordinator
+    from .api import LuasApiClient, SnapshotKey, Tram
+    from .coordinator import LuasDataUpdateCoordinator, LuasLineCoordinator
     from .data import LuasConfigEntry, LuasData
+    from .journey import LuasJourneyLeg
+    from .resilience import CircuitBreaker
+    from .stations import LuasStationIndex
+    from .stats import LuasDirectionStats
 
 
 ENTITY_DESCRIPTIONS = (
@@ -33,12 +62,166 @@ ENTITY_DESCRIPTIONS = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class LuasDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor showing how fetching a stop's forecasts is going."""
+
+    value_fn: Callable[[LuasApiClient], StateType | datetime]
+    attributes_fn: Callable[[LuasApiClient], dict[str, Any]] = lambda _client: {}
+
+
+# Disabled by default, as they're mostly of interest when troubleshooting
+DIAGNOSTIC_ENTITY_DESCRIPTIONS = (
+    LuasDiagnosticSensorEntityDescription(
+        key="fetch_time",
+        name="Fetch time",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda client: client.metrics.total.percentile(0.5),
+        attributes_fn=lambda client: {
+            "p90": client.metrics.total.percentile(0.9),
+            "p99": client.metrics.total.percentile(0.99),
+            "dns": client.metrics.dns.percentile(0.5),
+            "connect": client.metrics.connect.percentile(0.5),
+            "response": client.metrics.response.percentile(0.5),
+        },
+    ),
+    LuasDiagnosticSensorEntityDescription(
+        key="parse_time",
+        name="Parse time",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda client: client.metrics.parse.percentile(0.5),
+        attributes_fn=lambda client: {
+            "p90": client.metrics.parse.percentile(0.9),
+            "trams": client.metrics.trams,
+        },
+    ),
+    LuasDiagnosticSensorEntityDescription(
+        key="payload_size",
+        name="Payload size",
+        icon="mdi:download-network-outline",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda client: client.metrics.payload_size.last,
+    ),
+    LuasDiagnosticSensorEntityDescription(
+        key="unchanged_ratio",
+        name="Unchanged forecasts",
+        icon="mdi:cached",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda client: client.stats.unchanged_ratio * 100,
+        attributes_fn=lambda client: {
+            "fetches": client.stats.fetches,
+            "unchanged": client.stats.unchanged,
+            "coalesced": client.stats.coalesced,
+        },
+    ),
+    LuasDiagnosticSensorEntityDescription(
+        key="connection_reuse",
+        name="Connection reuse",
+        icon="mdi:connection",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda client: (
+            client.metrics.reuse_ratio * 100
+            if client.metrics.reuse_ratio is not None
+            else None
+        ),
+        attributes_fn=lambda client: {
+            "created": client.metrics.connections_created,
+            "reused": client.metrics.connections_reused,
+        },
+    ),
+    LuasDiagnosticSensorEntityDescription(
+        key="last_success",
+        name="Last successful fetch",
+        icon="mdi:clock-check-outline",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda client: client.metrics.last_success,
+        attributes_fn=lambda client: {
+            "last_error": client.metrics.last_error,
+            "errors": dict(client.metrics.errors),
+        },
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class LuasStatsSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor showing how trams in a direction have been running."""
+
+    value_fn: Callable[[LuasDirectionStats], StateType]
+    attributes_fn: Callable[[LuasDirectionStats], dict[str, Any]]
+
+
+STATS_ENTITY_DESCRIPTIONS = (
+    LuasStatsSensorEntityDescription(
+        key="average_wait",
+        name="Average wait",
+        icon="mdi:timer-sand",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda stats: stats.average_wait,
+        attributes_fn=lambda stats: {
+            "mean_headway": stats.headway.mean,
+            "headway_stddev": stats.headway.stddev,
+            "bunching": stats.bunching.ratio,
+            "arrivals": stats.headway.count,
+        },
+    ),
+    LuasStatsSensorEntityDescription(
+        key="reliability",
+        name="Forecast reliability",
+        icon="mdi:bullseye-arrow",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda stats: (
+            stats.reliability.ratio * 100
+            if stats.reliability.ratio is not None
+            else None
+        ),
+        attributes_fn=lambda stats: {
+            "mean_error": stats.error.mean,
+            "error_stddev": stats.error.stddev,
+            "forecasts": stats.error.count,
+        },
+    ),
+)
+
+
 async def async_setup_entry(
-    _hass: HomeAssistant,
+    hass: HomeAssistant,
     entry: LuasConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
+    if isinstance(entry.runtime_data, LuasLineData):
+        async_add_entities(
+            [
+                LuasLineSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    data=entry.runtime_data,
+                    stations=await async_get_station_index(hass),
+                )
+            ]
+        )
+        return
+    if isinstance(entry.runtime_data, LuasJourneyData):
+        async_add_entities([LuasJourneySensor(data=entry.runtime_data)])
+        return
+
     async_add_entities(
         [
             LuasMessageSensor(
@@ -47,13 +230,56 @@ async def async_setup_entry(
             )
         ]
     )
+    data = entry.runtime_data
+    tram_sensor: Callable[..., LuasTramSensor] = LuasTramSensor
+    if entry.options.get(CONF_LIVE_ONLY, False):
+        tram_sensor = LuasLiveTramSensor
+    elif entry.options.get(CONF_STATE_THRESHOLD, 0) > 0:
+        tram_sensor = partial(
+            LuasCoarseTramSensor,
+            state_threshold=int(entry.options[CONF_STATE_THRESHOLD]),
+        )
     async_add_entities(
-        LuasTramSensor(
+        tram_sensor(
+            coordinator=data.coordinator,
+            data=data,
+            direction=direction,
+            destination=destination,
+            translated_destination=translated_destination,
+        )
+        for direction in data.directions
+        for destination, translated_destination in (
+            zip(data.destinations, data.translated_destinations, strict=True)
+            if data.destinations
+            else [(None, None)]
+        )
+    )
+    async_add_entities(
+        [
+            LuasBreakerSensor(
+                coordinator=entry.runtime_data.coordinator,
+                data=entry.runtime_data,
+                breaker=async_get_hub(hass).breaker,
+            )
+        ]
+    )
+    async_add_entities(
+        LuasDiagnosticSensor(
+            coordinator=entry.runtime_data.coordinator,
+            data=entry.runtime_data,
+            entity_description=entity_description,
+        )
+        for entity_description in DIAGNOSTIC_ENTITY_DESCRIPTIONS
+    )
+    async_add_entities(
+        LuasStatsSensor(
             coordinator=entry.runtime_data.coordinator,
             data=entry.runtime_data,
             direction=direction,
+            entity_description=entity_description,
         )
-        for direction in ["inbound", "outbound"]
+        for direction in data.directions
+        for entity_description in STATS_ENTITY_DESCRIPTIONS
     )
 
 
@@ -76,71 +302,453 @@ class LuasMessageSensor(LuasEntity, SensorEntity):
     @property
     def native_value(self) -> str | None:
         """Native value for the sensor is the Luas station message."""
-        return self.coordinator.data.get("message")
+        return self.coordinator.data.info.message
+
+    @property
+    def extra_state_attributes(self) -> dict[str, bool]:
+        """Return the state attributes."""
+        return {"stale": self.coordinator.stale}
+
+
+class LuasBreakerSensor(LuasEntity, SensorEntity):
+    """Sensor for showing whether requests to the Luas API are being held off."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:electric-switch"
+    _attr_name = "API circuit breaker"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: LuasDataUpdateCoordinator,
+        data: LuasData,
+        breaker: CircuitBreaker,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, data=data)
+        self._breaker = breaker
+        self._attr_unique_id = f"{self.device_id}_circuit_breaker"
+        self._attr_options = list(BreakerState)
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the breaker's state when added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._breaker.add_listener(self.async_write_ha_state))
+
+    @property
+    def available(self) -> bool:
+        """The breaker's state is known even when the forecast isn't."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Native value for the sensor is the breaker's state."""
+        return self._breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int]:
+        """Return the state attributes."""
+        return {"consecutive_failures": self._breaker.failures}
+
+
+class LuasDiagnosticSensor(LuasEntity, SensorEntity):
+    """Sensor for showing how fetching the stop's forecasts is going."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    entity_description: LuasDiagnosticSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: LuasDataUpdateCoordinator,
+        data: LuasData,
+        entity_description: LuasDiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, data=data)
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{self.device_id}_{entity_description.key}"
+
+    @property
+    def available(self) -> bool:
+        """Fetches can be described even when they're failing."""
+        return True
+
+    @property
+    def native_value(self) -> StateType | datetime:
+        """Return the state."""
+        return self.entity_description.value_fn(self.coordinator.client)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return self.entity_description.attributes_fn(self.coordinator.client)
+
+
+class LuasStatsSensor(LuasEntity, SensorEntity):
+    """
+    Sensor for showing how trams in a direction have been running at the stop.
+
+    Statistics cover every tram in the direction, whatever its destination.
+    """
+
+    _attr_has_entity_name = True
+
+    direction: str
+    entity_description: LuasStatsSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: LuasDataUpdateCoordinator,
+        data: LuasData,
+        direction: str,
+        entity_description: LuasStatsSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, data=data)
+        self.direction = direction
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{self.device_id}_{entity_description.key}_{direction}"
+
+    @property
+    def name(self) -> str:
+        """Name for the statistic in this direction."""
+        return f"{self.entity_description.name} {self.direction}"
+
+    @property
+    def _stats(self) -> LuasDirectionStats:
+        return self.coordinator.stats.direction(self.direction)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state."""
+        return self.entity_description.value_fn(self._stats)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return self.entity_description.attributes_fn(self._stats)
+
+
+class LuasLineSensor(LuasLineEntity, SensorEntity):
+    """
+    Sensor summarising a whole line.
+
+    Its state is the number of trams on the line, and its attributes count
+    them in each direction and list where service is disrupted; the full model
+    is available from the get_line service.
+    """
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:transit-connection-variant"
+    _attr_name = "Trams"
+    _attr_native_unit_of_measurement = "trams"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: LuasLineCoordinator,
+        data: LuasLineData,
+        stations: LuasStationIndex,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, data=data)
+        self._stations = stations
+        self._attr_unique_id = f"{self.device_id}_trams"
+
+    @property
+    def native_value(self) -> int:
+        """Number of trams on the line."""
+        return len(self.coordinator.data.trams)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        model = self.coordinator.data
+        name = self._stations.name
+        return {
+            **{direction: model.trams_in(direction) for direction in DIRECTIONS},
+            "gaps": len(model.gaps),
+            "disruptions": [
+                f"{name(segment.from_stop)} - {name(segment.to_stop)}"
+                f" ({segment.direction})"
+                for segment in model.disruptions
+            ],
+            "missing_stops": len(model.missing),
+        }
+
+
+class LuasJourneySensor(LuasJourneyEntity, SensorEntity):
+    """
+    Sensor for when the next tram from the origin reaches the target.
+
+    Its state is the minutes until then, and its attributes say when that
+    tram leaves, and when the ones after it arrive.
+    """
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:map-marker-path"
+    _attr_name = "Next arrival"
+    _attr_native_unit_of_measurement = UnitOfTime.MINUTES
+    _unrecorded_attributes = frozenset({"departs", "later", "stale"})
+
+    _legs: tuple[LuasJourneyLeg, ...] = ()
+
+    def __init__(self, data: LuasJourneyData) -> None:
+        """Initialize the sensor class."""
+        super().__init__(data)
+        self._attr_unique_id = f"{self.device_id}_next_arrival"
+        self._update_legs()
+
+    def _update_legs(self) -> None:
+        origin, target = self.coordinator.data, self.target_coordinator.data
+        if origin is not None and target is not None:
+            self._legs = self.data.journey.update(
+                origin.info,
+                target.info,
+                origin_elapsed=self.coordinator.elapsed_minutes(),
+                target_elapsed=self.target_coordinator.elapsed_minutes(),
+            )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Estimate the journeys again, when either stop's forecast changes."""
+        self._update_legs()
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> int | None:
+        """Minutes until the next tram from the origin reaches the target."""
+        return self._legs[0].arrives_mins if self._legs else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        next_leg = self._legs[0] if self._legs else None
+        return {
+            "departs": next_leg.departs_mins if next_leg else None,
+            "destination": next_leg.destination if next_leg else None,
+            "forecast": next_leg.forecast if next_leg else None,
+            "later": [leg.arrives_mins for leg in self._legs[1:]],
+            "travel_time": self.data.journey.travel_mins,
+            "stale": self.coordinator.stale or self.target_coordinator.stale,
+        }
 
 
 class LuasTramSensor(LuasEntity, SensorEntity):
-    """Sensor for showing Luas trams."""
+    """
+    Sensor for showing Luas trams.
+
+    Between polls, due minutes count down locally once a minute, based on when
+    the server created the forecast.
+    """
 
     _attr_icon = "mdi:tram"
     _attr_has_entity_name = True
     _attr_native_unit_of_measurement = UnitOfTime.MINUTES
+    # These change every minute, and there's little use for their history
+    _unrecorded_attributes = frozenset({"next_due", "next_destination", "stale"})
 
     direction: str
+    translated_destination: str | None
+    _snapshot_key: SnapshotKey
+    _unsub_countdown: Callable[[], None] | None = None
 
     def __init__(
         self,
         coordinator: LuasDataUpdateCoordinator,
         data: LuasData,
         direction: str,
+        destination: str | None = None,
+        translated_destination: str | None = None,
     ) -> None:
-        """Initialize the sensor class."""
+        """Initialize the sensor class, for trams to destination, or anywhere."""
         super().__init__(coordinator, data=data)
         self.direction = direction
+        self.translated_destination = translated_destination
         self._attr_unique_id = f"{self.device_id}_tram_{direction}"
+        if len(data.destinations) > 1:
+            # With a single destination, it's already in the device ID
+            self._attr_unique_id += f"_{destination}"
+        self._snapshot_key = LuasSnapshot.key(direction, translated_destination)
 
     @property
     def name(self) -> str:
         """Name for Luas trams sensor."""
+        if len(self.data.destinations) > 1:
+            return f"Next tram {self.direction} to {self.translated_destination}"
         return f"Next tram {self.direction}"
 
-    def _trams_in_direction(self) -> list[Tram]:
-        all_trams = self.coordinator.data.get("trams", [])
-        result = [
-            tram
-            for tram in all_trams
-            if tram["direction"].upper() == self.direction.upper()
-            and (
-                self.data.translated_destination is None
-                or self.data.translated_destination.upper()
-                == tram["destination"].upper()
+    def _trams_in_direction(self) -> tuple[Tram, ...]:
+        return self.coordinator.data.trams(self._snapshot_key)
+
+    def _due_mins(self, tram: Tram) -> int:
+        return max(0, tram.due_mins - self.coordinator.elapsed_minutes())
+
+    async def async_added_to_hass(self) -> None:
+        """Start counting down when added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_countdown)
+        self._async_schedule_countdown()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._async_write_state()
+        self._async_schedule_countdown()
+
+    @callback
+    def _async_write_state(self) -> None:
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_countdown(self) -> None:
+        if self._unsub_countdown is not None:
+            self._unsub_countdown()
+            self._unsub_countdown = None
+
+    @callback
+    def _async_schedule_countdown(self) -> None:
+        self._async_cancel_countdown()
+        if not self._trams_in_direction():
+            return
+        next_countdown = self.coordinator.next_countdown()
+        if next_countdown is not None:
+            self._unsub_countdown = async_track_point_in_utc_time(
+                self.hass, self._async_countdown, next_countdown
             )
-        ]
-        LOGGER.debug(
-            "%r: All trams: %r\ndirection=%r, destination=%r\nFiltered trams:%r",
-            self._attr_unique_id,
-            all_trams,
-            self.direction,
-            self.data.translated_destination,
-            result,
-        )
 
-        return result
+    @callback
+    def _async_countdown(self, _now: datetime) -> None:
+        self._unsub_countdown = None
+        self._async_write_state()
+        self._async_schedule_countdown()
+
+    def _latest_value(self) -> int | None:
+        trams = self._trams_in_direction()
+        if len(trams) == 0:
+            return None
+        return self._due_mins(trams[0])
+
+    def _latest_attributes(self) -> dict[str, str | int | bool | None]:
+        trams = self._trams_in_direction()
+        return {
+            "destination": trams[0].destination if len(trams) > 0 else None,
+            "next_due": self._due_mins(trams[1]) if len(trams) > 1 else None,
+            "next_destination": trams[1].destination if len(trams) > 1 else None,
+            "stale": self.coordinator.stale,
+        }
 
     @property
     def native_value(self) -> int | None:
         """Native value for the sensor is due minutes for next tram."""
-        trams = self._trams_in_direction()
-        if len(trams) == 0:
+        return self._latest_value()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, str | int | bool | None]:
+        """Return the state attributes."""
+        return self._latest_attributes()
+
+
+class LuasCoarseTramSensor(LuasTramSensor):
+    """
+    Sensor for showing Luas trams, with fewer state changes.
+
+    The state, and its attributes, only follow the forecast when the due
+    minutes have changed by at least a threshold, or a tram becomes due.
+    """
+
+    _throttle: LuasStateThrottle
+    _written_available: bool | None = None
+
+    def __init__(  # noqa: PLR0913
+        self,
+        coordinator: LuasDataUpdateCoordinator,
+        data: LuasData,
+        direction: str,
+        destination: str | None = None,
+        translated_destination: str | None = None,
+        *,
+        state_threshold: int,
+    ) -> None:
+        """Initialize the sensor class, publishing changes of state_threshold."""
+        super().__init__(
+            coordinator, data, direction, destination, translated_destination
+        )
+        self._throttle = LuasStateThrottle(state_threshold)
+
+    async def async_added_to_hass(self) -> None:
+        """Take the current state, before it's first written."""
+        await super().async_added_to_hass()
+        self._written_available = self.available
+        if self._written_available:
+            self._throttle.update(self._latest_value(), self._latest_attributes())
+
+    @callback
+    def _async_write_state(self) -> None:
+        available = self.available
+        published = available and self._throttle.update(
+            self._latest_value(), self._latest_attributes()
+        )
+        if published or available != self._written_available:
+            self._written_available = available
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> int | None:
+        """Due minutes for the next tram, as last published."""
+        return self._throttle.value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, str | int | bool | None]:
+        """Return the state attributes, as last published."""
+        return dict(self._throttle.attributes)
+
+
+class LuasLiveTramSensor(LuasTramSensor):
+    """
+    Sensor for showing when Luas trams arrive.
+
+    Arrival times don't count down, so the state only changes with the
+    forecast, and none of the attributes are recorded.
+    """
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_native_unit_of_measurement = None
+    # Home Assistant doesn't add those of the parent class
+    _unrecorded_attributes = frozenset(
+        {"destination", "next_arrival", "next_destination", "stale"}
+    )
+
+    def _arrival(self, tram: Tram) -> datetime | None:
+        created = self.coordinator.forecast_created()
+        if created is None:
             return None
-        return trams[0]["dueMins"]
+        # To the minute, like due times, so that it's steady from poll to poll
+        return (created + timedelta(minutes=tram.due_mins)).replace(
+            second=0, microsecond=0
+        )
+
+    @callback
+    def _async_schedule_countdown(self) -> None:
+        """Arrival times don't need counting down."""
+
+    @property
+    def native_value(self) -> datetime | None:
+        """When the next tram arrives."""
+        trams = self._trams_in_direction()
+        return self._arrival(trams[0]) if len(trams) > 0 else None
 
     @property
-    def extra_state_attributes(self) -> dict[str, str | int | None]:
+    def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         trams = self._trams_in_direction()
         return {
-            "destination": trams[0]["destination"] if len(trams) > 0 else None,
-            "next_due": trams[1]["dueMins"] if len(trams) > 1 else None,
-            "next_destination": trams[1]["destination"] if len(trams) > 1 else None,
+            "destination": trams[0].destination if len(trams) > 0 else None,
+            "next_arrival": self._arrival(trams[1]) if len(trams) > 1 else None,
+            "next_destination": trams[1].destination if len(trams) > 1 else None,
+            "stale": self.coordinator.stale,
         }
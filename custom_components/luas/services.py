@@ -0,0 +1,109 @@
+"""Services for luas."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from homeassistant.core import ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_LINE,
+    CONF_STATION,
+    DIRECTIONS,
+    DOMAIN,
+    LUAS_LINES,
+    LUAS_STATIONS,
+)
+from .hub import async_get_hub
+from .stations import async_get_station_index
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_GET_LINE = "get_line"
+
+ATTR_DIRECTION = "direction"
+ATTR_SINCE = "since"
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_STATION): vol.In(LUAS_STATIONS),
+        vol.Optional(ATTR_DIRECTION): vol.In(DIRECTIONS),
+        vol.Optional(ATTR_SINCE): cv.datetime,
+    }
+)
+
+GET_LINE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_LINE): vol.In(list(LUAS_LINES)),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_get_history(call: ServiceCall) -> ServiceResponse:
+        """Get how the next tram at a stop changed over time."""
+        station = call.data[CONF_STATION]
+        stations = await async_get_station_index(hass)
+        history = async_get_hub(hass).history
+        since = call.data.get(ATTR_SINCE)
+        if since is not None:
+            since = dt_util.as_utc(since)
+        return {
+            "station": stations.name(station),
+            "directions": {
+                direction: [
+                    {
+                        "time": time.isoformat(),
+                        "due": due,
+                        "destination": stations.name(code) if code else None,
+                    }
+                    for time, due, code in (
+                        history.query(station, direction, since) if history else []
+                    )
+                ]
+                for direction in (
+                    [call.data[ATTR_DIRECTION]]
+                    if ATTR_DIRECTION in call.data
+                    else DIRECTIONS
+                )
+            },
+        }
+
+    async def async_get_line(call: ServiceCall) -> ServiceResponse:
+        """Get the latest model of a line."""
+        line = call.data[CONF_LINE]
+        coordinator = async_get_hub(hass).lines.get(line)
+        if coordinator is None or coordinator.data is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="line_not_configured",
+                translation_placeholders={"line": line},
+            )
+        stations = await async_get_station_index(hass)
+        return {
+            **coordinator.data.as_dict(stations.name),
+            "last_update_success": coordinator.last_update_success,
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        async_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_LINE,
+        async_get_line,
+        schema=GET_LINE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,38 @@
+"""HTTP session for fetching from the Luas API."""
+
+from __future__ import annotations
+
+import aiohttp
+from homeassistant.const import APPLICATION_NAME
+from homeassistant.const import __version__ as HA_VERSION  # noqa: N812
+from homeassistant.util import ssl as ssl_util
+
+from .api import DEFAULT_TIMEOUT
+from .const import CONNECTION_POOL_SIZE, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT
+from .metrics import make_trace_config
+
+USER_AGENT = f"{APPLICATION_NAME}/{HA_VERSION} aiohttp/{aiohttp.__version__}"
+
+
+def create_session(
+    timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """
+    Create a session tuned for polling the Luas API, traced for metrics.
+
+    Home Assistant's shared session is tuned for many hosts, while this one
+    keeps a small pool of connections to the one host the API lives on open
+    between polls. The caller owns the session, and must close it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=CONNECTION_POOL_SIZE,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=ssl_util.get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={aiohttp.hdrs.USER_AGENT: USER_AGENT},
+        timeout=timeout,
+        trace_configs=[make_trace_config()],
+    )
@@ -0,0 +1,106 @@
+"""Station name index for luas."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+from homeassistant.helpers import translation
+
+from .api import normalize_name
+from .const import DOMAIN, LUAS_STATIONS
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from homeassistant.core import HomeAssistant
+
+# The API always names destinations in English
+API_LANGUAGE = "en"
+
+_TRANSLATION_KEY = f"component.{DOMAIN}.selector.station.options.{{}}"
+
+
+@dataclass(frozen=True)
+class LuasStationIndex:
+    """Lookups between station codes and names, in one language."""
+
+    language: str
+    # Station code to display name
+    names: Mapping[str, str]
+    # Display name to station code
+    codes: Mapping[str, str]
+    # Normalized name, as displayed or as named by the API, to station code
+    destinations: Mapping[str, str]
+
+    @classmethod
+    def build(
+        cls,
+        language: str,
+        translations: Mapping[str, str],
+        api_translations: Mapping[str, str],
+    ) -> LuasStationIndex:
+        """Build an index from the station selector's translations."""
+        names: dict[str, str] = {}
+        codes: dict[str, str] = {}
+        destinations: dict[str, str] = {}
+        for code in LUAS_STATIONS:
+            key = _TRANSLATION_KEY.format(code)
+            name = translations.get(key, code)
+            names[code] = name
+            # Some names are shared, e.g. St. Stephen's Green; the first wins
+            codes.setdefault(name, code)
+            destinations.setdefault(normalize_name(name), code)
+            destinations.setdefault(
+                normalize_name(api_translations.get(key, code)), code
+            )
+        return cls(
+            language=language,
+            names=MappingProxyType(names),
+            codes=MappingProxyType(codes),
+            destinations=MappingProxyType(destinations),
+        )
+
+    def name(self, code: str) -> str:
+        """Get the display name of the station with the given code."""
+        return self.names.get(code, code)
+
+    def destination_code(self, destination: str) -> str | None:
+        """Get the code of a station, as named in the API, if it's known."""
+        return self.destinations.get(normalize_name(destination))
+
+
+# Built once per process, and rebuilt only if the language changes
+_index: dict[str, LuasStationIndex] = {}
+_index_lock = asyncio.Lock()
+
+
+async def async_get_station_index(hass: HomeAssistant) -> LuasStationIndex:
+    """Get the station index for hass's current language."""
+    language = hass.config.language
+    if (index := _index.get(language)) is not None:
+        return index
+
+    async with _index_lock:
+        if (index := _index.get(language)) is not None:
+            return index
+
+        # Possibly this can be worked around using translation_key and
+        # placeholders, but I couldn't figure out a way to do it. Relevant
+        # documentation: https://developers.home-assistant.io/docs/internationalization/core
+        translations = await translation.async_get_translations(
+            hass, language, "selector", {DOMAIN}
+        )
+        api_translations = (
+            translations
+            if language == API_LANGUAGE
+            else await translation.async_get_translations(
+                hass, API_LANGUAGE, "selector", {DOMAIN}
+            )
+        )
+        index = LuasStationIndex.build(language, translations, api_translations)
+        _index.clear()
+        _index[language] = index
+        return index
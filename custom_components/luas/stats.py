@@ -0,0 +1,226 @@
+"""Streaming headway and forecast reliability statistics for luas."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .api import normalize_name
+from .const import (
+    ARRIVAL_DUE_MINS,
+    BUNCHING_FACTOR,
+    IMMINENT_DUE_MINS,
+    MAX_TRACKING_GAP,
+    RELIABILITY_TOLERANCE_MINS,
+    STATS_HALF_LIFE,
+    TRAM_MATCH_TOLERANCE_MINS,
+)
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from .api import LuasSnapshot, Tram
+
+# Weight of each new sample in exponentially weighted statistics, such that a
+# sample's weight halves every STATS_HALF_LIFE samples
+_ALPHA = 1 - 0.5 ** (1 / STATS_HALF_LIFE)
+
+
+@dataclass(slots=True)
+class ExponentialStats:
+    """Exponentially weighted running mean and variance."""
+
+    mean: float | None = None
+    variance: float = 0.0
+    count: int = 0
+
+    def add(self, value: float) -> None:
+        """Add a sample, in O(1)."""
+        self.count += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        # Until there are enough samples for decay, an ordinary average, so
+        # that the first few samples don't dominate
+        weight = max(_ALPHA, 1 / self.count)
+        diff = value - self.mean
+        increment = weight * diff
+        self.mean += increment
+        self.variance = (1 - weight) * (self.variance + diff * increment)
+
+    @property
+    def stddev(self) -> float | None:
+        """Exponentially weighted standard deviation."""
+        return math.sqrt(self.variance) if self.mean is not None else None
+
+
+@dataclass(slots=True)
+class DecayedRatio:
+    """The exponentially weighted fraction of events which were hits."""
+
+    hits: float = 0.0
+    total: float = 0.0
+
+    def add(self, *, hit: bool) -> None:
+        """Count an event, in O(1)."""
+        self.hits = self.hits * (1 - _ALPHA) + hit
+        self.total = self.total * (1 - _ALPHA) + 1
+
+    @property
+    def ratio(self) -> float | None:
+        """Fraction of recent events which were hits."""
+        return self.hits / self.total if self.total else None
+
+
+@dataclass(slots=True)
+class _TrackedTram:
+    """A tram followed across forecasts, as far as they can be matched."""
+
+    destination: str
+    first_seen: float
+    first_due: int
+    last_seen: float
+    last_due: int
+
+
+@dataclass
+class LuasDirectionStats:
+    """
+    Headway and reliability statistics for trams in one direction at a stop.
+
+    The API doesn't identify trams, so each tram in a forecast is matched to
+    one in the previous forecast with the same destination and the closest
+    due time, allowing for the time that passed. A tram which disappears when
+    it was about to arrive is taken to have arrived; otherwise its forecast
+    counts as a miss.
+    """
+
+    # Minutes between arrivals
+    headway: ExponentialStats = field(default_factory=ExponentialStats)
+    # Minutes by which trams arrived later than first forecast
+    error: ExponentialStats = field(default_factory=ExponentialStats)
+    # Forecasts which came true, within RELIABILITY_TOLERANCE_MINS
+    reliability: DecayedRatio = field(default_factory=DecayedRatio)
+    # Arrivals which came much sooner after the previous one than usual
+    bunching: DecayedRatio = field(default_factory=DecayedRatio)
+    _tracked: list[_TrackedTram] = field(default_factory=list)
+    _last_update: float | None = None
+    _last_arrival: float | None = None
+
+    @property
+    def average_wait(self) -> float | None:
+        """
+        Minutes a passenger turning up at random waits, on average.
+
+        This is E[h²] / 2E[h] for headway h, which is more than half the mean
+        headway when trams are irregular.
+        """
+        mean = self.headway.mean
+        if mean is None or mean <= 0:
+            return None
+        return (mean * mean + self.headway.variance) / (2 * mean)
+
+    def update(self, trams: tuple[Tram, ...], now: float) -> None:
+        """Update with the trams in a new forecast, made at now (in seconds)."""
+        if self._last_update is not None and now - self._last_update > (
+            MAX_TRACKING_GAP.total_seconds()
+        ):
+            # Too long since the last forecast to tell trams apart reliably
+            self.reset()
+        elapsed = 0.0 if self._last_update is None else (now - self._last_update) / 60
+        self._last_update = now
+
+        unmatched = self._tracked
+        self._tracked = []
+        for tram in trams:
+            expected = [
+                abs(candidate.last_due - elapsed - tram.due_mins)
+                if candidate.destination == tram.destination
+                else math.inf
+                for candidate in unmatched
+            ]
+            best = min(range(len(expected)), key=expected.__getitem__, default=None)
+            if best is not None and expected[best] <= TRAM_MATCH_TOLERANCE_MINS:
+                tracked = unmatched.pop(best)
+                tracked.last_seen = now
+                tracked.last_due = tram.due_mins
+            else:
+                tracked = _TrackedTram(
+                    destination=tram.destination,
+                    first_seen=now,
+                    first_due=tram.due_mins,
+                    last_seen=now,
+                    last_due=tram.due_mins,
+                )
+            self._tracked.append(tracked)
+
+        for gone in sorted(unmatched, key=lambda t: t.last_seen + t.last_due * 60):
+            self._finish(gone, now)
+
+    def reset(self) -> None:
+        """Stop following trams, e.g. when they can't be told apart."""
+        self._tracked.clear()
+        self._last_update = None
+        self._last_arrival = None
+
+    def _finish(self, tram: _TrackedTram, now: float) -> None:
+        """Account for a tram which is no longer forecast, as of now."""
+        remaining = tram.last_due - (now - tram.last_seen) / 60
+        arrived = remaining <= ARRIVAL_DUE_MINS
+        # When it was due, by its last forecast, or at the latest now
+        arrival = min(now, tram.last_seen + tram.last_due * 60)
+        if tram.first_due > IMMINENT_DUE_MINS:
+            if arrived:
+                error = (arrival - tram.first_seen) / 60 - tram.first_due
+                self.error.add(error)
+                self.reliability.add(hit=abs(error) <= RELIABILITY_TOLERANCE_MINS)
+            else:
+                self.reliability.add(hit=False)
+        if not arrived:
+            return
+
+        if self._last_arrival is not None and arrival > self._last_arrival:
+            headway = (arrival - self._last_arrival) / 60
+            mean = self.headway.mean
+            if mean is not None:
+                self.bunching.add(hit=headway < mean * BUNCHING_FACTOR)
+            self.headway.add(headway)
+        self._last_arrival = arrival
+
+
+class LuasStatsEngine:
+    """Statistics for every direction at a stop, updated with each forecast."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._directions: dict[str, LuasDirectionStats] = {}
+        self._last: LuasSnapshot | None = None
+
+    def direction(self, direction: str) -> LuasDirectionStats:
+        """Get the statistics for direction."""
+        key = normalize_name(direction)
+        stats = self._directions.get(key)
+        if stats is None:
+            stats = self._directions[key] = LuasDirectionStats()
+        return stats
+
+    def update(self, snapshot: LuasSnapshot, now: datetime) -> None:
+        """Update with a new forecast, unless it's the one seen last."""
+        if snapshot is self._last:
+            return
+        self._last = snapshot
+        seconds = now.timestamp()
+        operating_normally = {
+            normalize_name(direction): normal
+            for direction, normal in snapshot.info.operating_normally.items()
+        }
+        directions = {normalize_name(tram.direction) for tram in snapshot.info.trams}
+        # Trams in a direction which is no longer forecast at all have gone too
+        for key in directions | operating_normally.keys() | self._directions.keys():
+            stats = self.direction(key)
+            if operating_normally.get(key, True):
+                stats.update(snapshot.trams((key, None)), seconds)
+            else:
+                # Trams aren't following the timetable, so wouldn't say much
+                stats.reset()
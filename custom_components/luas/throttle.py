@@ -0,0 +1,66 @@
+"""Coarse-grained tram sensor states for luas, to spare the recorder."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Mapping
+
+# Attributes which are always worth publishing a change of
+SIGNIFICANT_ATTRIBUTES = ("destination", "stale")
+
+
+class LuasStateThrottle:
+    """
+    Decide when a tram sensor's state is worth writing.
+
+    With a threshold of 0, every change is published. Otherwise, the published
+    state (due minutes and attributes together) only follows the latest one
+    when the minutes have changed by at least threshold, when a tram becomes
+    due, when there's no longer a tram, or when a significant attribute
+    changes. Each published state is written, and recorded, once.
+    """
+
+    threshold: int
+    value: int | None
+    attributes: Mapping[str, Any]
+
+    def __init__(
+        self,
+        threshold: int = 0,
+        significant: Collection[str] = SIGNIFICANT_ATTRIBUTES,
+    ) -> None:
+        """Initialize, with nothing published yet."""
+        self.threshold = threshold
+        self._significant = significant
+        self._published = False
+        self.value = None
+        self.attributes = {}
+
+    def _worth_publishing(
+        self, value: int | None, attributes: Mapping[str, Any]
+    ) -> bool:
+        if not self._published or self.threshold <= 0:
+            return True
+        if value is None or self.value is None:
+            return value != self.value
+        if value == 0 and self.value != 0:
+            return True
+        if abs(value - self.value) >= self.threshold:
+            return True
+        return any(
+            attributes.get(key) != self.attributes.get(key) for key in self._significant
+        )
+
+    def update(self, value: int | None, attributes: Mapping[str, Any]) -> bool:
+        """Take the latest state, and say whether a new one is published."""
+        if not self._worth_publishing(value, attributes):
+            return False
+        changed = (
+            not self._published or value != self.value or attributes != self.attributes
+        )
+        self._published = True
+        self.value = value
+        self.attributes = attributes
+        return changed
@@ -0,0 +1,93 @@
+"""Tests for luas cache module."""
+
+import unittest
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from unittest import mock
+
+from custom_components.luas.api import LuasInfo, LuasSnapshot
+from custom_components.luas.cache import LuasForecastCache
+from custom_components.luas.const import CACHE_SAVE_DELAY
+
+FETCHED = datetime(2026, 10, 18, 8, 0, tzinfo=UTC)
+
+
+class _FakeStore:
+    """Postpones a pending write on every save, as Home Assistant's Store does."""
+
+    def __init__(self, *_args: object) -> None:
+        self.now = 0.0
+        self.write_at: float | None = None
+        self.writes: list[tuple[float, dict[str, Any]]] = []
+        self._data_func: Any = None
+
+    def async_delay_save(self, data_func: Any, delay: float) -> None:
+        self._data_func = data_func
+        self.write_at = self.now + delay
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        if self.write_at is not None and self.now >= self.write_at:
+            self.write_at = None
+            self.writes.append((self.now, self._data_func()))
+
+
+def _snapshot(due: int) -> LuasSnapshot:
+    return LuasSnapshot.from_info(
+        LuasInfo.from_dict(
+            {
+                "message": "",
+                "operatingNormally": {"Inbound": True},
+                "stop": "Sandyford",
+                "trams": [
+                    {"destination": "Parnell", "direction": "Inbound", "dueMins": due}
+                ],
+            }
+        ),
+        datetime(2026, 10, 18, 9, 0),  # noqa: DTZ001
+    )
+
+
+class TestLuasForecastCache(unittest.TestCase):
+    """Tests for saving cached forecasts."""
+
+    def setUp(self) -> None:
+        """Make a cache, with its store faked."""
+        patcher = mock.patch("custom_components.luas.cache.Store", _FakeStore)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = LuasForecastCache(mock.Mock())
+        self.store: _FakeStore = self.cache._store  # type: ignore[assignment] # noqa: SLF001
+
+    def test_continuous_puts(self) -> None:
+        """Forecasts put every few seconds are still written within the delay."""
+        for due in range(20, 0, -1):
+            self.cache.put("san", _snapshot(due), FETCHED)
+            self.store.advance(5)
+        assert self.store.writes
+        assert self.store.writes[0][0] <= CACHE_SAVE_DELAY
+
+    def test_unchanged(self) -> None:
+        """An unchanged forecast isn't saved, but is kept with the next write."""
+        snapshot = _snapshot(5)
+        self.cache.put("san", snapshot, FETCHED)
+        self.store.advance(CACHE_SAVE_DELAY)
+        assert len(self.store.writes) == 1
+
+        fetched = FETCHED + timedelta(seconds=10)
+        self.cache.put("san", replace(snapshot, created=None), fetched)
+        self.store.advance(CACHE_SAVE_DELAY)
+        assert len(self.store.writes) == 1
+
+        self.cache.put("ran", _snapshot(3), fetched)
+        self.store.advance(CACHE_SAVE_DELAY)
+        assert len(self.store.writes) == 2  # noqa: PLR2004
+        cached = self.cache.get("san")
+        assert cached is not None
+        assert cached[0] == snapshot
+        assert cached[1] == fetched
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Tests for luas coordinator module."""
+
+import unittest
+from datetime import timedelta
+
+from custom_components.luas.api import LuasInfo
+from custom_components.luas.coordinator import adaptive_poll_interval
+
+MIN_INTERVAL = timedelta(seconds=10)
+MAX_INTERVAL = timedelta(minutes=5)
+
+
+def _info(
+    *due_mins: int,
+    operating_normally: bool = True,
+) -> LuasInfo:
+    return LuasInfo.from_dict(
+        {
+            "message": "",
+            "operatingNormally": {"Inbound": operating_normally},
+            "stop": "Sandyford",
+            "trams": [
+                {"destination": "Parnell", "direction": "Inbound", "dueMins": due}
+                for due in due_mins
+            ],
+        }
+    )
+
+
+class TestAdaptivePollInterval(unittest.TestCase):
+    """Tests for adaptive polling interval."""
+
+    def test_imminent(self) -> None:
+        """Poll as fast as allowed when a tram is DUE or about to be."""
+        for due in (0, 1, 2):
+            assert (
+                adaptive_poll_interval(_info(due, 9), MIN_INTERVAL, MAX_INTERVAL)
+                == MIN_INTERVAL
+            )
+
+    def test_normal(self) -> None:
+        """Poll at the default interval otherwise."""
+        assert adaptive_poll_interval(
+            _info(7, 18), MIN_INTERVAL, MAX_INTERVAL
+        ) == timedelta(seconds=30)
+
+    def test_distant(self) -> None:
+        """Back off when the nearest tram is far away."""
+        assert (
+            adaptive_poll_interval(_info(15, 27), MIN_INTERVAL, MAX_INTERVAL)
+            == MAX_INTERVAL
+        )
+
+    def test_no_trams(self) -> None:
+        """Back off when there are no trams."""
+        assert adaptive_poll_interval(_info(), MIN_INTERVAL, MAX_INTERVAL) == (
+            MAX_INTERVAL
+        )
+
+    def test_not_operating_normally(self) -> None:
+        """Back off when the direction isn't operating normally."""
+        assert (
+            adaptive_poll_interval(
+                _info(1, operating_normally=False), MIN_INTERVAL, MAX_INTERVAL
+            )
+            == MAX_INTERVAL
+        )
+
+    def test_watched(self) -> None:
+        """Only the trams watched count towards how often to poll."""
+        info = LuasInfo.from_dict(
+            {
+                "message": "",
+                "operatingNormally": {"Inbound": True, "Outbound": True},
+                "stop": "Sandyford",
+                "trams": [
+                    {"destination": "Parnell", "direction": "Inbound", "dueMins": 1},
+                    {
+                        "destination": "Bride's Glen",
+                        "direction": "Outbound",
+                        "dueMins": 15,
+                    },
+                ],
+            }
+        )
+        for watched, interval in (
+            ({("outbound", "bridesglen")}, MAX_INTERVAL),
+            ({("outbound", None)}, MAX_INTERVAL),
+            ({("inbound", "bridesglen")}, MAX_INTERVAL),
+            ({("inbound", None), ("outbound", "bridesglen")}, MIN_INTERVAL),
+            (None, MIN_INTERVAL),
+        ):
+            with self.subTest(watched=watched):
+                assert (
+                    adaptive_poll_interval(info, MIN_INTERVAL, MAX_INTERVAL, watched)
+                    == interval
+                )
+
+    def test_clamped(self) -> None:
+        """The default interval is clamped to the configured range."""
+        assert adaptive_poll_interval(
+            _info(7), timedelta(minutes=1), MAX_INTERVAL
+        ) == timedelta(minutes=1)
+        assert adaptive_poll_interval(None, MIN_INTERVAL, timedelta(seconds=20)) == (
+            timedelta(seconds=20)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
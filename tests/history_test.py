@@ -0,0 +1,120 @@
+"""Tests for luas history module."""
+
+import tempfile
+import unittest
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from custom_components.luas.api import LuasInfo, LuasSnapshot
+from custom_components.luas.history import LuasHistory
+
+START = datetime(2025, 3, 17, 14, 30, tzinfo=UTC)
+
+DESTINATIONS = {"Parnell": "par", "Bride's Glen": "bri"}
+
+
+def _snapshot(inbound_due: int | None, outbound_due: int | None) -> LuasSnapshot:
+    trams = []
+    if inbound_due is not None:
+        trams.append(
+            {"destination": "Parnell", "direction": "Inbound", "dueMins": inbound_due}
+        )
+    if outbound_due is not None:
+        trams.append(
+            {
+                "destination": "See news for information",
+                "direction": "Outbound",
+                "dueMins": outbound_due,
+            }
+        )
+    return LuasSnapshot.from_info(
+        LuasInfo.from_dict(
+            {
+                "message": "",
+                "operatingNormally": {},
+                "stop": "Sandyford",
+                "trams": trams,
+            }
+        )
+    )
+
+
+class TestLuasHistory(unittest.TestCase):
+    """Tests for forecast history."""
+
+    def setUp(self) -> None:
+        """Store history in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "luas.history"
+
+    def _history(self, capacity: int = 3) -> LuasHistory:
+        return LuasHistory(self.path, capacity, DESTINATIONS.get)
+
+    def test_query(self) -> None:
+        """Samples come back oldest first, limited to capacity."""
+        history = self._history()
+        for i in range(5):
+            history.record("san", _snapshot(i, None), START + timedelta(minutes=i))
+
+        assert history.query("san", "inbound") == [
+            (START + timedelta(minutes=i), i, "par") for i in (2, 3, 4)
+        ]
+        assert history.query("san", "inbound", START + timedelta(minutes=4)) == [
+            (START + timedelta(minutes=4), 4, "par")
+        ]
+        assert history.query("san", "outbound") == [
+            (START + timedelta(minutes=i), None, None) for i in (2, 3, 4)
+        ]
+        assert history.query("leo", "inbound") == []
+
+    def test_unknown_destination(self) -> None:
+        """Destinations which aren't stations are recorded as unknown."""
+        history = self._history()
+        history.record("san", _snapshot(None, 7), START)
+        assert history.query("san", "outbound") == [(START, 7, None)]
+
+    def test_persistence(self) -> None:
+        """History survives being flushed and loaded again."""
+        history = self._history()
+        for i in range(2):
+            history.record("san", _snapshot(i, None), START + timedelta(minutes=i))
+            data, rewrite = history.take_pending()
+            assert not rewrite
+            history.write_append(data)
+
+        loaded = self._history()
+        loaded.load()
+        assert loaded.query("san", "inbound") == history.query("san", "inbound")
+
+    def test_file_is_bounded(self) -> None:
+        """The file is rewritten from the rings rather than growing forever."""
+        history = self._history(capacity=1)
+        sizes = []
+        for i in range(1000):
+            history.record("san", _snapshot(i, None), START + timedelta(minutes=i))
+            data, rewrite = history.take_pending()
+            if rewrite:
+                history.write_replace(data)
+            else:
+                history.write_append(data)
+            sizes.append(self.path.stat().st_size)
+        assert max(sizes) <= history._max_file_size  # noqa: SLF001
+        assert min(sizes[100:]) < max(sizes)
+
+        loaded = self._history(capacity=1)
+        loaded.load()
+        assert loaded.query("san", "inbound") == [
+            (START + timedelta(minutes=999), 999, "par")
+        ]
+
+    def test_unrecognized_file(self) -> None:
+        """A file which isn't history is discarded."""
+        self.path.write_bytes(b"not history")
+        history = self._history()
+        history.load()
+        assert not self.path.exists()
+
+
+if __name__ == "__main__":
+    unittest.main()
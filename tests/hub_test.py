@@ -0,0 +1,267 @@
+"""Tests for luas hub module."""
+
+import asyncio
+import tempfile
+import unittest
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+from homeassistant.exceptions import ConfigEntryNotReady
+
+from custom_components.luas.const import (
+    CONF_DESTINATIONS,
+    CONF_DIRECTIONS,
+    CONF_HISTORY,
+    CONF_LINE,
+    CONF_ORIGIN,
+)
+from custom_components.luas.hub import LuasHub
+
+
+class _FakeCoordinator:
+    """Just enough of LuasDataUpdateCoordinator for the hub."""
+
+    fails = False
+
+    def __init__(self, station: str, **_kwargs: object) -> None:
+        self.station = station
+        self.data: object | None = None
+        self.last_update_success = True
+        self.last_exception: Exception | None = None
+        self.poll_due = False
+        self.polling = False
+        self.imminent = False
+        self.fetched_at = None
+        self.client = mock.Mock(async_get_data=mock.AsyncMock())
+        self.refreshes = 0
+        self.polls = 0
+        self.shut_down = False
+
+    async def async_refresh(self) -> None:
+        self.refreshes += 1
+        self.last_update_success = not self.fails
+        if not self.fails:
+            self.data = object()
+
+    def async_set_polled_data(self, _data: object) -> None:
+        self.polls += 1
+        self.poll_due = False
+
+    def async_add_listener(self, _listener: object) -> mock.Mock:
+        return mock.Mock()
+
+    async def async_shutdown(self) -> None:
+        self.shut_down = True
+
+
+async def _executor(target: Callable[..., Any], *args: object) -> Any:
+    # Let other tasks run, as a real executor job would
+    await asyncio.sleep(0)
+    return target(*args)
+
+
+def _entry(
+    entry_id: str, options: dict[str, Any] | None = None, **data: Any
+) -> mock.Mock:
+    return mock.Mock(entry_id=entry_id, data=data, options=options or {})
+
+
+class TestLuasHub(unittest.IsolatedAsyncioTestCase):
+    """Tests for sharing stops between entries, and polling them."""
+
+    def setUp(self) -> None:
+        """Make a hub, with the API, disk and timers faked."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.hass = mock.Mock()
+        self.hass.config.path.side_effect = lambda *parts: str(
+            Path(directory.name, *parts)
+        )
+        self.hass.async_add_executor_job = mock.AsyncMock(side_effect=_executor)
+        self.session = mock.Mock(close=mock.AsyncMock())
+        self.unsub_poll = mock.Mock()
+        # Unsubscribe functions for the history flush timer and event listeners
+        self.unsubs: list[mock.Mock] = []
+        self.hass.bus.async_listen_once.side_effect = self._unsub
+        for target, kwargs in (
+            ("LuasDataUpdateCoordinator", {"side_effect": _FakeCoordinator}),
+            ("LuasLineCoordinator", {}),
+            ("LuasForecastCache", {}),
+            ("create_session", {"return_value": self.session}),
+            ("async_track_time_interval", {"side_effect": self._track_interval}),
+            ("async_get_station_index", {"new_callable": mock.AsyncMock}),
+        ):
+            patcher = mock.patch(f"custom_components.luas.hub.{target}", **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.hub = LuasHub(self.hass)
+        self.hub._cache.async_load = mock.AsyncMock()  # noqa: SLF001
+        self.hub._cache.get.return_value = None  # noqa: SLF001
+
+    def _unsub(self, *_args: object, **_kwargs: object) -> mock.Mock:
+        self.unsubs.append(mock.Mock())
+        return self.unsubs[-1]
+
+    def _track_interval(
+        self, _hass: object, *args: object, name: str, **kwargs: object
+    ) -> mock.Mock:
+        if name.endswith(" poll"):
+            return self.unsub_poll
+        return self._unsub(*args, **kwargs)
+
+    async def test_shared_stop(self) -> None:
+        """Entries for the same stop share one coordinator, refreshed once."""
+        first = await self.hub.async_acquire("san", _entry("a"))
+        second = await self.hub.async_acquire("san", _entry("b"))
+        assert first is second
+        assert first.refreshes == 1
+
+        await self.hub.async_release("san", "a")
+        assert not first.shut_down
+        self.session.close.assert_not_awaited()
+
+        await self.hub.async_release("san", "b")
+        assert first.shut_down
+        self.session.close.assert_awaited_once()
+        self.unsub_poll.assert_called()
+
+    async def test_concurrent_setup(self) -> None:
+        """Entries set up at once share one history, which goes with the last."""
+        await asyncio.gather(
+            self.hub.async_acquire("san", _entry("a", {CONF_HISTORY: True})),
+            self.hub.async_acquire("ran", _entry("b", {CONF_HISTORY: True})),
+        )
+        assert self.hub.history is not None
+        # The session's close listener, the history's flush timer and final write
+        assert len(self.unsubs) == 3  # noqa: PLR2004
+
+        await self.hub.async_release("san", "a")
+        await self.hub.async_release("ran", "b")
+        assert self.hub.history is None
+        for unsub in self.unsubs:
+            unsub.assert_called_once()
+
+    async def test_history_wanted(self) -> None:
+        """History is only loaded, and flushed, while a stop wants it."""
+        await self.hub.async_acquire("san", _entry("a"))
+        assert self.hub.history is None
+        # Only the session's close listener
+        assert len(self.unsubs) == 1
+        self.hass.async_add_executor_job.assert_not_awaited()
+
+        await self.hub.async_acquire("ran", _entry("b", {CONF_HISTORY: True}))
+        assert self.hub.history is not None
+        assert len(self.unsubs) == 3  # noqa: PLR2004
+
+        await self.hub.async_release("ran", "b")
+        assert self.hub.history is None
+        for unsub in self.unsubs[1:]:
+            unsub.assert_called_once()
+        self.unsubs[0].assert_not_called()
+
+    async def test_watched(self) -> None:
+        """A stop is polled for the trams any of its entries watch."""
+        stations = mock.Mock(destinations={"bridesglen": "bri", "parnell": "par"})
+        with mock.patch(
+            "custom_components.luas.hub.async_get_station_index",
+            new_callable=mock.AsyncMock,
+            return_value=stations,
+        ):
+            coordinator = await self.hub.async_acquire(
+                "san",
+                _entry(
+                    "a", **{CONF_DIRECTIONS: ["outbound"], CONF_DESTINATIONS: ["bri"]}
+                ),
+            )
+            assert coordinator.watched == {("outbound", "bridesglen")}
+
+            await self.hub.async_acquire(
+                "san",
+                _entry("b", **{CONF_DIRECTIONS: ["inbound"], CONF_DESTINATIONS: []}),
+            )
+            assert coordinator.watched == {
+                ("outbound", "bridesglen"),
+                ("inbound", None),
+            }
+
+            # Journeys watch every tram
+            await self.hub.async_acquire("san", _entry("c", **{CONF_ORIGIN: "san"}))
+            assert coordinator.watched is None
+
+        await self.hub.async_release("san", "c")
+        await self.hub.async_release("san", "b")
+        assert coordinator.watched == {("outbound", "bridesglen")}
+
+    async def test_not_ready(self) -> None:
+        """A stop whose first refresh fails is released again."""
+        with (
+            mock.patch.object(_FakeCoordinator, "fails", new=True),
+            pytest.raises(ConfigEntryNotReady),
+        ):
+            await self.hub.async_acquire("san", _entry("a"))
+        assert not self.hub._stops  # noqa: SLF001
+        self.session.close.assert_awaited_once()
+
+    async def test_poll_tick(self) -> None:
+        """A tick polls the stops which are due, and only those."""
+        due = await self.hub.async_acquire("san", _entry("a"))
+        not_due = await self.hub.async_acquire("ran", _entry("b"))
+        due.poll_due = True
+        not_due.poll_due = False
+        with mock.patch.object(
+            self.hub._poller,  # noqa: SLF001
+            "async_poll",
+            new_callable=mock.AsyncMock,
+        ) as async_poll:
+            await self.hub._async_poll(mock.Mock())  # noqa: SLF001
+            async_poll.assert_awaited_once_with([due])
+
+            due.poll_due = False
+            await self.hub._async_poll(mock.Mock())  # noqa: SLF001
+            async_poll.assert_awaited_once()
+
+    async def test_slow_stop(self) -> None:
+        """A stop whose poll hangs doesn't keep the others from being polled."""
+        slow = await self.hub.async_acquire("san", _entry("a"))
+        other = await self.hub.async_acquire("ran", _entry("b"))
+        hung = asyncio.Event()
+        slow.client.async_get_data.side_effect = hung.wait
+        polled = asyncio.Event()
+        other.client.async_get_data.side_effect = polled.set
+        slow.poll_due = other.poll_due = True
+        first = asyncio.create_task(self.hub._async_poll(mock.Mock()))  # noqa: SLF001
+        async with asyncio.timeout(1):
+            await polled.wait()
+        assert other.polls == 1
+        assert slow.polling
+
+        # Still due, but only the other stop is polled again
+        other.poll_due = True
+        await self.hub._async_poll(mock.Mock())  # noqa: SLF001
+        assert other.polls == 2  # noqa: PLR2004
+        slow.client.async_get_data.assert_awaited_once()
+
+        hung.set()
+        await first
+        assert slow.polls == 1
+        assert not slow.polling
+
+    async def test_line_stops_not_polled(self) -> None:
+        """Stops held only by a line entry are left to its sweeps."""
+        await self.hub.async_acquire_line("green", _entry("a", **{CONF_LINE: "green"}))
+        for stop in self.hub._stops.values():  # noqa: SLF001
+            stop.coordinator.poll_due = True
+        with mock.patch.object(
+            self.hub._poller,  # noqa: SLF001
+            "async_poll",
+            new_callable=mock.AsyncMock,
+        ) as async_poll:
+            await self.hub._async_poll(mock.Mock())  # noqa: SLF001
+            async_poll.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
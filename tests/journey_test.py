@@ -0,0 +1,124 @@
+"""Tests for luas journey module."""
+
+import unittest
+
+import pytest
+
+from custom_components.luas.api import LuasInfo
+from custom_components.luas.journey import LuasJourney, LuasJourneyLeg
+from custom_components.luas.network import journey_direction, reaches
+
+CODES = {
+    "Broombridge": "bro",
+    "Parnell": "par",
+    "St. Stephen's Green": "stx",
+    "Sandyford": "san",
+}
+
+
+def _info(*trams: tuple[str, int]) -> LuasInfo:
+    return LuasInfo.from_dict(
+        {
+            "message": "",
+            "operatingNormally": {"Inbound": True},
+            "stop": "",
+            "trams": [
+                {"destination": destination, "direction": "Inbound", "dueMins": due}
+                for destination, due in trams
+            ],
+        }
+    )
+
+
+class TestNetwork(unittest.TestCase):
+    """Tests for which trams go between stops."""
+
+    def test_journey_direction(self) -> None:
+        """Journeys are along a single line."""
+        assert journey_direction("ran", "sts") == "inbound"
+        assert journey_direction("sts", "ran") == "outbound"
+        assert journey_direction("con", "sag") == "outbound"
+        assert journey_direction("tpt", "con") is None
+        assert journey_direction("ran", "tal") is None
+        assert journey_direction("ran", "ran") is None
+
+    def test_reaches(self) -> None:
+        """A tram reaches a stop on its way to its destination, or at it."""
+        assert reaches("ran", "sts", "bro")
+        assert reaches("ran", "sts", "stx")
+        assert not reaches("ran", "par", "sts")
+        assert not reaches("ran", "sts", "san")
+        assert reaches("red", "bel", "tal")
+        assert not reaches("red", "tal", "sag")
+
+
+class TestLuasJourney(unittest.TestCase):
+    """Tests for estimating arrivals."""
+
+    def setUp(self) -> None:
+        """Make a journey from Ranelagh to St. Stephen's Green."""
+        self.journey = LuasJourney("ran", "sts", CODES.get)
+
+    def test_not_connected(self) -> None:
+        """A journey must be along a single line."""
+        with pytest.raises(ValueError, match="No trams go"):
+            LuasJourney("ran", "tal", CODES.get)
+
+    def test_no_estimate(self) -> None:
+        """Nothing is estimated until the travel time is known."""
+        assert self.journey.update(_info(("Broombridge", 3)), _info()) == ()
+        assert self.journey.travel_mins is None
+
+    def test_arrivals(self) -> None:
+        """Trams are paired across the two stops."""
+        legs = self.journey.update(
+            _info(("Broombridge", 2), ("Sandyford", 3), ("Parnell", 9)),
+            _info(("Broombridge", 7), ("Parnell", 14)),
+        )
+        assert self.journey.travel_mins == 5  # noqa: PLR2004
+        assert legs == (
+            LuasJourneyLeg("Broombridge", 2, 7, forecast=True),
+            LuasJourneyLeg("Parnell", 9, 14, forecast=True),
+        )
+
+    def test_tram_in_between(self) -> None:
+        """A tram already past the origin isn't taken for the next one."""
+        self.journey.update(
+            _info(("Broombridge", 2)),
+            _info(("Broombridge", 7)),
+        )
+        legs = self.journey.update(
+            _info(("Broombridge", 0), ("Broombridge", 12)),
+            _info(("Broombridge", 1), ("Broombridge", 6)),
+        )
+        assert self.journey.travel_mins == 5  # noqa: PLR2004
+        assert legs == (
+            LuasJourneyLeg("Broombridge", 0, 6, forecast=True),
+            LuasJourneyLeg("Broombridge", 12, 17, forecast=False),
+        )
+
+    def test_forecast_ages(self) -> None:
+        """Forecasts made at different times are lined up before pairing."""
+        legs = self.journey.update(
+            _info(("Broombridge", 2)),
+            _info(("Broombridge", 10)),
+            target_elapsed=3,
+        )
+        assert self.journey.travel_mins == 5  # noqa: PLR2004
+        assert legs == (LuasJourneyLeg("Broombridge", 2, 7, forecast=True),)
+
+    def test_sampled_once(self) -> None:
+        """The same pair of forecasts only counts towards the travel time once."""
+        origin, target = _info(("Broombridge", 2)), _info(("Broombridge", 9))
+        for _ in range(3):
+            self.journey.update(origin, target)
+        for due in range(4):
+            self.journey.update(
+                _info(("Broombridge", due)), _info(("Broombridge", due + 5))
+            )
+        # Counted three times, 7 minutes would be the upper quartile
+        assert self.journey.travel_mins == 5  # noqa: PLR2004
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,84 @@
 """Tests for luas forecast module."""
 
+import asyncio
+import dataclasses
+import random
 import textwrap
 import unittest
+from datetime import datetime
+from xml.sax.saxutils import quoteattr
 
-from custom_components.luas.api import parse
+import pytest
+from defusedxml import EntitiesForbidden
+
+from custom_components.luas.api import (
+    LuasApiClient,
+    LuasApiClientPayloadTooLargeError,
+    LuasInfo,
+    LuasSnapshot,
+    fingerprint,
+    parse,
+    parse_created,
+    read_limited,
+)
+
+PAYLOAD_NORMAL = textwrap.dedent(
+    """
+    <stopInfo created="2022-06-10T14:37:15" stop="Leopardstown Valley" stopAbv="LEO">
+        <message>Green Line services operating normally</message>
+        <direction name="Inbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
+            <tram dueMins="6" destination="Parnell" />
+            <tram dueMins="18" destination="Parnell" />
+        </direction>
+        <direction name="Outbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
+            <tram dueMins="4" destination="Bride's Glen" />
+            <tram dueMins="DUE" destination="Bride's Glen" />
+        </direction>
+    </stopInfo>
+    """  # noqa: E501
+)
+
+PAYLOAD_ERROR_CONDITION = textwrap.dedent(
+    """
+    <stopInfo created="2025-01-25T13:07:43" stop="Leopardstown Valley" stopAbv="LEO">
+        <message>Green Line services operating normally</message>
+        <direction name="Inbound" statusMessage="No service St. Stephen's Green - Parnell. See news" forecastsEnabled="False" operatingNormally="False">
+            <tram destination="See news for information" dueMins="" />
+        </direction>
+        <direction name="Outbound" statusMessage="No service St. Stephen's Green - Parnell. See news" forecastsEnabled="False" operatingNormally="False">
+            <tram destination="See news for information" dueMins="" />
+        </direction>
+    </stopInfo>
+    """  # noqa: E501
+)
+
+PAYLOAD_DUPLICATED_MESSAGE = textwrap.dedent(
+    """
+    <stopInfo created="2025-03-17T14:30:10" stop="Leopardstown Valley" stopAbv="LEO">
+        <message>Sunday Op Hrs. No service Stephen's Green-Dominick</message>
+        <direction name="Inbound" statusMessage="Sunday Op Hrs. No service Stephen's Green-Dominick" forecastsEnabled="False" operatingNormally="False">
+            <tram destination="See news for information" dueMins="" />
+        </direction>
+        <direction name="Outbound" statusMessage="Sunday Op Hrs. No service Stephen's Green-Dominick" forecastsEnabled="False" operatingNormally="False">
+            <tram destination="See news for information" dueMins="" />
+        </direction>
+    </stopInfo>
+    """  # noqa: E501
+)
+
+PAYLOAD_EMPTY = textwrap.dedent(
+    """
+    <stopInfo created="2022-06-12T04:09:17" stop="Leopardstown Valley" stopAbv="LEO">
+        <message>Green Line services operating normally</message>
+        <direction name="Inbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
+            <tram destination="No trams forecast" dueMins="" />
+        </direction>
+        <direction name="Outbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
+            <tram destination="No trams forecast" dueMins="" />
+        </direction>
+    </stopInfo>
+    """  # noqa: E501
+)
 
 
 class TestLuasForecastParsing(unittest.TestCase):
@@ -11,26 +86,11 @@ class TestLuasForecastParsing(unittest.TestCase):
 
     def test_parse(self) -> None:
         """Test parsing of trams XML."""
-        payload = textwrap.dedent(
-            """
-            <stopInfo created="2022-06-10T14:37:15" stop="Leopardstown Valley" stopAbv="LEO">
-                <message>Green Line services operating normally</message>
-                <direction name="Inbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
-                    <tram dueMins="6" destination="Parnell" />
-                    <tram dueMins="18" destination="Parnell" />
-                </direction>
-                <direction name="Outbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
-                    <tram dueMins="4" destination="Bride's Glen" />
-                    <tram dueMins="DUE" destination="Bride's Glen" />
-                </direction>
-            </stopInfo>
-            """  # noqa: E501
-        )
-
-        got = parse(payload.encode("utf-8"))
+        got = parse(PAYLOAD_NORMAL.encode("utf-8")).as_dict()
 
         want = {
             "message": "Green Line services operating normally",
+            "operatingNormally": {"Inbound": True, "Outbound": True},
             "stop": "Leopardstown Valley",
             "trams": [
                 {
@@ -56,25 +116,14 @@ class TestLuasForecastParsing(unittest.TestCase):
 
         We saw this 2025-01-25.
         """
-        payload = textwrap.dedent("""
-            <stopInfo created="2025-01-25T13:07:43" stop="Leopardstown Valley" stopAbv="LEO">
-                <message>Green Line services operating normally</message>
-                <direction name="Inbound" statusMessage="No service St. Stephen's Green - Parnell. See news" forecastsEnabled="False" operatingNormally="False">
-                    <tram destination="See news for information" dueMins="" />
-                </direction>
-                <direction name="Outbound" statusMessage="No service St. Stephen's Green - Parnell. See news" forecastsEnabled="False" operatingNormally="False">
-                    <tram destination="See news for information" dueMins="" />
-                </direction>
-            </stopInfo>
-        """)  # noqa: E501
-
-        got = parse(payload.encode("utf-8"))
+        got = parse(PAYLOAD_ERROR_CONDITION.encode("utf-8")).as_dict()
 
         want = {
             "message": (
                 "Green Line services operating normally; "
                 "No service St. Stephen's Green - Parnell. See news"
             ),
+            "operatingNormally": {"Inbound": False, "Outbound": False},
             "stop": "Leopardstown Valley",
             "trams": [],
         }
@@ -87,22 +136,11 @@ class TestLuasForecastParsing(unittest.TestCase):
 
         We saw this 2025-03-17.
         """
-        payload = textwrap.dedent("""
-                <stopInfo created="2025-03-17T14:30:10" stop="Leopardstown Valley" stopAbv="LEO">
-                    <message>Sunday Op Hrs. No service Stephen's Green-Dominick</message>
-                    <direction name="Inbound" statusMessage="Sunday Op Hrs. No service Stephen's Green-Dominick" forecastsEnabled="False" operatingNormally="False">
-                        <tram destination="See news for information" dueMins="" />
-                    </direction>
-                    <direction name="Outbound" statusMessage="Sunday Op Hrs. No service Stephen's Green-Dominick" forecastsEnabled="False" operatingNormally="False">
-                        <tram destination="See news for information" dueMins="" />
-                    </direction>
-                </stopInfo>
-            """)  # noqa: E501
-
-        got = parse(payload.encode("utf-8"))
+        got = parse(PAYLOAD_DUPLICATED_MESSAGE.encode("utf-8")).as_dict()
 
         want = {
             "message": ("Sunday Op Hrs. No service Stephen's Green-Dominick"),
+            "operatingNormally": {"Inbound": False, "Outbound": False},
             "stop": "Leopardstown Valley",
             "trams": [],
         }
@@ -111,24 +149,11 @@ class TestLuasForecastParsing(unittest.TestCase):
 
     def test_parse_empty(self) -> None:
         """Test parsing of after-hours empty result."""
-        payload = textwrap.dedent(
-            """
-            <stopInfo created="2022-06-12T04:09:17" stop="Leopardstown Valley" stopAbv="LEO">
-                <message>Green Line services operating normally</message>
-                <direction name="Inbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
-                    <tram destination="No trams forecast" dueMins="" />
-                </direction>
-                <direction name="Outbound" statusMessage="Services operating normally" forecastsEnabled="True" operatingNormally="True">
-                    <tram destination="No trams forecast" dueMins="" />
-                </direction>
-            </stopInfo>
-            """  # noqa: E501
-        )
-
-        got = parse(payload.encode("utf-8"))
+        got = parse(PAYLOAD_EMPTY.encode("utf-8")).as_dict()
 
         want = {
             "message": "Green Line services operating normally",
+            "operatingNormally": {"Inbound": True, "Outbound": True},
             "stop": "Leopardstown Valley",
             "trams": [],
         }
@@ -136,6 +161,259 @@ class TestLuasForecastParsing(unittest.TestCase):
         assert got == want
 
 
+class TestLuasInfo(unittest.TestCase):
+    """Tests for forecast records."""
+
+    def test_dict_round_trip(self) -> None:
+        """A forecast survives conversion to a dict and back."""
+        info = parse(PAYLOAD_NORMAL.encode("utf-8"))
+        assert LuasInfo.from_dict(info.as_dict()) == info
+
+    def test_trams_shared(self) -> None:
+        """The same tram in different forecasts is the same object."""
+        payload = PAYLOAD_NORMAL.encode("utf-8")
+        first, second = parse(payload), parse(payload)
+        assert all(a is b for a, b in zip(first.trams, second.trams, strict=True))
+        assert parse(payload, reference=True).trams[0] is first.trams[0]
+
+    def test_immutable(self) -> None:
+        """Forecasts can't be changed once parsed."""
+        info = parse(PAYLOAD_NORMAL.encode("utf-8"))
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            info.trams[0].due_mins = 1  # type: ignore[misc]
+        with pytest.raises(TypeError):
+            info.operating_normally["Inbound"] = False  # type: ignore[index]
+
+
+class TestLuasSnapshot(unittest.TestCase):
+    """Tests for indexed forecast snapshots."""
+
+    def test_index(self) -> None:
+        """Trams are indexed by direction and destination, case-insensitively."""
+        snapshot = LuasSnapshot.from_info(parse(PAYLOAD_NORMAL.encode("utf-8")))
+
+        assert [
+            t.due_mins for t in snapshot.trams(LuasSnapshot.key("outbound", None))
+        ] == [0, 4]
+        assert [
+            t.due_mins for t in snapshot.trams(LuasSnapshot.key("INBOUND", "parnell"))
+        ] == [6, 18]
+        assert snapshot.trams(LuasSnapshot.key("Inbound", "Bride's Glen")) == ()
+        assert snapshot.trams(LuasSnapshot.key("Outbound", "Brides Glen")) == (
+            snapshot.trams(LuasSnapshot.key("Outbound", "Bride's Glen"))
+        )
+        assert snapshot.trams(LuasSnapshot.key("Sideways", None)) == ()
+
+    def test_equality(self) -> None:
+        """Snapshots of equal forecasts are equal."""
+        payload = PAYLOAD_NORMAL.encode("utf-8")
+        assert LuasSnapshot.from_info(parse(payload)) == LuasSnapshot.from_info(
+            parse(payload)
+        )
+
+    def test_created(self) -> None:
+        """The creation time is kept, but doesn't affect equality."""
+        payload = PAYLOAD_NORMAL.encode("utf-8")
+        created = parse_created(payload)
+        assert created == datetime(2022, 6, 10, 14, 37, 15)  # noqa: DTZ001
+
+        snapshot = LuasSnapshot.from_info(parse(payload), created)
+        assert snapshot.created == created
+        assert snapshot == LuasSnapshot.from_info(parse(payload))
+
+
+class TestFingerprint(unittest.TestCase):
+    """Tests for payload fingerprints."""
+
+    def test_created_ignored(self) -> None:
+        """Forecasts which only differ in their creation time are the same."""
+        assert fingerprint(PAYLOAD_NORMAL.encode()) == fingerprint(
+            PAYLOAD_NORMAL.replace(
+                "2022-06-10T14:37:15", "2022-06-10T14:37:45"
+            ).encode()
+        )
+
+    def test_forecast_change(self) -> None:
+        """Forecasts with different trams are different."""
+        assert fingerprint(PAYLOAD_NORMAL.encode()) != fingerprint(
+            PAYLOAD_NORMAL.replace('dueMins="6"', 'dueMins="5"').encode()
+        )
+
+
+class _CountingClient(LuasApiClient):
+    """A client which returns PAYLOAD_NORMAL slowly, counting requests."""
+
+    requests = 0
+
+    async def _api_wrapper(self, stop: str) -> bytes:  # noqa: ARG002
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        return PAYLOAD_NORMAL.encode()
+
+
+class _ChunkedResponse:
+    """Enough of an aiohttp.ClientResponse to read a body in chunks."""
+
+    def __init__(self, chunks: list[bytes], content_length: int | None) -> None:
+        self.content_length = content_length
+        self.content = self
+        self._chunks = chunks
+
+    async def read(self, n: int) -> bytes:
+        if not self._chunks:
+            return b""
+        chunk = self._chunks.pop(0)
+        self._chunks[:0] = [chunk[n:]] if chunk[n:] else []
+        return chunk[:n]
+
+
+class TestReadLimited(unittest.IsolatedAsyncioTestCase):
+    """Tests for reading responses of limited size."""
+
+    async def test_within_limit(self) -> None:
+        """Bodies up to the limit are read whole."""
+        body = await read_limited(_ChunkedResponse([b"abc", b"def"], None), 6)  # type: ignore[arg-type]
+        assert body == b"abcdef"
+
+    async def test_over_limit(self) -> None:
+        """Bodies over the limit are refused, whether or not their size is known."""
+        with pytest.raises(LuasApiClientPayloadTooLargeError):
+            await read_limited(_ChunkedResponse([b"abc", b"defg"], None), 6)  # type: ignore[arg-type]
+        with pytest.raises(LuasApiClientPayloadTooLargeError):
+            await read_limited(_ChunkedResponse([], 7), 6)  # type: ignore[arg-type]
+
+
+class TestLuasApiClientCoalescing(unittest.IsolatedAsyncioTestCase):
+    """Tests for sharing requests between fetches of the same stop."""
+
+    async def test_concurrent_fetches(self) -> None:
+        """Overlapping fetches share a single request."""
+        client = _CountingClient("leo", session=None)  # type: ignore[arg-type]
+        snapshots = await asyncio.gather(*(client.async_get_data() for _ in range(5)))
+        assert client.requests == 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+        assert client.stats.coalesced == 4  # noqa: PLR2004
+
+    async def test_freshness_window(self) -> None:
+        """Fetches right after a successful one reuse it."""
+        client = _CountingClient("leo", session=None)  # type: ignore[arg-type]
+        first = await client.async_get_data()
+        assert await client.async_get_data() is first
+        assert client.requests == 1
+
+    async def test_cancelled_caller(self) -> None:
+        """Cancelling one fetch doesn't cancel the shared request."""
+        client = _CountingClient("leo", session=None)  # type: ignore[arg-type]
+        cancelled = asyncio.ensure_future(client.async_get_data())
+        remaining = asyncio.ensure_future(client.async_get_data())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert (await remaining).info.stop == "Leopardstown Valley"
+        assert client.requests == 1
+
+
+def _generate_payload(rng: random.Random) -> str:
+    """Generate a random but well-formed forecast, with some odd corners."""
+    texts = [
+        "Green Line services operating normally",
+        "Red Line services operating normally",
+        "No service St. Stephen's Green - Parnell. See news",
+        "Delays & diversions <see news>",
+        "",
+    ]
+    destinations = [
+        "Bride's Glen",
+        "Parnell",
+        "Broombridge",
+        "The Point",
+        "Tallaght",
+        "See news for information",
+        "No trams forecast",
+    ]
+    directions = []
+    for _ in range(rng.randint(0, 4)):
+        trams = "".join(
+            f"<tram dueMins={quoteattr(rng.choice(['DUE', '', str(rng.randint(1, 60))]))}"  # noqa: E501
+            f" destination={quoteattr(rng.choice(destinations))} />"
+            for _ in range(rng.randint(0, 30))
+        )
+        directions.append(
+            f"<direction name={quoteattr(rng.choice(['Inbound', 'Outbound']))}"
+            f" statusMessage={quoteattr(rng.choice(texts))}"
+            f' operatingNormally="{rng.choice(["True", "False", "true"])}">'
+            f"{trams}</direction>"
+        )
+    message = rng.choice(texts).replace("&", "&amp;").replace("<", "&lt;")
+    children = [f"<message>{message}</message>", *directions]
+    rng.shuffle(children)
+    body = "\n  ".join(children)
+    return (
+        '<stopInfo created="2025-03-17T14:30:10" stop="Leopardstown Valley"'
+        f' stopAbv="LEO">{body}</stopInfo>'
+    )
+
+
+class TestLuasForecastParserEquivalence(unittest.TestCase):
+    """Tests that the single-pass parser matches the reference parser."""
+
+    def assert_equivalent(self, payload: bytes) -> None:
+        """Assert that both parsers produce the same result for payload."""
+        got = parse(payload)
+        want = parse(payload, reference=True)
+        assert got == want
+        # Ties in dueMins must keep document order, as with sorted()
+        assert [t.destination for t in got.trams] == [t.destination for t in want.trams]
+
+    def test_fixtures(self) -> None:
+        """Test the fixtures above."""
+        for payload in (
+            PAYLOAD_NORMAL,
+            PAYLOAD_ERROR_CONDITION,
+            PAYLOAD_DUPLICATED_MESSAGE,
+            PAYLOAD_EMPTY,
+        ):
+            with self.subTest(payload=payload):
+                self.assert_equivalent(payload.encode("utf-8"))
+
+    def test_generated(self) -> None:
+        """Test randomly generated payloads."""
+        rng = random.Random(1729)  # noqa: S311
+        for _ in range(500):
+            payload = _generate_payload(rng)
+            with self.subTest(payload=payload):
+                self.assert_equivalent(payload.encode("utf-8"))
+
+    def test_nested_elements_ignored(self) -> None:
+        """Only direct children count, as with ElementTree's find."""
+        self.assert_equivalent(
+            b'<stopInfo stop="Sandyford"><message>Hello <b>there</b> you</message>'
+            b'<extra><direction name="Inbound" operatingNormally="False"'
+            b' statusMessage="Hidden"><tram dueMins="3" destination="Parnell" />'
+            b'</direction></extra><direction name="Outbound" statusMessage=""'
+            b' operatingNormally="True"><extra><tram dueMins="5" destination="X"'
+            b" /></extra></direction></stopInfo>"
+        )
+
+    def test_missing_message(self) -> None:
+        """Both parsers reject a forecast without a message."""
+        payload = b'<stopInfo stop="Sandyford"></stopInfo>'
+        with pytest.raises(ValueError):  # noqa: PT011
+            parse(payload)
+        with pytest.raises(ValueError):  # noqa: PT011
+            parse(payload, reference=True)
+
+    def test_entities_rejected(self) -> None:
+        """The single-pass parser is as strict about entities as defusedxml."""
+        payload = (
+            b'<!DOCTYPE stopInfo [<!ENTITY a "aaaaaaaaaa">]>'
+            b'<stopInfo stop="Sandyford"><message>&a;</message></stopInfo>'
+        )
+        with pytest.raises(EntitiesForbidden):
+            parse(payload)
+        with pytest.raises(EntitiesForbidden):
+            parse(payload, reference=True)
+
+
 if __name__ == "__main__":
     unittest.main()
 
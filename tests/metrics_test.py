@@ -0,0 +1,79 @@
+"""Tests for luas metrics module."""
+
+import unittest
+
+import pytest
+
+from custom_components.luas.metrics import (
+    LuasClientMetrics,
+    LuasRequestTiming,
+    RollingHistogram,
+)
+
+
+class TestRollingHistogram(unittest.TestCase):
+    """Tests for rolling histograms."""
+
+    def test_empty(self) -> None:
+        """An empty histogram has no summary values."""
+        histogram = RollingHistogram((1, 10, 100))
+        assert len(histogram) == 0
+        assert histogram.mean is None
+        assert histogram.percentile(0.5) is None
+
+    def test_percentiles(self) -> None:
+        """Percentiles are the upper bound of their bucket."""
+        histogram = RollingHistogram((1, 10, 100))
+        for value in (0.5, 5, 5, 5, 50, 50, 50, 50, 50, 500):
+            histogram.add(value)
+        assert histogram.percentile(0.1) == 1
+        assert histogram.percentile(0.4) == 10  # noqa: PLR2004
+        assert histogram.percentile(0.5) == 100  # noqa: PLR2004
+        # Beyond the last bucket, the largest sample
+        assert histogram.percentile(1) == 500  # noqa: PLR2004
+        assert histogram.mean == pytest.approx(76.55)
+
+    def test_window(self) -> None:
+        """Only the last window samples count."""
+        histogram = RollingHistogram((1, 10, 100), window=3)
+        for value in (500, 500, 500, 5, 5, 5):
+            histogram.add(value)
+        assert len(histogram) == 3  # noqa: PLR2004
+        assert histogram.percentile(1) == 10  # noqa: PLR2004
+        assert histogram.mean == 5  # noqa: PLR2004
+        assert histogram.last == 5  # noqa: PLR2004
+
+
+class TestLuasRequestTiming(unittest.TestCase):
+    """Tests for request timing."""
+
+    def test_between(self) -> None:
+        """Durations are only known between marks which happened."""
+        timing = LuasRequestTiming(marks={"start": 1.0, "response": 1.25})
+        assert timing.between("start", "response") == 250  # noqa: PLR2004
+        assert timing.between("dns_start", "dns_end") is None
+
+
+class TestLuasClientMetrics(unittest.TestCase):
+    """Tests for client metrics."""
+
+    def test_connection_reuse(self) -> None:
+        """Requests are counted by whether they needed a new connection."""
+        metrics = LuasClientMetrics()
+        assert metrics.reuse_ratio is None
+        metrics.record_request(
+            LuasRequestTiming(marks={"start": 1.0, "connect_end": 1.1}), 100
+        )
+        for _ in range(3):
+            metrics.record_request(
+                LuasRequestTiming(marks={"start": 2.0, "reused": 2.0}), 100
+            )
+        # Untraced requests don't count either way
+        metrics.record_request(LuasRequestTiming(), 100)
+        assert metrics.connections_created == 1
+        assert metrics.connections_reused == 3  # noqa: PLR2004
+        assert metrics.reuse_ratio == 0.75  # noqa: PLR2004
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Tests for luas network module."""
+
+import unittest
+
+from custom_components.luas.api import LuasInfo
+from custom_components.luas.const import LUAS_LINES, LUAS_STATIONS
+from custom_components.luas.network import (
+    LuasLineSegment,
+    LuasTramPosition,
+    build_line_model,
+    line_stations,
+)
+
+
+def _info(
+    inbound: list[int],
+    outbound: list[int],
+    *,
+    inbound_normally: bool = True,
+    message: str = "",
+) -> LuasInfo:
+    return LuasInfo.from_dict(
+        {
+            "message": message,
+            "operatingNormally": {"Inbound": inbound_normally, "Outbound": True},
+            "stop": "",
+            "trams": [
+                {"destination": "Broombridge", "direction": "Inbound", "dueMins": due}
+                for due in inbound
+            ]
+            + [
+                {"destination": "Brides Glen", "direction": "Outbound", "dueMins": due}
+                for due in outbound
+            ],
+        }
+    )
+
+
+class TestLineStations(unittest.TestCase):
+    """Tests for the stops of each line."""
+
+    def test_stations(self) -> None:
+        """Every stop is known, and appears once."""
+        for line in LUAS_LINES:
+            stations = line_stations(line)
+            assert len(stations) == len(set(stations))
+            assert set(stations) <= set(LUAS_STATIONS)
+        assert not set(line_stations("red")) & set(line_stations("green"))
+
+
+class TestBuildLineModel(unittest.TestCase):
+    """Tests for merging forecasts into a line model."""
+
+    def test_positions(self) -> None:
+        """Trams due sooner than at the stop before are between the two."""
+        model = build_line_model(
+            "green",
+            {
+                "ran": _info([16], [6]),
+                "bee": _info([3], [2, 8]),
+                "cow": _info([10], [1, 4]),
+            },
+        )
+        assert model.trams == (
+            LuasTramPosition("inbound", "Broombridge", "cow", "bee", 3),
+            LuasTramPosition("outbound", "Brides Glen", "ran", "bee", 2),
+            LuasTramPosition("outbound", "Brides Glen", "bee", "cow", 1),
+        )
+        assert model.trams_in("outbound") == 2  # noqa: PLR2004
+        assert model.gaps == (LuasLineSegment("inbound", "ran", "ran", wait_mins=16),)
+        assert model.disruptions == ()
+        assert len(model.missing) == len(line_stations("green")) - 3
+
+    def test_disruptions(self) -> None:
+        """Consecutive stops not operating normally form one disruption."""
+        model = build_line_model(
+            "green",
+            {
+                "ran": _info([], [5]),
+                "bee": _info([], [5], inbound_normally=False, message="No trams"),
+                "cow": _info([], [5], inbound_normally=False, message="No trams"),
+                "mil": _info([], [5]),
+            },
+        )
+        assert model.disruptions == (
+            LuasLineSegment("inbound", "cow", "bee", message="No trams"),
+        )
+
+    def test_shared_trunk(self) -> None:
+        """Trams on a trunk shared by two routes are only counted once."""
+        model = build_line_model(
+            "red",
+            {"kin": _info([5], []), "red": _info([1], [])},
+        )
+        assert model.trams == (
+            LuasTramPosition("inbound", "Broombridge", "kin", "red", 1),
+        )
+
+    def test_as_dict(self) -> None:
+        """Stops are named by the given function."""
+        model = build_line_model(
+            "red",
+            {"kin": _info([5], []), "red": _info([1], [])},
+        )
+        result = model.as_dict(str.upper)
+        assert result["trams"]["inbound"] == [
+            {"from": "KIN", "to": "RED", "destination": "Broombridge", "due": 1}
+        ]
+        assert result["trams"]["outbound"] == []
+        assert "TAL" in result["missing"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Tests for luas parsing module."""
+
+import asyncio
+import unittest
+from collections.abc import Awaitable, Callable, Coroutine
+from typing import Any
+
+import pytest
+
+from custom_components.luas.api import parse
+from custom_components.luas.parsing import LuasBatchParser
+
+
+def _payload(stop: str, *due: int) -> bytes:
+    trams = "".join(
+        f'<tram dueMins="{d}" destination="Parnell" />' for d in sorted(due)
+    )
+    return (
+        f'<stopInfo stop="{stop}"><message>Hello</message>'
+        '<direction name="Inbound" statusMessage="" operatingNormally="True">'
+        f"{trams}</direction></stopInfo>"
+    ).encode()
+
+
+class _FakeHass:
+    """Just enough of HomeAssistant for the parser, recording executor jobs."""
+
+    def __init__(self) -> None:
+        self.jobs: list[int] = []
+        self.tasks: list[asyncio.Task[Any]] = []
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str
+    ) -> asyncio.Task[Any]:
+        task = asyncio.get_running_loop().create_task(target, name=name)
+        self.tasks.append(task)
+        return task
+
+    async def async_add_executor_job(
+        self, target: Callable[[list[bytes]], Any], payloads: list[bytes]
+    ) -> Any:
+        self.jobs.append(len(payloads))
+        return await asyncio.get_running_loop().run_in_executor(None, target, payloads)
+
+
+class TestLuasBatchParser(unittest.IsolatedAsyncioTestCase):
+    """Tests for parsing on or off the event loop."""
+
+    def setUp(self) -> None:
+        """Make a parser which batches polls of at least 3 stops."""
+        self.hass = _FakeHass()
+        self.parser = LuasBatchParser(
+            self.hass,  # type: ignore[arg-type]
+            batch_size=3,
+            payload_size=1024,
+        )
+
+    async def _fetch(
+        self, payload: bytes | None, delay: Awaitable[None] | None = None
+    ) -> Any:
+        """Act like a client: fetch, then parse the payload, if there is one."""
+        with self.parser.fetching():
+            if delay is not None:
+                await delay
+            if payload is None:
+                return None
+            info, _ms = await self.parser.async_parse(payload)
+            return info
+
+    async def test_inline(self) -> None:
+        """Small polls are parsed on the event loop."""
+        with self.parser.polling(2):
+            info = await self._fetch(_payload("Sandyford", 3))
+        assert info == parse(_payload("Sandyford", 3))
+        assert self.hass.jobs == []
+        assert self.parser.metrics.inline == 1
+
+    async def test_batch(self) -> None:
+        """Payloads fetched together in a large poll are parsed in one job."""
+        payloads = [_payload(f"s{i}", i) for i in range(3)]
+        with self.parser.polling(3):
+            results = await asyncio.gather(
+                *(self._fetch(payload, asyncio.sleep(0)) for payload in payloads)
+            )
+        assert results == [parse(payload) for payload in payloads]
+        assert self.hass.jobs == [3]
+        metrics = self.parser.metrics
+        assert metrics.batches == 1
+        assert metrics.offloaded == 3  # noqa: PLR2004
+        assert metrics.saved_ms > 0
+
+    async def test_waits_for_fetches(self) -> None:
+        """A batch is parsed once no fetch in flight could add to it."""
+        done = asyncio.Event()
+        with self.parser.polling(3):
+            results = await asyncio.gather(
+                self._fetch(_payload("a", 1), asyncio.sleep(0)),
+                self._fetch(_payload("b", 2), done.wait()),
+                self._fetch(None, asyncio.sleep(0)),
+                self._release(done),
+            )
+        assert results[:2] == [parse(_payload("a", 1)), parse(_payload("b", 2))]
+        assert self.hass.jobs == [2]
+
+    async def _release(self, event: asyncio.Event) -> None:
+        # By now, the first payload is queued and the third fetch has finished
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert self.hass.jobs == []
+        event.set()
+
+    async def test_slow_fetch(self) -> None:
+        """A fetch which hangs doesn't hold up the payloads already fetched."""
+        done = asyncio.Event()
+        with self.parser.polling(3):
+            slow = asyncio.ensure_future(self._fetch(_payload("c", 3), done.wait()))
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    self._fetch(_payload("a", 1), asyncio.sleep(0)),
+                    self._fetch(_payload("b", 2), asyncio.sleep(0)),
+                ),
+                timeout=self.parser.delay * 10,
+            )
+            assert results == [parse(_payload("a", 1)), parse(_payload("b", 2))]
+            assert self.hass.jobs == [2]
+            done.set()
+            assert await slow == parse(_payload("c", 3))
+        assert self.hass.jobs == [2, 1]
+
+    async def test_full_batch(self) -> None:
+        """A full batch is parsed straight away, while more are being fetched."""
+        payloads = [_payload(f"s{i}", i) for i in range(4)]
+        with self.parser.polling(4):
+            results = await asyncio.gather(
+                *(self._fetch(payload, asyncio.sleep(0)) for payload in payloads)
+            )
+        assert results == [parse(payload) for payload in payloads]
+        assert self.hass.jobs == [3, 1]
+
+    async def test_error(self) -> None:
+        """A payload which can't be parsed doesn't affect the others."""
+        with self.parser.polling(3):
+            results = await asyncio.gather(
+                self._fetch(b"<stopInfo", asyncio.sleep(0)),
+                self._fetch(_payload("a", 1), asyncio.sleep(0)),
+                return_exceptions=True,
+            )
+        assert isinstance(results[0], Exception)
+        assert results[1] == parse(_payload("a", 1))
+
+    async def test_large_payload(self) -> None:
+        """A large payload is parsed in the executor, even on its own."""
+        payload = _payload("Sandyford", *range(100))
+        assert len(payload) >= self.parser.payload_size
+        info = await self._fetch(payload)
+        assert len(info.trams) == 100  # noqa: PLR2004
+        assert self.hass.jobs == [1]
+
+    async def test_executor_failure(self) -> None:
+        """Every payload in a batch gets the executor's error."""
+
+        async def fail(*_args: object) -> None:
+            raise RuntimeError
+
+        self.hass.async_add_executor_job = fail  # type: ignore[method-assign]
+        with self.parser.polling(3), pytest.raises(RuntimeError):
+            await self._fetch(_payload("a", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
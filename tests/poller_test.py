@@ -0,0 +1,160 @@
+"""Tests for luas poller module."""
+
+import contextlib
+import unittest
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from custom_components.luas.poller import LuasBatchPoller, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for the request budget."""
+
+    def setUp(self) -> None:
+        """Control the bucket's clock."""
+        self.now = 1000.0
+        patcher = mock.patch(
+            "custom_components.luas.poller.time.monotonic",
+            side_effect=lambda: self.now,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_and_refill(self) -> None:
+        """A burst is allowed, then requests are paced at the budget."""
+        bucket = TokenBucket(requests_per_minute=60)
+        assert bucket.capacity == 10  # noqa: PLR2004
+        assert sum(bucket.try_acquire() for _ in range(20)) == 10  # noqa: PLR2004
+
+        self.now += 2.5
+        assert sum(bucket.try_acquire() for _ in range(20)) == 2  # noqa: PLR2004
+
+        # Never more than capacity, however long it's been
+        self.now += 3600
+        assert sum(bucket.try_acquire() for _ in range(20)) == 10  # noqa: PLR2004
+
+    def test_small_budget(self) -> None:
+        """At least one request can be made, even with a tiny budget."""
+        bucket = TokenBucket(requests_per_minute=1)
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+
+class _FakeCoordinator:
+    """Just enough of LuasDataUpdateCoordinator for the poller."""
+
+    def __init__(self, station: str, age: float | None, *, imminent: bool) -> None:
+        self.station = station
+        self.fetched_at = (
+            None if age is None else datetime.now(UTC) - timedelta(seconds=age)
+        )
+        self.imminent = imminent
+        self.client = mock.Mock(async_get_data=mock.AsyncMock(return_value=None))
+
+    def async_set_polled_data(self, _data: object) -> None:
+        pass
+
+    def async_set_poll_error(self, _exception: Exception) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def _patch_clock() -> Iterator[list[float]]:
+    """Control the poller's clock, recording how long it sleeps."""
+    now = 1000.0
+    waits: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        nonlocal now
+        waits.append(delay)
+        now += delay
+
+    with (
+        mock.patch(
+            "custom_components.luas.poller.time.monotonic",
+            side_effect=lambda: now,
+        ),
+        mock.patch("custom_components.luas.poller.asyncio.sleep", sleep),
+    ):
+        yield waits
+
+
+class TestLuasBatchPoller(unittest.IsolatedAsyncioTestCase):
+    """Tests for prioritising stops within the budget."""
+
+    async def test_priority(self) -> None:
+        """Imminent trams go first, then the oldest forecasts."""
+        poller = LuasBatchPoller(requests_per_minute=18)
+        assert poller.bucket.capacity == 3  # noqa: PLR2004
+        result = await poller.async_poll(
+            [
+                _FakeCoordinator("old", 300, imminent=False),
+                _FakeCoordinator("fresh", 10, imminent=False),
+                _FakeCoordinator("soon", 10, imminent=True),
+                _FakeCoordinator("new", None, imminent=False),
+                _FakeCoordinator("older", 600, imminent=False),
+            ]  # type: ignore[list-item]
+        )
+        assert result.succeeded == ["soon", "new", "older"]
+        assert result.deferred == ["old", "fresh"]
+
+    async def test_sweep(self) -> None:
+        """A sweep refreshes every stop, in order, waiting for the budget."""
+        with _patch_clock() as waits:
+            poller = LuasBatchPoller(requests_per_minute=18)
+            result = await poller.async_sweep(
+                [
+                    _FakeCoordinator(station, None, imminent=False)
+                    for station in ("a", "b", "c", "d", "e")
+                ]  # type: ignore[misc]
+            )
+            assert poller.bucket.tokens == pytest.approx(1)
+        assert sorted(result.succeeded) == ["a", "b", "c", "d", "e"]
+        assert result.deferred == []
+        # Two from the burst, leaving one for polls, then one every 60 / 18
+        # seconds
+        assert waits == pytest.approx([60 / 18, 60 / 18, 60 / 18])
+
+    async def test_sweep_leaves_reserve(self) -> None:
+        """Polls still get tokens after a long sweep, which never overdraws."""
+        sweep = [_FakeCoordinator(f"s{i}", None, imminent=False) for i in range(36)]
+        poll = [_FakeCoordinator(f"p{i}", None, imminent=False) for i in range(5)]
+        poll[-1].imminent = True
+        with _patch_clock():
+            poller = LuasBatchPoller(requests_per_minute=60)
+            assert poller.bucket.capacity == 10  # noqa: PLR2004
+            await poller.async_sweep(sweep)  # type: ignore[arg-type]
+            result = await poller.async_poll(poll)  # type: ignore[arg-type]
+        assert len(result.succeeded) == 4  # noqa: PLR2004
+        assert result.succeeded[0] == "p4"
+
+    async def test_sweep_without_waiting(self) -> None:
+        """Without waiting, a sweep defers what the budget doesn't allow now."""
+        sweep = [_FakeCoordinator(f"s{i}", None, imminent=False) for i in range(8)]
+        with _patch_clock() as waits:
+            poller = LuasBatchPoller(requests_per_minute=60)
+            result = await poller.async_sweep(sweep, wait=False)  # type: ignore[arg-type]
+        assert waits == []
+        assert len(result.succeeded) == 5  # noqa: PLR2004
+        assert result.deferred == ["s5", "s6", "s7"]
+
+    async def test_sweep_skips_fresh(self) -> None:
+        """Stops which are fresh enough by their turn aren't fetched."""
+        poller = LuasBatchPoller(requests_per_minute=60)
+        sweep = [
+            _FakeCoordinator("old", 300, imminent=False),
+            _FakeCoordinator("fresh", 10, imminent=False),
+        ]
+        result = await poller.async_sweep(
+            sweep,  # type: ignore[arg-type]
+            fresh=lambda coordinator: coordinator.station == "fresh",
+        )
+        assert result.succeeded == ["old"]
+
+
+if __name__ == "__main__":
+    unittest.main()
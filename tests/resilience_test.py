@@ -0,0 +1,84 @@
+"""Tests for luas resilience module."""
+
+import random
+import unittest
+from unittest import mock
+
+from custom_components.luas.resilience import BreakerState, CircuitBreaker, RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Tests for retry delays."""
+
+    def test_delays(self) -> None:
+        """Delays are within bounds, and there is one fewer than attempts."""
+        policy = RetryPolicy(attempts=50, base_delay=0.5, max_delay=5)
+        delays = list(policy.delays(random.Random(0)))  # noqa: S311
+        assert len(delays) == 49  # noqa: PLR2004
+        assert all(0.5 <= delay <= 5 for delay in delays)  # noqa: PLR2004
+        # Jittered, rather than all the same
+        assert len(set(delays)) > 1
+
+    def test_single_attempt(self) -> None:
+        """No retries with a single attempt."""
+        assert list(RetryPolicy(attempts=1).delays()) == []
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for the circuit breaker."""
+
+    def setUp(self) -> None:
+        """Control the breaker's clock."""
+        self.now = 1000.0
+        patcher = mock.patch(
+            "custom_components.luas.resilience.time.monotonic",
+            side_effect=lambda: self.now,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.changes = 0
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        self.breaker.add_listener(self._changed)
+
+    def _changed(self) -> None:
+        self.changes += 1
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        """Only consecutive failures count towards opening."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        assert self.breaker.state is BreakerState.CLOSED
+        assert self.breaker.allow()
+
+        self.breaker.record_failure()
+        assert self.breaker.state is BreakerState.OPEN
+        assert not self.breaker.allow()
+        assert self.changes == 1
+
+    def test_half_open_probe(self) -> None:
+        """A single probe is let through after reset_timeout."""
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.now += 59
+        assert not self.breaker.allow()
+        self.now += 1
+        assert self.breaker.allow()
+        assert self.breaker.state is BreakerState.HALF_OPEN
+        assert not self.breaker.allow()
+
+        self.breaker.record_failure()
+        assert self.breaker.state is BreakerState.OPEN
+        self.now += 60
+        assert self.breaker.allow()
+        self.breaker.record_success()
+        assert self.breaker.state is BreakerState.CLOSED
+        assert self.breaker.allow()
+        assert self.changes == 5  # noqa: PLR2004
+
+
+if __name__ == "__main__":
+    unittest.main()
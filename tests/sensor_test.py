@@ -0,0 +1,95 @@
+"""Tests for luas sensor module."""
+
+import unittest
+from datetime import UTC, datetime
+from unittest import mock
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.luas.api import Tram
+from custom_components.luas.data import LuasData
+from custom_components.luas.sensor import (
+    LuasCoarseTramSensor,
+    LuasLiveTramSensor,
+    LuasTramSensor,
+)
+
+CREATED = datetime(2026, 10, 18, 8, 0, 30, tzinfo=UTC)
+
+
+def _coordinator(*due_mins: int) -> mock.Mock:
+    coordinator = mock.Mock(stale=False, last_update_success=True)
+    coordinator.data.trams.return_value = tuple(
+        Tram.of("Bride's Glen", "Outbound", due) for due in due_mins
+    )
+    coordinator.elapsed_minutes.return_value = 0
+    coordinator.forecast_created.return_value = CREATED
+    return coordinator
+
+
+def _data(coordinator: mock.Mock) -> LuasData:
+    return LuasData(
+        coordinator=coordinator,
+        integration=mock.Mock(),
+        entry_id="entry",
+        station="ran",
+        translated_station="Ranelagh",
+        destinations=[],
+        translated_destinations=[],
+        directions=["outbound"],
+    )
+
+
+def _unrecorded(sensor: Entity) -> frozenset[str]:
+    """Get the attributes Home Assistant leaves out of the recorder for sensor."""
+    return sensor._Entity__combined_unrecorded_attributes  # type: ignore[attr-defined] # noqa: SLF001
+
+
+class TestRecordedAttributes(unittest.TestCase):
+    """Tests for which attributes reach the recorder."""
+
+    def test_tram_sensor(self) -> None:
+        """Only the next tram's destination is recorded."""
+        coordinator = _coordinator(3, 9)
+        sensor = LuasTramSensor(coordinator, _data(coordinator), "outbound")
+        attributes = sensor.extra_state_attributes
+        assert set(attributes) - _unrecorded(sensor) == {"destination"}
+
+    def test_live_tram_sensor(self) -> None:
+        """None of a live only sensor's attributes are recorded."""
+        coordinator = _coordinator(3, 9)
+        sensor = LuasLiveTramSensor(coordinator, _data(coordinator), "outbound")
+        attributes = sensor.extra_state_attributes
+        assert attributes["next_arrival"] == datetime(2026, 10, 18, 8, 9, tzinfo=UTC)
+        assert set(attributes) <= _unrecorded(sensor)
+        assert sensor.native_value == datetime(2026, 10, 18, 8, 3, tzinfo=UTC)
+
+
+class TestLuasCoarseTramSensor(unittest.TestCase):
+    """Tests for writing fewer tram sensor states."""
+
+    def test_writes(self) -> None:
+        """States are only written when the due minutes change enough."""
+        coordinator = _coordinator(6, 12)
+        sensor = LuasCoarseTramSensor(
+            coordinator, _data(coordinator), "outbound", state_threshold=3
+        )
+        with mock.patch.object(sensor, "async_write_ha_state") as write:
+            for due in (6, 5, 4, 3, 2, 1, 0):
+                coordinator.data.trams.return_value = (
+                    Tram.of("Bride's Glen", "Outbound", due),
+                    Tram.of("Bride's Glen", "Outbound", due + 6),
+                )
+                sensor._async_write_state()  # noqa: SLF001
+        assert write.call_count == 3  # noqa: PLR2004
+        assert sensor.native_value == 0
+        assert sensor.extra_state_attributes["next_due"] == 6  # noqa: PLR2004
+
+        coordinator.last_update_success = False
+        with mock.patch.object(sensor, "async_write_ha_state") as write:
+            sensor._async_write_state()  # noqa: SLF001
+        write.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
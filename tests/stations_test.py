@@ -0,0 +1,41 @@
+"""Tests for luas stations module."""
+
+import unittest
+
+from custom_components.luas.stations import LuasStationIndex
+
+TRANSLATIONS = {
+    "component.luas.selector.station.options.bri": "Brides Glen",
+    "component.luas.selector.station.options.stx": "St. Stephen's Green",
+    "component.luas.selector.station.options.sts": "St. Stephen's Green",
+}
+
+
+class TestLuasStationIndex(unittest.TestCase):
+    """Tests for the station index."""
+
+    def test_names(self) -> None:
+        """Codes map to display names and back."""
+        index = LuasStationIndex.build("en", TRANSLATIONS, TRANSLATIONS)
+
+        assert index.name("bri") == "Brides Glen"
+        assert index.name("nope") == "nope"
+        assert index.codes["Brides Glen"] == "bri"
+        assert index.codes["St. Stephen's Green"] == "stx"
+
+    def test_destinations(self) -> None:
+        """API destination names map to codes, ignoring case and punctuation."""
+        index = LuasStationIndex.build(
+            "ga",
+            {"component.luas.selector.station.options.bri": "Gleann na Bríde"},
+            TRANSLATIONS,
+        )
+
+        assert index.name("bri") == "Gleann na Bríde"
+        assert index.destination_code("Bride's Glen") == "bri"
+        assert index.destination_code("GLEANN NA BRÍDE") == "bri"
+        assert index.destination_code("See news for information") is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Tests for luas stats module."""
+
+import math
+import unittest
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from custom_components.luas.api import LuasInfo, LuasSnapshot
+from custom_components.luas.stats import (
+    DecayedRatio,
+    ExponentialStats,
+    LuasDirectionStats,
+    LuasStatsEngine,
+)
+
+START = datetime(2025, 3, 17, 14, 30, tzinfo=UTC)
+
+
+def _snapshot(inbound: list[int], *, operating_normally: bool = True) -> LuasSnapshot:
+    return LuasSnapshot.from_info(
+        LuasInfo.from_dict(
+            {
+                "message": "",
+                "operatingNormally": {"Inbound": operating_normally},
+                "stop": "Sandyford",
+                "trams": [
+                    {"destination": "Parnell", "direction": "Inbound", "dueMins": due}
+                    for due in inbound
+                ],
+            }
+        )
+    )
+
+
+def _forecast(arrivals: list[float], minute: float) -> list[int]:
+    """Due minutes, as the API would give them, of trams arriving in future."""
+    return [
+        math.ceil(arrival - minute)
+        for arrival in arrivals
+        if minute < arrival <= minute + 30
+    ]
+
+
+def _simulate(arrivals: list[float], until: float) -> LuasDirectionStats:
+    stats = LuasDirectionStats()
+    minute = 0.0
+    while minute <= until:
+        trams = _snapshot(_forecast(arrivals, minute)).trams(
+            LuasSnapshot.key("inbound", None)
+        )
+        stats.update(trams, START.timestamp() + minute * 60)
+        minute += 0.5
+    return stats
+
+
+class TestExponentialStats(unittest.TestCase):
+    """Tests for exponentially weighted statistics."""
+
+    def test_constant(self) -> None:
+        """A constant has itself as mean and no variance."""
+        stats = ExponentialStats()
+        assert stats.mean is None
+        assert stats.stddev is None
+        for _ in range(10):
+            stats.add(4)
+        assert stats.mean == pytest.approx(4)
+        assert stats.stddev == pytest.approx(0)
+        assert stats.count == 10  # noqa: PLR2004
+
+    def test_follows_change(self) -> None:
+        """Recent samples outweigh old ones."""
+        stats = ExponentialStats()
+        for _ in range(200):
+            stats.add(10)
+        for _ in range(200):
+            stats.add(20)
+        assert stats.mean == pytest.approx(20, abs=0.1)
+
+    def test_decayed_ratio(self) -> None:
+        """The ratio is of hits among all events."""
+        ratio = DecayedRatio()
+        assert ratio.ratio is None
+        for i in range(10):
+            ratio.add(hit=i % 2 == 0)
+        assert ratio.ratio == pytest.approx(0.5, abs=0.05)
+
+
+class TestLuasDirectionStats(unittest.TestCase):
+    """Tests for following trams across forecasts."""
+
+    def test_regular_service(self) -> None:
+        """Trams every ten minutes, exactly as forecast."""
+        stats = _simulate([10.0 * i for i in range(1, 13)], until=125)
+        assert stats.headway.count == 11  # noqa: PLR2004
+        assert stats.headway.mean == pytest.approx(10, abs=0.5)
+        assert stats.average_wait == pytest.approx(5, abs=0.5)
+        assert stats.reliability.ratio == 1
+        assert stats.error.mean == pytest.approx(0, abs=1)
+        assert stats.bunching.ratio == 0
+
+    def test_irregular_service(self) -> None:
+        """Irregular trams mean waiting longer than half the mean headway."""
+        arrivals = []
+        minute = 0.0
+        for i in range(12):
+            minute += 4 if i % 2 else 16
+            arrivals.append(minute)
+        stats = _simulate(arrivals, until=125)
+        assert stats.headway.mean == pytest.approx(10, abs=1)
+        assert stats.average_wait > 6  # noqa: PLR2004
+        assert stats.bunching.ratio > 0
+
+    def test_cancelled_tram(self) -> None:
+        """A tram which disappears before it's due was forecast wrongly."""
+        stats = LuasDirectionStats()
+        key = LuasSnapshot.key("inbound", None)
+        stats.update(_snapshot([5, 15]).trams(key), START.timestamp())
+        stats.update(_snapshot([14]).trams(key), START.timestamp() + 60)
+        assert stats.reliability.ratio == 0
+        assert stats.headway.count == 0
+
+    def test_gap(self) -> None:
+        """Trams aren't followed across a long gap between forecasts."""
+        stats = LuasDirectionStats()
+        key = LuasSnapshot.key("inbound", None)
+        stats.update(_snapshot([5]).trams(key), START.timestamp())
+        stats.update(_snapshot([]).trams(key), START.timestamp() + 3600)
+        assert stats.reliability.total == 0
+
+
+class TestLuasStatsEngine(unittest.TestCase):
+    """Tests for statistics for a whole stop."""
+
+    def test_not_operating_normally(self) -> None:
+        """Trams in a direction which isn't operating normally aren't counted."""
+        engine = LuasStatsEngine()
+        engine.update(_snapshot([5]), START)
+        engine.update(
+            _snapshot([], operating_normally=False), START + timedelta(minutes=1)
+        )
+        engine.update(_snapshot([]), START + timedelta(minutes=2))
+        assert engine.direction("Inbound").reliability.total == 0
+
+    def test_same_snapshot(self) -> None:
+        """A forecast is only counted once."""
+        engine = LuasStatsEngine()
+        snapshot = _snapshot([5])
+        engine.update(snapshot, START)
+        engine.update(snapshot, START + timedelta(minutes=4))
+        engine.update(_snapshot([]), START + timedelta(minutes=5))
+        # Arrived as first forecast, rather than a minute late
+        assert engine.direction("inbound").error.mean == pytest.approx(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests for luas throttle module."""
+
+import random
+import unittest
+from collections import Counter
+
+from custom_components.luas.throttle import LuasStateThrottle
+
+POLL_SECONDS = 30
+FIRST_TRAM_HOUR = 5.5
+LAST_TRAM_HOUR = 24.5
+
+
+def _day_of_states() -> list[tuple[int, int | None, dict]]:
+    """
+    States of a tram sensor, polled every 30 seconds through a day.
+
+    Trams come every 6 to 12 minutes, and each one's expected arrival wanders
+    by up to 20 seconds between polls.
+    """
+    rng = random.Random(25)  # noqa: S311
+    arrivals = []
+    arrival = FIRST_TRAM_HOUR * 3600
+    while arrival < LAST_TRAM_HOUR * 3600:
+        arrivals.append(arrival)
+        arrival += rng.randint(6, 12) * 60
+
+    states = []
+    for now in range(0, 25 * 3600, POLL_SECONDS):
+        arrivals = [
+            arrival + rng.uniform(-20, 20) if arrival > now else arrival
+            for arrival in arrivals
+        ]
+        due = [int((arrival - now) // 60) for arrival in arrivals if arrival > now]
+        due = [mins for mins in due if mins < 60][:2]  # noqa: PLR2004
+        states.append(
+            (
+                now // 3600,
+                due[0] if due else None,
+                {
+                    "destination": "Brides Glen" if due else None,
+                    "next_due": due[1] if len(due) > 1 else None,
+                    "next_destination": "Brides Glen" if len(due) > 1 else None,
+                    "stale": False,
+                },
+            )
+        )
+    return states
+
+
+def _writes(threshold: int) -> tuple[Counter[int], bool]:
+    """
+    Count the states written per hour through a day.
+
+    Also say whether the published state was always due when a tram was.
+    """
+    throttle = LuasStateThrottle(threshold)
+    writes: Counter[int] = Counter()
+    always_due = True
+    for hour, value, attributes in _day_of_states():
+        if throttle.update(value, attributes):
+            writes[hour] += 1
+        always_due &= value != 0 or throttle.value == 0
+    return writes, always_due
+
+
+class TestLuasStateThrottle(unittest.TestCase):
+    """Tests for coarse tram sensor states."""
+
+    def test_every_change(self) -> None:
+        """With no threshold, every change is published, and only changes."""
+        throttle = LuasStateThrottle()
+        assert throttle.update(5, {"destination": "Tallaght"})
+        assert not throttle.update(5, {"destination": "Tallaght"})
+        assert throttle.update(4, {"destination": "Tallaght"})
+        assert throttle.value == 4  # noqa: PLR2004
+
+    def test_threshold(self) -> None:
+        """Small changes wait until they add up, or the tram is due."""
+        throttle = LuasStateThrottle(3)
+        assert throttle.update(10, {"next_due": 20})
+        assert not throttle.update(9, {"next_due": 19})
+        assert not throttle.update(8, {"next_due": 18})
+        assert throttle.value == 10  # noqa: PLR2004
+        assert throttle.attributes == {"next_due": 20}
+        assert throttle.update(7, {"next_due": 17})
+        assert not throttle.update(5, {"next_due": 15})
+        assert throttle.update(0, {"next_due": 10})
+        assert throttle.update(None, {})
+
+    def test_significant_attributes(self) -> None:
+        """A change of destination or staleness is always published."""
+        throttle = LuasStateThrottle(5)
+        assert throttle.update(10, {"destination": "Tallaght", "stale": False})
+        assert throttle.update(10, {"destination": "Saggart", "stale": False})
+        assert throttle.update(9, {"destination": "Saggart", "stale": True})
+
+    def test_day(self) -> None:
+        """Over a day of forecasts, a threshold cuts the states written."""
+        every, _always_due = _writes(0)
+        coarse, always_due = _writes(3)
+        assert always_due
+        for hour in range(6, 24):
+            # At least one state a minute, due time or next_due
+            assert every[hour] >= 60  # noqa: PLR2004
+            assert coarse[hour] <= every[hour] / 2
+        assert coarse.total() <= every.total() / 2
+
+
+if __name__ == "__main__":
+    unittest.main()